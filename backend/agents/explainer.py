@@ -7,20 +7,22 @@ Responsibility:
 - Never change decisions or routing
 """
 
-from typing import Dict, List
+from typing import List
+
+from backend.services.triage_state import TriageState
 
 
 class ExplainerAgent:
     def __init__(self):
         self.name = "ExplainerAgent"
 
-    def run(self, state: Dict) -> Dict:
+    def run(self, state: TriageState) -> TriageState:
         explanation: List[str] = []
         steps: List[str] = []
 
-        validation = state.get("validation", {})
-        reasoning = state.get("reasoning", {})
-        route = state.get("route")
+        validation = state.validation or {}
+        reasoning = state.reasoning or {}
+        route = state.route
 
         domain = reasoning.get("domain", "UNKNOWN")
         confidence = reasoning.get("confidence", 0.5)
@@ -42,16 +44,15 @@ class ExplainerAgent:
                 "Consider seeking legal advice within the appropriate country or jurisdiction."
             )
 
-            return {
-                **state,
-                "explanation": explanation,
-                "steps": steps,
-                "explainer_metadata": {
-                    "agent": self.name,
-                    "status": "rejected"
-                }
+            state.explanation = explanation
+            state.steps = steps
+            state.explainer_metadata = {
+                "agent": self.name,
+                "status": "rejected"
             }
 
+            return state
+
         # ----------------------------
         # Accepted cases
         # ----------------------------
@@ -104,12 +105,15 @@ class ExplainerAgent:
             "Prepare any relevant documents (contracts, notices, correspondence) for review."
         )
 
-        return {
-            **state,
-            "explanation": explanation,
-            "steps": steps,
-            "explainer_metadata": {
-                "agent": self.name,
-                "status": "explained"
-            }
+        state.explanation = explanation
+        state.steps = steps
+        state.explainer_metadata = {
+            "agent": self.name,
+            "status": "explained"
         }
+
+        return state
+
+    async def arun(self, state: TriageState) -> TriageState:
+        """Async entry point; this agent is pure CPU work, nothing to await."""
+        return self.run(state)
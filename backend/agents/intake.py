@@ -0,0 +1,277 @@
+"""
+Intake Agent
+
+Responsibility:
+- Read the message and any attached documents as streams, chunk by chunk
+- Check every chunk for jurisdiction mentions (validation)
+- Classify every chunk locally as it arrives, and send only the most
+  relevant undecided chunks (up to a per-case budget) to the reasoner
+- Aggregate chunk verdicts into one case-level domain and confidence
+  for RouterAgent
+
+Takes the place of ValidatorAgent and ReasonerAgent for cases with
+attachments (see PlannerAgent). A chunk's text is dropped as soon as it
+is classified: a case holds at most the budgeted chunks in memory, not
+its documents.
+"""
+
+import asyncio
+import heapq
+from collections import Counter, defaultdict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from backend.agents.reasoner import ReasonerAgent
+from backend.agents.validator import ValidatorAgent
+from backend.services import metrics
+from backend.services.chunker import DocumentTooLarge, achunk_text, chunk_text
+from backend.services.jurisdiction import ACCEPTED, REJECTED
+from backend.services.triage_state import TriageState
+
+
+class _Tally:
+    """Chunk verdicts folded in as they come, so none has to be kept"""
+
+    def __init__(self):
+        self.classified = 0
+        self.modes: Counter = Counter()
+        self.tokens = {"input": 0, "output": 0, "estimated": False}
+        self.degraded: Optional[Dict] = None
+
+        self.votes: Dict[str, float] = defaultdict(float)
+        self.support: Dict[str, int] = defaultdict(int)
+        self.best: Dict[str, Dict] = {}
+
+    def add(self, reasoning: Optional[Dict], lookup: Dict, length: int, mode: str) -> None:
+        self.classified += 1
+        self.modes[lookup.get("mode") or mode] += 1
+
+        used = lookup.get("tokens")
+        if used:
+            self.tokens["input"] += used["input"]
+            self.tokens["output"] += used["output"]
+            self.tokens["estimated"] = self.tokens["estimated"] or used["estimated"]
+        if self.degraded is None and "degraded" in lookup:
+            self.degraded = lookup["degraded"]
+
+        if not reasoning:
+            return
+
+        # Each chunk votes for its domain with confidence x length, so a
+        # long letter outweighs a one-line cover note and UNKNOWN chunks
+        # (greetings, boilerplate) don't vote
+        domain = reasoning.get("domain", "UNKNOWN")
+        confidence = float(reasoning.get("confidence") or 0.0)
+        if domain == "UNKNOWN" or confidence <= 0:
+            return
+
+        self.votes[domain] += confidence * length
+        self.support[domain] += length
+        if confidence > float(self.best.get(domain, {}).get("confidence") or 0.0):
+            self.best[domain] = reasoning
+
+
+class _CaseIntake:
+    """What one case keeps while its sources are read"""
+
+    def __init__(self):
+        self.found = {ACCEPTED: [], REJECTED: []}
+        self.chunks = 0
+        self.sent_to_reasoner = 0
+        self.tally = _Tally()
+        # Min-heap of (relevance, -chunk number, text, local verdict):
+        # the chunks bound for the reasoner, least relevant on top
+        self.candidates: List[Tuple[int, int, str, Dict]] = []
+
+
+class IntakeAgent:
+    def __init__(
+        self,
+        validator: ValidatorAgent,
+        reasoner: ReasonerAgent,
+        chunk_chars: int = 2000,
+        concurrency: int = 16,
+        max_classified: int = 64,
+        max_chunks: int = 5000
+    ):
+        self.name = "IntakeAgent"
+        self.validator = validator
+        self.reasoner = reasoner
+        self.chunk_chars = chunk_chars
+        # Chunks classified at once, per case
+        self.concurrency = concurrency
+        # Chunks per case sent to the reasoner (LLM); the rest keep their local verdict
+        self.max_classified = max_classified
+        # Chunks per case read at all; beyond this the case is refused
+        self.max_chunks = max_chunks
+
+    def run(self, state: TriageState) -> TriageState:
+        """Sync variant: documents are plain iterables, chunks are classified in turn"""
+        case = _CaseIntake()
+
+        for source in self._sources(state):
+            for chunk in chunk_text(source, self.chunk_chars):
+                self._take(case, chunk)
+
+        state = self.validator.apply(state, case.found)
+        if not state.eligible:
+            return self._finish(state, case, classified=False)
+
+        candidates, case.candidates = case.candidates, []
+        case.sent_to_reasoner = len(candidates)
+        while candidates:
+            _, _, chunk, _ = candidates.pop()
+            self._add(case, self.reasoner.reason(chunk), len(chunk))
+        return self._finish(state, case)
+
+    async def arun(self, state: TriageState) -> TriageState:
+        """
+        Documents are read concurrently, and each chunk is checked and
+        classified locally as it arrives. Once everything is read (and
+        the case validated), the chunks picked for the reasoner are
+        classified concurrently.
+        """
+        case = _CaseIntake()
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def classify(chunk: str) -> Tuple[Tuple[Optional[Dict], Dict], int]:
+            async with limit:
+                return await self.reasoner.areason(chunk), len(chunk)
+
+        async def read(source) -> None:
+            async for chunk in achunk_text(self._apieces(source), self.chunk_chars):
+                self._take(case, chunk)
+
+        readers = [asyncio.ensure_future(read(source)) for source in self._sources(state)]
+        classifiers: List[asyncio.Task] = []
+        try:
+            await asyncio.gather(*readers)
+
+            state = self.validator.apply(state, case.found)
+            if not state.eligible:
+                return self._finish(state, case, classified=False)
+
+            candidates, case.candidates = case.candidates, []
+            case.sent_to_reasoner = len(candidates)
+            classifiers = [
+                asyncio.ensure_future(classify(chunk))
+                for _, _, chunk, _ in candidates
+            ]
+            # The texts now live only in their tasks, until each is classified
+            del candidates
+
+            for done in asyncio.as_completed(classifiers):
+                result, length = await done
+                self._add(case, result, length)
+        finally:
+            # Failed, rejected or cancelled: stop every reader and
+            # classification still running, and wait for them to stop
+            pending = [task for task in readers + classifiers if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        return self._finish(state, case)
+
+    # ----------------------------
+    # Reading
+    # ----------------------------
+    def _sources(self, state: TriageState) -> List:
+        return [[state.message]] + list(state.documents)
+
+    async def _apieces(self, source) -> AsyncIterator[str]:
+        if hasattr(source, "__aiter__"):
+            async for piece in source:
+                yield piece
+        else:
+            for piece in source:
+                yield piece
+
+    def _take(self, case: _CaseIntake, chunk: str) -> None:
+        """Validate and locally classify one chunk; keep it only if it may go to the reasoner"""
+        case.chunks += 1
+        if case.chunks > self.max_chunks:
+            raise DocumentTooLarge(
+                f"Case has more than {self.max_chunks} chunks of {self.chunk_chars} characters"
+            )
+
+        for kind, terms in self.validator.matcher.match(chunk).items():
+            case.found[kind].extend(term for term in terms if term not in case.found[kind])
+
+        verdict, final = self.reasoner.local_verdict(chunk)
+        if final:
+            case.tally.add(verdict, {}, len(chunk), "local")
+            return
+
+        # Most keyword hits first; among equals, the earlier chunk
+        entry = (self.reasoner.local_classifier.relevance(chunk), -case.chunks, chunk, verdict)
+        if len(case.candidates) < self.max_classified:
+            heapq.heappush(case.candidates, entry)
+            return
+
+        _, _, dropped, verdict = heapq.heappushpop(case.candidates, entry)
+        case.tally.add(verdict, {}, len(dropped), "local_over_budget")
+
+    def _add(self, case: _CaseIntake, result: Tuple[Optional[Dict], Dict], length: int) -> None:
+        reasoning, lookup = result
+        case.tally.add(reasoning, lookup, length, self.reasoner.backend.mode)
+
+    # ----------------------------
+    # Aggregation
+    # ----------------------------
+    def _finish(self, state: TriageState, case: _CaseIntake, classified: bool = True) -> TriageState:
+        tally = case.tally if classified else _Tally()
+
+        state.intake_metadata = {
+            "agent": self.name,
+            "documents": len(state.documents),
+            "chunks": case.chunks,
+            "classified": tally.classified,
+            "sent_to_reasoner": case.sent_to_reasoner if classified else 0
+        }
+
+        if not tally.classified:
+            return state
+
+        for mode, count in tally.modes.items():
+            metrics.REASONING_TOTAL.labels(mode).inc(count)
+        metrics.LLM_TOKENS.labels("input").inc(tally.tokens["input"])
+        metrics.LLM_TOKENS.labels("output").inc(tally.tokens["output"])
+
+        metadata = {
+            "agent": self.name,
+            "mode": "documents",
+            "chunk_modes": dict(tally.modes),
+            "tokens": tally.tokens
+        }
+        if tally.degraded is not None:
+            metadata["degraded"] = tally.degraded
+
+        state.reasoning = self._aggregate(tally)
+        state.reasoner_metadata = metadata
+        return state
+
+    def _aggregate(self, tally: _Tally) -> Dict:
+        """
+        Case confidence is the winning domain's share of the vote times
+        the mean confidence of the chunks behind it (see _Tally.add).
+        """
+        if not tally.votes:
+            return {
+                "domain": "UNKNOWN",
+                "confidence": 0.0,
+                "why": "None of the message or documents could be linked to a supported legal domain.",
+                "missing_info": ["Describe the legal issue in more detail"]
+            }
+
+        votes = tally.votes
+        domain = max(votes, key=votes.get)
+        share = votes[domain] / sum(votes.values())
+        mean_confidence = votes[domain] / tally.support[domain]
+
+        return {
+            "domain": domain,
+            "confidence": round(share * mean_confidence, 2),
+            "why": tally.best[domain].get("why", ""),
+            "missing_info": tally.best[domain].get("missing_info", [])
+        }
@@ -7,33 +7,199 @@ Responsibility:
 - Never affect routing or decisions
 """
 
+import asyncio
 import sqlite3
 import os
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+from backend.services import metrics
+from backend.services.triage_state import TriageState
+from backend.services.write_behind import WriteBehindWriter, reimport_spilled
 
-class MemoryAgent:
-    def __init__(self, db_path: str = None):
-        self.name = "MemoryAgent"
 
-        if db_path is None:
-            db_path = os.path.join(
-                os.path.dirname(__file__),
-                "..",
-                "data",
-                "triage.db"
+# Schema migrations, applied in order after the base table exists.
+# PRAGMA user_version records how many have been applied.
+MIGRATIONS: List[List[str]] = [
+    # 1: indexes for filtered, keyset-paginated history queries
+    #    (every index implicitly ends with the rowid, i.e. cases.id)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_cases_created ON cases (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_domain_created ON cases (domain, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_route_created ON cases (route, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_eligible_created ON cases (eligible, created_at)",
+    ],
+    # 2: daily rollup kept current by trigger, so aggregates never scan cases
+    [
+        """
+        CREATE TABLE IF NOT EXISTS case_daily_stats (
+            day TEXT NOT NULL,
+            domain TEXT NOT NULL,
+            route TEXT NOT NULL,
+            eligible INTEGER NOT NULL,
+            confidence_bucket INTEGER NOT NULL,
+            cases INTEGER NOT NULL,
+            PRIMARY KEY (day, domain, route, eligible, confidence_bucket)
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS cases_daily_stats_insert
+        AFTER INSERT ON cases
+        BEGIN
+            INSERT INTO case_daily_stats (
+                day, domain, route, eligible, confidence_bucket, cases
             )
+            VALUES (
+                substr(NEW.created_at, 1, 10),
+                COALESCE(NEW.domain, ''),
+                COALESCE(NEW.route, ''),
+                COALESCE(NEW.eligible, 0),
+                MAX(MIN(CAST(COALESCE(NEW.confidence, 0) * 10 AS INTEGER), 9), 0),
+                1
+            )
+            ON CONFLICT (day, domain, route, eligible, confidence_bucket)
+            DO UPDATE SET cases = cases + 1;
+        END
+        """,
+        """
+        INSERT INTO case_daily_stats (
+            day, domain, route, eligible, confidence_bucket, cases
+        )
+        SELECT
+            substr(created_at, 1, 10),
+            COALESCE(domain, ''),
+            COALESCE(route, ''),
+            COALESCE(eligible, 0),
+            MAX(MIN(CAST(COALESCE(confidence, 0) * 10 AS INTEGER), 9), 0),
+            COUNT(*)
+        FROM cases
+        GROUP BY 1, 2, 3, 4, 5
+        """,
+    ],
+    # 3: LLM token usage per case (NULL for cases stored before this)
+    [
+        "ALTER TABLE cases ADD COLUMN input_tokens INTEGER",
+        "ALTER TABLE cases ADD COLUMN output_tokens INTEGER",
+    ],
+    # 4: archive files holding months pruned from cases (see CaseArchiver)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS case_archives (
+            path TEXT PRIMARY KEY,
+            month TEXT NOT NULL,
+            cases INTEGER NOT NULL,
+            min_id INTEGER NOT NULL,
+            max_id INTEGER NOT NULL,
+            format TEXT NOT NULL,
+            archived_at TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_case_archives_month ON case_archives (month)",
+    ],
+    # 5: full-text index over messages for similar-case search. External
+    #    content (the text is stored once, in cases); triggers keep it in
+    #    step with inserts, archival deletes and edits
+    [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+            message,
+            content='cases',
+            content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS cases_fts_insert
+        AFTER INSERT ON cases
+        BEGIN
+            INSERT INTO cases_fts (rowid, message) VALUES (NEW.id, NEW.message);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS cases_fts_delete
+        AFTER DELETE ON cases
+        BEGIN
+            INSERT INTO cases_fts (cases_fts, rowid, message)
+            VALUES ('delete', OLD.id, OLD.message);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS cases_fts_update
+        AFTER UPDATE OF message ON cases
+        BEGIN
+            INSERT INTO cases_fts (cases_fts, rowid, message)
+            VALUES ('delete', OLD.id, OLD.message);
+            INSERT INTO cases_fts (rowid, message) VALUES (NEW.id, NEW.message);
+        END
+        """,
+        "INSERT INTO cases_fts (cases_fts) VALUES ('rebuild')",
+    ],
+]
+
+
+DEFAULT_DB_PATH = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        "..",
+        "data",
+        "triage.db"
+    )
+)
+
+
+class MemoryAgent:
+    INSERT_SQL = """
+        INSERT INTO cases (
+            message,
+            domain,
+            eligible,
+            route,
+            confidence,
+            reasoning_mode,
+            input_tokens,
+            output_tokens,
+            created_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def __init__(
+        self,
+        db_path: str = None,
+        write_behind: bool = False,
+        max_queue: int = 10000,
+        flush_batch: int = 200,
+        flush_interval: float = 0.5
+    ):
+        self.name = "MemoryAgent"
 
-        self.db_path = os.path.abspath(db_path)
+        self.db_path = os.path.abspath(db_path or DEFAULT_DB_PATH)
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
 
         self._init_db()
 
+        # Records written directly because the write-behind queue was full
+        self.sync_fallbacks = 0
+
+        self.writer: Optional[WriteBehindWriter] = None
+        if write_behind:
+            self.writer = WriteBehindWriter(
+                self.db_path,
+                self.INSERT_SQL,
+                max_queue=max_queue,
+                batch_size=flush_batch,
+                flush_interval=flush_interval
+            )
+            metrics.PERSIST_QUEUE_DEPTH.set_function(self.writer.queue_depth)
+
     def _init_db(self):
-        """Create table if it doesn't exist"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Create table if it doesn't exist, then apply pending migrations"""
+        # Long timeout: another process may be running a slow migration
+        # (e.g. indexing every stored case)
+        with sqlite3.connect(self.db_path, timeout=300) as conn:
             cursor = conn.cursor()
+            # WAL lets readers and the writer work concurrently
+            cursor.execute("PRAGMA journal_mode=WAL")
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS cases (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -48,49 +214,135 @@ class MemoryAgent:
             """)
             conn.commit()
 
-    def run(self, state: Dict) -> Dict:
+            # Several processes (uvicorn or bulk workers) may open a new
+            # store at once. Each migration re-reads the version under the
+            # write lock, in one transaction with its version bump, so it
+            # runs exactly once
+            conn.isolation_level = None
+            while True:
+                cursor.execute("BEGIN IMMEDIATE")
+                version = cursor.execute("PRAGMA user_version").fetchone()[0]
+                if version >= len(MIGRATIONS):
+                    cursor.execute("COMMIT")
+                    return
+                try:
+                    for statement in MIGRATIONS[version]:
+                        cursor.execute(statement)
+                    cursor.execute(f"PRAGMA user_version = {version + 1}")
+                    cursor.execute("COMMIT")
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
+
+    def run(self, state: TriageState) -> TriageState:
         """Persist case metadata and return state unchanged"""
 
-        state.setdefault("explanation", [])
-        state.setdefault("steps", [])
+        record = self._record(state)
+
+        if self.writer is not None:
+            if self.writer.submit(record):
+                return self._mark_persisted(state, "queued")
+            self.sync_fallbacks += 1
+
+        self._write([record])
+
+        return self._mark_persisted(state, "persisted")
 
-        reasoning = state.get("reasoning", {})
-        validation = state.get("validation", {})
+    def run_many(self, states: List[TriageState]) -> List[TriageState]:
+        """Persist several cases in a single transaction"""
 
-        record = (
-            state.get("message"),
+        records = [self._record(state) for state in states]
+
+        if self.writer is not None:
+            statuses: List[str] = []
+            overflow: List[Tuple] = []
+
+            for record in records:
+                if self.writer.submit(record):
+                    statuses.append("queued")
+                else:
+                    statuses.append("persisted")
+                    overflow.append(record)
+
+            if overflow:
+                self.sync_fallbacks += len(overflow)
+                self._write(overflow)
+
+            return [
+                self._mark_persisted(state, status)
+                for state, status in zip(states, statuses)
+            ]
+
+        self._write(records)
+
+        return [self._mark_persisted(state, "persisted") for state in states]
+
+    def _write(self, records: List[Tuple]) -> None:
+        with metrics.PERSIST_DURATION.labels("sync").time():
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(self.INSERT_SQL, records)
+                conn.commit()
+
+    def close(self) -> None:
+        """Drain queued records (write-behind mode); safe to call twice"""
+        if self.writer is not None:
+            self.writer.close()
+
+    def reimport_unwritten(self) -> int:
+        """Write records the write-behind writer had to spill; see reimport_spilled"""
+        return reimport_spilled(self.db_path, self.INSERT_SQL)
+
+    def stats(self) -> Dict:
+        stats = {
+            "mode": "write_behind" if self.writer is not None else "sync",
+            "sync_fallbacks": self.sync_fallbacks
+        }
+        if self.writer is not None:
+            stats.update(self.writer.stats())
+        return stats
+
+    def _record(self, state: TriageState) -> Tuple:
+        reasoning = state.reasoning or {}
+        validation = state.validation or {}
+        reasoner_metadata = state.reasoner_metadata or {}
+
+        # Zero when no LLM call was made (local, cached or rejected cases)
+        tokens = reasoner_metadata.get("tokens", {})
+
+        return (
+            state.message,
             reasoning.get("domain"),
             validation.get("eligible"),
-            state.get("route"),
+            state.route,
             reasoning.get("confidence"),
-            state.get("reasoner_metadata", {}).get("mode"),
+            reasoner_metadata.get("mode"),
+            tokens.get("input", 0),
+            tokens.get("output", 0),
             datetime.utcnow().isoformat()
         )
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO cases (
-                    message,
-                    domain,
-                    eligible,
-                    route,
-                    confidence,
-                    reasoning_mode,
-                    created_at
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, record)
-            conn.commit()
-
-        state["explanation"].append(
+    def _mark_persisted(self, state: TriageState, status: str) -> TriageState:
+        state.notices.append(
             "The case information was securely stored for audit and future improvement purposes."
         )
 
-        state["memory_metadata"] = {
+        state.memory_metadata = {
             "agent": self.name,
-            "status": "persisted",
+            "status": status,
             "db_path": self.db_path
         }
 
         return state
+
+    async def arun(self, state: TriageState) -> TriageState:
+        """Persist on a worker thread so sqlite3 I/O never blocks the event loop"""
+        if self.writer is not None:
+            # Enqueueing is non-blocking; only a full queue needs a thread
+            if self.writer.submit(self._record(state), timeout=0):
+                return self._mark_persisted(state, "queued")
+
+        return await asyncio.to_thread(self.run, state)
+
+    async def arun_many(self, states: List[TriageState]) -> List[TriageState]:
+        return await asyncio.to_thread(self.run_many, states)
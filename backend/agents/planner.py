@@ -1,30 +1,75 @@
 from typing import Dict, List
 
+from backend.services.triage_state import TriageState
+
 
 class PlannerAgent:
-    def __init__(self):
+    def __init__(self, defer_side_effects: bool = False):
         self.name = "PlannerAgent"
 
-    def run(self, state: Dict) -> Dict:
+        # Persistence only needs to finish eventually, not before the reply
+        self.defer_side_effects = defer_side_effects
+
+    def run(self, state: TriageState) -> TriageState:
         """
-        Produces a deterministic execution plan.
+        Produces a deterministic execution graph.
         Legal intake must always reason and explain.
+
+        Each node runs once everything in `after` has finished (or been
+        skipped). Nodes that `requires_eligible` are skipped once the
+        validator rejects the case. `deferred` nodes run after the
+        response has been built.
+
+        Cases with attached documents go through the intake agent
+        instead, which validates and classifies the message and the
+        documents chunk by chunk in one streaming pass.
         """
 
-        plan: List[str] = [
-            "validator",
-            "reasoner",
-            "router",
-            "explainer",
-            "memory"
-        ]
+        if state.documents:
+            graph: List[Dict] = [
+                self._node("intake"),
+                self._node("router", after=["intake"], requires_eligible=True),
+                self._node("explainer", after=["intake", "router"]),
+                self._node("memory", after=["intake", "router"], deferred=self.defer_side_effects)
+            ]
+        else:
+            graph = [
+                self._node("validator"),
+                self._node("reasoner", after=["validator"], requires_eligible=True),
+                self._node("router", after=["reasoner"], requires_eligible=True),
+                self._node("explainer", after=["validator", "router"]),
+                # Needs the decision, not its explanation
+                self._node(
+                    "memory",
+                    after=["validator", "reasoner", "router"],
+                    deferred=self.defer_side_effects
+                )
+            ]
 
+        state.graph = graph
+        state.plan = [node["agent"] for node in graph]
+        state.planner_metadata = {
+            "agent": self.name,
+            "confidence": "high",
+            "policy": "always_reason_and_explain"
+        }
+
+        return state
+
+    def _node(
+        self,
+        agent: str,
+        after: List[str] = None,
+        requires_eligible: bool = False,
+        deferred: bool = False
+    ) -> Dict:
         return {
-            **state,
-            "plan": plan,
-            "planner_metadata": {
-                "agent": self.name,
-                "confidence": "high",
-                "policy": "always_reason_and_explain"
-            }
+            "agent": agent,
+            "after": after or [],
+            "requires_eligible": requires_eligible,
+            "deferred": deferred
         }
+
+    async def arun(self, state: TriageState) -> TriageState:
+        """Async entry point; this agent is pure CPU work, nothing to await."""
+        return self.run(state)
@@ -5,53 +5,368 @@ Responsibility:
 - Classify legal domain
 - Provide structured reasoning
 - Runs in deterministic mode by default
-- Supports Gemini-backed reasoning via feature flag
+- Supports LLM-backed reasoning via feature flag (Gemini or a local stub)
 """
 
-from typing import Dict
-import os
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
 
-
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
-except ImportError:
-    ChatGoogleGenerativeAI = None
+from backend.services import metrics
+from backend.services.llm import LLMBackend, build_backend
+from backend.services.local_classifier import LocalClassifier
+from backend.services.message_budget import estimate_tokens, fit_message
+from backend.services.micro_batch import MicroBatcher
+from backend.services.resilience import LLMUnavailable
+from backend.services.reasoning_cache import ReasoningCache
+from backend.services.semantic_cache import SemanticCache
+from backend.services.triage_state import TriageState
 
 
 class ReasonerAgent:
     """
-    LLM-FIRST legal reasoning agent.
+    Legal reasoning agent.
+
+    The local classifier is always consulted first. Without use_llm its
+    answer is final; with use_llm, messages it cannot classify with at
+    least local_threshold confidence go through the caches and the LLM
+    backend (Gemini unless LLM_BACKEND says otherwise).
+
+    Only up to max_input_chars of the message is sent to the LLM (the
+    most relevant sentences, see fit_message); 0 sends it whole. The
+    "compact" prompt mode trades the long instruction block for a short one.
+
+    With batch_window > 0, async LLM calls made within batch_window seconds
+    of each other (up to batch_max_size) share a single prompt.
     """
 
-    def __init__(self, use_llm: bool = True):
+    # Part of both cache keys: bump when the prompt or parsing changes
+    PROMPT_VERSION = "v1"
+
+    def __init__(
+        self,
+        use_llm: bool = True,
+        cache: Optional[ReasoningCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        local_classifier: Optional[LocalClassifier] = None,
+        local_threshold: float = 0.8,
+        backend: Optional[LLMBackend] = None,
+        prompt_mode: str = "full",
+        max_input_chars: int = 4000,
+        batch_window: float = 0.0,
+        batch_max_size: int = 16
+    ):
         self.name = "ReasonerAgent"
         self.use_llm = use_llm
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.local_classifier = local_classifier or LocalClassifier()
+        self.local_threshold = local_threshold
+        self.max_input_chars = max_input_chars
+        self.backend = None
+        self.batcher = None
 
-        if not os.getenv("GEMINI_API_KEY"):
-            raise RuntimeError("GEMINI_API_KEY is required for reasoning")
+        if prompt_mode not in ("full", "compact"):
+            raise ValueError(f"Unknown prompt mode: {prompt_mode}")
+        self.prompt_mode = prompt_mode
 
-        self.model = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            temperature=0.2,
-            google_api_key=os.getenv("GEMINI_API_KEY")
-        )
+        if not use_llm:
+            return
+
+        self.backend = backend or build_backend()
+
+        if batch_window > 0 and batch_max_size > 1:
+            self.batcher = MicroBatcher(self._allm_batch, batch_window, batch_max_size)
+
+    def run(self, state: TriageState) -> TriageState:
+        reasoning, lookup = self.reason(state.message)
+
+        return self.with_reasoning(state, reasoning, lookup)
+
+    async def arun(self, state: TriageState) -> TriageState:
+        """
+        Async variant of run().
+        Awaits the model via ainvoke so no worker thread is held
+        for the duration of the LLM round trip.
+        """
+        reasoning, lookup = await self.areason(state.message)
+
+        return self.with_reasoning(state, reasoning, lookup)
+
+    # ----------------------------
+    # Lookup chain: local -> exact cache -> semantic cache -> LLM
+    # ----------------------------
+    def _local_reasoning(self, message: str) -> Optional[Dict]:
+        """Local answer if it is final for this message, otherwise None"""
+        reasoning, final = self.local_verdict(message)
+        return reasoning if final else None
+
+    def local_verdict(self, message: str) -> Tuple[Dict, bool]:
+        """
+        Local classification, and whether it is final: True when reason()
+        would return it without looking further (LLM off or confident).
+        """
+        reasoning = self.local_classifier.classify(message)
+        return reasoning, not self.use_llm or reasoning["confidence"] >= self.local_threshold
+
+    def reason(self, message: str) -> Tuple[Optional[Dict], Dict]:
+        """
+        Returns (reasoning, lookup). reasoning is None when the model reply
+        could not be parsed; lookup records where it came from.
+        """
+        local = self._local_reasoning(message)
+        if local is not None:
+            return local, {"mode": "local"}
+
+        prepared, lookup = self._prepare_message(message)
+
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(prepared)
+            hit = self.cache.get(key)
+            if hit is not None:
+                reasoning, lookup["cache_tier"] = hit
+                return reasoning, lookup
+
+        vector = None
+        if self.semantic_cache is not None:
+            vector = self.semantic_cache.embed(prepared)
+            match = self.semantic_cache.search(vector, self._prompt_version(), self.backend.model_name)
+            if match is not None:
+                neighbour, lookup["similarity"] = match
+                lookup["mode"] = "semantic_cache"
+                return self._semantic_reasoning(neighbour, lookup["similarity"]), lookup
+
+        try:
+            reasoning, lookup["tokens"] = self._llm_reasoning(prepared)
+        except LLMUnavailable as e:
+            return self._degraded(message, lookup, e)
+
+        if reasoning is not None:
+            if key is not None:
+                self.cache.set(key, reasoning)
+            if vector is not None:
+                self.semantic_cache.add(vector, reasoning, self._prompt_version(), self.backend.model_name)
+
+        return reasoning, lookup
+
+    async def areason(self, message: str) -> Tuple[Optional[Dict], Dict]:
+        """Async mirror of reason(); embedding and index I/O run on worker threads"""
+        local = self._local_reasoning(message)
+        if local is not None:
+            return local, {"mode": "local"}
+
+        prepared, lookup = self._prepare_message(message)
 
-    def run(self, state: Dict) -> Dict:
-        message = state.get("message", "")
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(prepared)
+            hit = await self.cache.aget(key)
+            if hit is not None:
+                reasoning, lookup["cache_tier"] = hit
+                return reasoning, lookup
 
-        reasoning = self._llm_reasoning(message)
+        vector = None
+        if self.semantic_cache is not None:
+            vector = await asyncio.to_thread(self.semantic_cache.embed, prepared)
+            match = await asyncio.to_thread(
+                self.semantic_cache.search, vector, self._prompt_version(), self.backend.model_name
+            )
+            if match is not None:
+                neighbour, lookup["similarity"] = match
+                lookup["mode"] = "semantic_cache"
+                return self._semantic_reasoning(neighbour, lookup["similarity"]), lookup
 
+        try:
+            reasoning, lookup["tokens"] = await self._allm_reasoning(prepared)
+        except LLMUnavailable as e:
+            return self._degraded(message, lookup, e)
+
+        if reasoning is not None:
+            if key is not None:
+                await self.cache.aset(key, reasoning)
+            if vector is not None:
+                await asyncio.to_thread(
+                    self.semantic_cache.add, vector, reasoning,
+                    self._prompt_version(), self.backend.model_name
+                )
+
+        return reasoning, lookup
+
+    def _degraded(self, message: str, lookup: Dict, error: LLMUnavailable) -> Tuple[Dict, Dict]:
+        """Local classification when the LLM timed out, failed or is switched off"""
+        lookup["mode"] = "local_fallback"
+        lookup["degraded"] = {"reason": error.reason, "detail": str(error)}
+        return self.local_classifier.classify(message), lookup
+
+    def _prepare_message(self, message: str) -> Tuple[str, Dict]:
+        """
+        The part of the message the LLM (and the caches) will see,
+        and a lookup dict recording how much was cut.
+        """
+        prepared = fit_message(message, self.max_input_chars, self.local_classifier.relevance)
+
+        return prepared, {
+            "input": {
+                "chars": len(message),
+                "sent_chars": len(prepared),
+                "truncated": prepared != message.strip()
+            }
+        }
+
+    def _prompt_version(self) -> str:
+        # The prompt mode changes answers as much as the prompt version does
+        return f"{self.PROMPT_VERSION}-{self.prompt_mode}"
+
+    def _cache_key(self, message: str) -> str:
+        return self.cache.key(message, self._prompt_version(), self.backend.model_name)
+
+    def _semantic_reasoning(self, neighbour: Dict, similarity: float) -> Dict:
+        """
+        A similar message's domain and confidence; its explanation was
+        written for that message, so it is not reused
+        """
         return {
-            **state,
-            "reasoning": reasoning,
-            "reasoner_metadata": {
-                "agent": self.name,
-                "mode": "gemini"
+            "domain": neighbour["domain"],
+            "confidence": neighbour["confidence"],
+            "why": (
+                f"Classified as {neighbour['domain']} from a previously triaged message "
+                f"with similar wording (similarity {similarity:.2f})."
+            ),
+            "missing_info": []
+        }
+
+    def with_reasoning(
+        self,
+        state: TriageState,
+        reasoning: Optional[Dict],
+        lookup: Dict
+    ) -> TriageState:
+        """Attach the result of reason() / areason() to a triage state"""
+        # Semantic hits reuse a similar case's result, so audit them separately
+        mode = lookup.get("mode") or self.backend.mode
+
+        metadata = {
+            "agent": self.name,
+            "mode": mode
+        }
+
+        # Shared with a concurrent identical request (see TriageEngine)
+        if lookup.get("coalesced"):
+            metadata["coalesced"] = True
+
+        metrics.REASONING_TOTAL.labels(mode).inc()
+
+        if mode == "local":
+            state.reasoning = reasoning
+            state.reasoner_metadata = metadata
+            return state
+
+        if self.cache is not None:
+            cache_stats = self.cache.stats()
+            cache_tier = lookup.get("cache_tier")
+            metrics.REASONING_CACHE.labels("exact", "hit" if cache_tier else "miss").inc()
+            metadata["cache"] = {
+                "status": "hit" if cache_tier else "miss",
+                "tier": cache_tier,
+                "hits": cache_stats["hits"],
+                "misses": cache_stats["misses"]
+            }
+
+        if "degraded" in lookup:
+            metadata["degraded"] = lookup["degraded"]
+
+        metadata["input"] = lookup["input"]
+        metadata["prompt_mode"] = self.prompt_mode
+
+        # No LLM call was made for cache hits
+        tokens = lookup.get("tokens", {"input": 0, "output": 0, "estimated": False})
+        metadata["tokens"] = tokens
+        metrics.LLM_TOKENS.labels("input").inc(tokens["input"])
+        metrics.LLM_TOKENS.labels("output").inc(tokens["output"])
+
+        if self.semantic_cache is not None and "cache_tier" not in lookup:
+            metrics.REASONING_CACHE.labels(
+                "semantic", "hit" if "similarity" in lookup else "miss"
+            ).inc()
+            metadata["semantic_cache"] = {
+                "status": "hit" if "similarity" in lookup else "miss",
+                "similarity": lookup.get("similarity")
             }
+
+        state.reasoning = reasoning or self._fallback_reasoning()
+        state.reasoner_metadata = metadata
+        return state
+
+    def _llm_reasoning(self, message: str) -> Tuple[Optional[Dict], Dict]:
+        prompt = self._build_prompt(message)
+        with metrics.LLM_DURATION.time():
+            response = self.backend.invoke(prompt)
+        return self._parse_response(response.content), self._token_usage(prompt, response)
+
+    async def _allm_reasoning(self, message: str) -> Tuple[Optional[Dict], Dict]:
+        if self.batcher is not None:
+            return await self.batcher.submit(message)
+
+        prompt = self._build_prompt(message)
+        with metrics.LLM_DURATION.time():
+            response = await self.backend.ainvoke(prompt)
+        return self._parse_response(response.content), self._token_usage(prompt, response)
+
+    async def _allm_batch(self, messages: List[str]) -> List[Tuple[Optional[Dict], Dict]]:
+        """
+        One LLM call for several messages. Token usage is split evenly
+        across the batch. Entries missing from the reply come back as None,
+        like any unparseable reply.
+        """
+        if len(messages) == 1:
+            prompt = self._build_prompt(messages[0])
+        else:
+            prompt = self._build_batch_prompt(messages)
+
+        with metrics.LLM_DURATION.time():
+            response = await self.backend.ainvoke(prompt)
+
+        usage = self._token_usage(prompt, response)
+
+        if len(messages) == 1:
+            return [(self._parse_response(response.content), usage)]
+
+        parsed = self._parse_batch_response(response.content, len(messages))
+
+        count = len(messages)
+        return [
+            (reasoning, {
+                "input": usage["input"] // count + (1 if i < usage["input"] % count else 0),
+                "output": usage["output"] // count + (1 if i < usage["output"] % count else 0),
+                "estimated": usage["estimated"],
+                "batch_size": count
+            })
+            for i, reasoning in enumerate(parsed)
+        ]
+
+    def _token_usage(self, prompt: str, response) -> Dict:
+        """Counts reported by the backend, or estimated from text length"""
+        usage = getattr(response, "usage_metadata", None) or {}
+
+        if usage.get("input_tokens") is not None and usage.get("output_tokens") is not None:
+            return {
+                "input": int(usage["input_tokens"]),
+                "output": int(usage["output_tokens"]),
+                "estimated": False
+            }
+
+        return {
+            "input": estimate_tokens(prompt),
+            "output": estimate_tokens(response.content),
+            "estimated": True
         }
 
-    def _llm_reasoning(self, message: str) -> Dict:
-        prompt = f"""
+    def _build_prompt(self, message: str) -> str:
+        if self.prompt_mode == "compact":
+            return self._build_compact_prompt(message)
+
+        return f"""
 You are a legal intake reasoning agent for a UK legal advice clinic.
 
 Your task:
@@ -81,14 +396,76 @@ User message:
 \"\"\"{message}\"\"\"
 """
 
-        response = self.model.invoke(prompt)
+    def _build_compact_prompt(self, message: str) -> str:
+        """About a fifth of the full prompt's instruction tokens"""
+        return f"""Classify this UK legal clinic intake message. No advice, outcomes or law citations.
+Domains: HOUSING, EMPLOYMENT, IMMIGRATION, FAMILY, DEBT, BENEFITS, UNKNOWN
+Reply with JSON only: {{"domain": str, "confidence": 0-1, "why": str, "missing_info": [str]}}
+\"\"\"{message}\"\"\"
+"""
+
+    def _build_batch_prompt(self, messages: List[str]) -> str:
+        count = len(messages)
+        quoted = "\n".join(
+            f'Message {i}:\n"""{message}"""' for i, message in enumerate(messages, start=1)
+        )
+
+        if self.prompt_mode == "compact":
+            return f"""Classify each of these {count} UK legal clinic intake messages independently. No advice, outcomes or law citations.
+Domains: HOUSING, EMPLOYMENT, IMMIGRATION, FAMILY, DEBT, BENEFITS, UNKNOWN
+Reply with a JSON array only, {count} objects in message order: {{"domain": str, "confidence": 0-1, "why": str, "missing_info": [str]}}
+{quoted}
+"""
+
+        return f"""
+You are a legal intake reasoning agent for a UK legal advice clinic.
+
+For EACH of the {count} user messages below, independently:
+- Identify the legal domain of the issue
+- Assess confidence in classification
+- Explain why the issue belongs to that domain
+- Identify any missing information
+
+Allowed domains:
+HOUSING, EMPLOYMENT, IMMIGRATION, FAMILY, DEBT, BENEFITS, UNKNOWN
+
+Rules:
+- Do NOT give legal advice
+- Do NOT suggest outcomes
+- Do NOT cite laws
+- ONLY classify and explain reasoning
+
+Return a STRICT JSON array with exactly {count} objects, in message order:
+[
+  {{
+    "domain": string,
+    "confidence": number between 0 and 1,
+    "why": string,
+    "missing_info": [string]
+  }}
+]
+
+{quoted}
+"""
 
+    def _parse_response(self, content: str) -> Optional[Dict]:
         try:
-            return json.loads(response.content)
+            return json.loads(content)
         except Exception:
-            return {
-                "domain": "UNKNOWN",
-                "confidence": 0.0,
-                "why": "The system could not reliably classify the issue.",
-                "missing_info": ["Clarify the legal issue and location"]
-            }
\ No newline at end of file
+            return None
+
+    def _parse_batch_response(self, content: str, count: int) -> List[Optional[Dict]]:
+        parsed = self._parse_response(content)
+        if not isinstance(parsed, list):
+            return [None] * count
+
+        results = [item if isinstance(item, dict) else None for item in parsed[:count]]
+        return results + [None] * (count - len(results))
+
+    def _fallback_reasoning(self) -> Dict:
+        return {
+            "domain": "UNKNOWN",
+            "confidence": 0.0,
+            "why": "The system could not reliably classify the issue.",
+            "missing_info": ["Clarify the legal issue and location"]
+        }
@@ -7,7 +7,7 @@ Responsibility:
 - Produce explainable routing decisions
 """
 
-from typing import Dict
+from backend.services.triage_state import TriageState
 
 
 class RouterAgent:
@@ -21,63 +21,61 @@ class RouterAgent:
             "UNKNOWN": "General Legal Advice"
         }
 
-    def run(self, state: Dict) -> Dict:
-        state.setdefault("explanation", [])
-        state.setdefault("steps", [])
-
-        validation = state.get("validation", {})
-        reasoning = state.get("reasoning", {})
-
+    def run(self, state: TriageState) -> TriageState:
         # If case is not eligible, do not route
-        if not validation.get("eligible"):
-            state["route"] = None
+        if not state.eligible:
+            state.route = None
 
-            state["explanation"].append(
+            state.explanation.append(
                 "The case was not routed because it did not meet eligibility requirements."
             )
 
-            state["routing_metadata"] = {
+            state.routing_metadata = {
                 "agent": self.name,
                 "status": "not_routed",
-                "reason": validation.get("rejection_reason")
+                "reason": (state.validation or {}).get("rejection_reason")
             }
 
             return state
 
-        domain = reasoning.get("domain", "UNKNOWN")
+        domain = (state.reasoning or {}).get("domain", "UNKNOWN")
         route = self.ROUTE_MAP.get(domain, "General Legal Advice")
 
-        state["route"] = route
+        state.route = route
 
-        state["explanation"].append(
+        state.explanation.append(
             f"The case was routed to {route} based on the identified {domain.lower()} legal domain."
         )
 
         # Actionable next steps based on route
         if domain == "HOUSING":
-            state["steps"].extend([
+            state.steps.extend([
                 "Contact a housing legal aid clinic or council housing service.",
                 "Prepare your tenancy agreement, eviction notice, and rent records."
             ])
         elif domain == "EMPLOYMENT":
-            state["steps"].extend([
+            state.steps.extend([
                 "Gather your employment contract and dismissal correspondence.",
                 "Seek advice from an employment law advisor or ACAS."
             ])
         elif domain == "IMMIGRATION":
-            state["steps"].extend([
+            state.steps.extend([
                 "Collect your visa and immigration documents.",
                 "Consult an immigration advisor or solicitor."
             ])
         else:
-            state["steps"].append(
+            state.steps.append(
                 "Seek initial guidance from a general legal advice clinic."
             )
 
-        state["routing_metadata"] = {
+        state.routing_metadata = {
             "agent": self.name,
             "status": "routed",
             "domain": domain
         }
 
         return state
+
+    async def arun(self, state: TriageState) -> TriageState:
+        """Async entry point; this agent is pure CPU work, nothing to await."""
+        return self.run(state)
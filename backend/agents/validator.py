@@ -8,32 +8,39 @@ Responsibility:
 - Provide clear rejection explanations and next steps
 """
 
-from typing import Dict
+from typing import Dict, List
+
+from backend.services.jurisdiction import JurisdictionMatcher
+from backend.services.triage_state import TriageState
 
 
 class ValidatorAgent:
-    def __init__(self):
+    def __init__(self, matcher: JurisdictionMatcher = None):
         self.name = "ValidatorAgent"
 
-    def run(self, state: Dict) -> Dict:
-        state.setdefault("explanation", [])
-        state.setdefault("steps", [])
+        # Built once from eligibility_rules.yaml; reloads itself on edits
+        self.matcher = matcher or JurisdictionMatcher()
 
-        message = state.get("message", "").lower()
+    def run(self, state: TriageState) -> TriageState:
+        return self.apply(state, self.matcher.match(state.message))
 
-        # Jurisdiction check
-        if any(country in message for country in ["usa", "india", "canada", "australia"]):
-            state["validation"] = {
+    def apply(self, state: TriageState, found: Dict[str, List[str]]) -> TriageState:
+        """Record the verdict for jurisdictions already found (see IntakeAgent)"""
+        # Jurisdiction check: a foreign place only rejects the case
+        # when nothing ties it to England and Wales
+        if found["rejected"] and not found["accepted"]:
+            state.validation = {
                 "eligible": False,
-                "rejection_reason": "Outside England and Wales jurisdiction"
+                "rejection_reason": "Outside England and Wales jurisdiction",
+                "jurisdictions": found
             }
 
-            state["explanation"].append(
+            state.explanation.append(
                 "This case was rejected because the legal issue appears to fall outside "
                 "the jurisdiction of England and Wales, which this service is limited to."
             )
 
-            state["steps"].extend([
+            state.steps.extend([
                 "Contact a legal advice service or lawyer in the country where the issue occurred.",
                 "If the matter later involves England or Wales, you may resubmit with updated details."
             ])
@@ -41,17 +48,22 @@ class ValidatorAgent:
             return state
 
         # Passed validation
-        state["validation"] = {
-            "eligible": True
+        state.validation = {
+            "eligible": True,
+            "jurisdictions": found
         }
 
-        state["explanation"].append(
+        state.explanation.append(
             "The case falls within England and Wales jurisdiction and is eligible to proceed "
             "to further legal triage."
         )
 
-        state["steps"].append(
+        state.steps.append(
             "Your case will now be analysed to determine the relevant legal area and next actions."
         )
 
         return state
+
+    async def arun(self, state: TriageState) -> TriageState:
+        """Async entry point; this agent is pure CPU work, nothing to await."""
+        return self.run(state)
@@ -5,14 +5,50 @@ This module exposes a clean HTTP interface over the
 agentic triage engine. It contains NO business logic.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Query, Request, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from starlette.background import BackgroundTask
+from datetime import datetime
+import hmac
+import json
+import os
+from typing import AsyncIterator, Dict, List, Optional
 
-from backend.services.triage_engine import run_triage
+from backend.services.admission import AdmissionRejected, Slot, build_admission
+from backend.services.chunker import DocumentTooLarge, adecode
+from backend.services.triage_engine import (
+    arun_triage,
+    arun_triage_batch,
+    arun_triage_documents,
+    astream_triage,
+    triage_stats,
+    list_cases,
+    case_aggregates,
+    search_cases,
+    get_profiler,
+)
 
 router = APIRouter()
 
+# Concurrency cap, wait queue and per-client quotas for the triage routes
+admission = build_admission()
+# Quotas are per peer IP. Only name a header here if something trusted
+# sets it (a proxy that overwrites it, or an auth gateway): clients could
+# otherwise send a new value each time to skip their quota
+CLIENT_HEADER = os.getenv("ADMISSION_CLIENT_HEADER") or None
+
+# Document intake limits
+MAX_DOCUMENTS = int(os.getenv("INTAKE_MAX_DOCUMENTS", "20"))
+MAX_DOCUMENT_BYTES = int(os.getenv("INTAKE_MAX_DOCUMENT_BYTES", str(5 * 1024 * 1024)))
+# Same settings as the intake agent, to refuse oversized cases up front
+CHUNK_CHARS = int(os.getenv("INTAKE_CHUNK_CHARS", "2000"))
+MAX_CHUNKS = int(os.getenv("INTAKE_MAX_CHUNKS", "5000"))
+READ_BLOCK_BYTES = 64 * 1024
+
+# Admin routes (profiles) exist only when this is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
 
 # ======================================================
 # Request / Response Schemas
@@ -32,6 +68,125 @@ class TriageResponse(BaseModel):
     confidence: float
     explanation: str
     steps: List[str]
+    degraded: bool = Field(
+        False,
+        description="True if the LLM was unavailable and local classification was used"
+    )
+
+
+class DocumentTriageResponse(TriageResponse):
+    documents: int = Field(..., description="Attached documents read")
+    chunks: int = Field(..., description="Chunks the message and documents were split into")
+
+
+class TriageBatchRequest(BaseModel):
+    items: List[TriageRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Cases to triage together; all are validated up front"
+    )
+
+
+class TriageBatchItem(BaseModel):
+    index: int
+    ok: bool
+    result: Optional[TriageResponse] = None
+    error: Optional[str] = None
+
+
+class TriageBatchResponse(BaseModel):
+    results: List[TriageBatchItem]
+
+
+class CaseRecord(BaseModel):
+    id: int
+    message: Optional[str]
+    domain: Optional[str]
+    eligible: Optional[bool]
+    route: Optional[str]
+    confidence: Optional[float]
+    reasoning_mode: Optional[str]
+    input_tokens: Optional[int]
+    output_tokens: Optional[int]
+    created_at: str
+
+
+class CaseListResponse(BaseModel):
+    items: List[CaseRecord]
+    next_cursor: Optional[str]
+
+
+class CaseSearchHit(CaseRecord):
+    score: float = Field(
+        ...,
+        description="BM25 relevance, or words shared if not exhaustive; higher is more similar"
+    )
+
+
+class CaseSearchResponse(BaseModel):
+    items: List[CaseSearchHit]
+    terms: List[str] = Field(..., description="Words the results were ranked by")
+    exhaustive: bool = Field(
+        ...,
+        description="False if every word was too common and only the newest matches were ranked"
+    )
+
+
+class DomainCount(BaseModel):
+    domain: Optional[str]
+    cases: int
+
+
+class RouteCount(BaseModel):
+    route: Optional[str]
+    cases: int
+
+
+class ConfidenceHistogram(BaseModel):
+    day: str
+    buckets: List[int] = Field(
+        ...,
+        description="Case counts for confidence [0.0, 0.1), [0.1, 0.2), ... [0.9, 1.0]"
+    )
+
+
+class CaseAggregatesResponse(BaseModel):
+    by_domain: List[DomainCount]
+    by_route: List[RouteCount]
+    confidence_histogram: List[ConfidenceHistogram]
+
+
+class ProfileSummary(BaseModel):
+    id: str
+    created_at: str
+    label: str = Field(..., description="Triage path: sync, async, documents or stream")
+    status: str
+    reason: str = Field(..., description="slow (over PROFILE_SLOW_MS) or sampled")
+    duration_ms: float
+    interval_ms: float
+    samples: int
+    timings: Dict[str, float] = Field(..., description="Milliseconds per agent step")
+
+
+# ======================================================
+# Admission
+# ======================================================
+
+async def _admit(request: Request) -> Slot:
+    """A slot for one triage, or a 429 / 503 with Retry-After"""
+    client = request.headers.get(CLIENT_HEADER) if CLIENT_HEADER else None
+    if client is None and request.client is not None:
+        client = request.client.host
+
+    try:
+        return await admission.admit(client)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Triage is over capacity ({e.reason}); retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
 
 # ======================================================
@@ -44,7 +199,7 @@ class TriageResponse(BaseModel):
     summary="Run agentic case triage",
     tags=["Triage"]
 )
-def triage_case(payload: TriageRequest):
+async def triage_case(payload: TriageRequest, request: Request):
     """
     Runs the multi-agent triage engine on a user case.
 
@@ -54,9 +209,12 @@ def triage_case(payload: TriageRequest):
     - confidence score
     - explanation
     - agent reasoning trace
+
+    429 / 503 with Retry-After when admission control sheds the request.
     """
+    slot = await _admit(request)
     try:
-        result = run_triage(payload.message)
+        result = await arun_triage(payload.message)
         return result
 
     except Exception as e:
@@ -64,4 +222,328 @@ def triage_case(payload: TriageRequest):
             status_code=500,
             detail=str(e)   # 👈 TEMPORARY
         )
+    finally:
+        slot.release()
+
+
+@router.post(
+    "/triage/stream",
+    summary="Run agentic case triage, streaming progress as server-sent events",
+    tags=["Triage"]
+)
+async def triage_stream(payload: TriageRequest, request: Request):
+    """
+    Same pipeline as /triage, but emits an SSE event as each agent finishes:
+
+    - plan: the agents that will run
+    - validator: eligibility verdict
+    - reasoner: domain, confidence and reasoning mode
+    - router: selected route
+    - explainer: explanation and next steps
+    - memory: persistence status (only with TRIAGE_DEFER_SIDE_EFFECTS=false;
+      otherwise the case is stored after the result)
+    - result: the same body /triage returns
+    - error: if the pipeline fails
+
+    Disconnecting cancels the in-flight triage.
+    """
+    slot = await _admit(request)
+
+    async def events():
+        stream = astream_triage(payload.message)
+        try:
+            async for event, data in stream:
+                # Stop work as soon as the client goes away
+                if await request.is_disconnected():
+                    break
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            # Cancels any agent still running
+            await stream.aclose()
+            slot.release()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        },
+        # Also runs if the client left before the first event
+        background=BackgroundTask(slot.release)
+    )
 
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post(
+    "/triage/documents",
+    response_model=DocumentTriageResponse,
+    summary="Run agentic case triage over a message with attached documents",
+    tags=["Triage"]
+)
+async def triage_documents(
+    request: Request,
+    message: str = Form(..., min_length=10, description="User-submitted case description"),
+    texts: List[str] = Form([], description="Documents pasted as plain text"),
+    files: List[UploadFile] = File([], description="Plain-text document uploads")
+):
+    """
+    Triages a case together with its correspondence (tenancy agreements,
+    dismissal letters, Home Office notices, ...).
+
+    Documents are read in blocks and split into chunks that are
+    classified concurrently; the chunk verdicts are combined into one
+    domain and confidence for routing. Only text documents are accepted.
+    """
+    if len(texts) + len(files) > MAX_DOCUMENTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_DOCUMENTS} documents per case")
+
+    for upload in files:
+        content_type = upload.content_type or "text/plain"
+        if not content_type.startswith("text/"):
+            raise HTTPException(
+                status_code=415,
+                detail=f"{upload.filename}: only plain-text documents are supported"
+            )
+
+    # Chunks are at least half of CHUNK_CHARS, so this undercounts: a
+    # case refused here could never have been read in full anyway
+    declared = sum(len(text) for text in texts) + sum(upload.size or 0 for upload in files)
+    if declared // CHUNK_CHARS > MAX_CHUNKS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Documents too large: more than {MAX_CHUNKS} chunks of {CHUNK_CHARS} characters"
+        )
+
+    documents = [[text] for text in texts if text.strip()]
+    documents += [adecode(_read_blocks(upload), MAX_DOCUMENT_BYTES) for upload in files]
+
+    slot = await _admit(request)
+    try:
+        return await arun_triage_documents(message, documents)
+
+    except DocumentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+    finally:
+        slot.release()
+
+
+async def _read_blocks(upload: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        block = await upload.read(READ_BLOCK_BYTES)
+        if not block:
+            return
+        yield block
+
+
+@router.post(
+    "/triage/batch",
+    response_model=TriageBatchResponse,
+    summary="Run agentic case triage over a batch of cases",
+    tags=["Triage"]
+)
+async def triage_batch(payload: TriageBatchRequest, request: Request):
+    """
+    Triages several cases in one request.
+
+    Cases are reasoned over concurrently (bounded by
+    TRIAGE_BATCH_CONCURRENCY) and persisted in a single transaction.
+    Results come back in input order; a failing case reports its own
+    error instead of failing the whole batch. The batch takes one
+    admission slot.
+    """
+    slot = await _admit(request)
+    try:
+        outcomes = await arun_triage_batch([item.message for item in payload.items])
+    finally:
+        slot.release()
+
+    return {
+        "results": [
+            {"index": index, **outcome}
+            for index, outcome in enumerate(outcomes)
+        ]
+    }
+
+
+@router.get(
+    "/triage/stats",
+    summary="Engine operational counters",
+    tags=["Monitoring"]
+)
+def engine_stats():
+    """
+    Persistence queue depth and flush latency, cache counters, and
+    admission queue length and shed counts.
+    """
+    return {**triage_stats(), "admission": admission.stats()}
+
+
+@router.get(
+    "/cases",
+    response_model=CaseListResponse,
+    summary="List stored triage cases",
+    tags=["Cases"]
+)
+def get_cases(
+    domain: Optional[str] = None,
+    route: Optional[str] = None,
+    eligible: Optional[bool] = None,
+    start: Optional[datetime] = Query(None, description="Inclusive, UTC"),
+    end: Optional[datetime] = Query(None, description="Exclusive, UTC"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """
+    Newest cases first, keyset-paginated.
+    """
+    try:
+        return list_cases(
+            domain=domain,
+            route=route,
+            eligible=eligible,
+            start=start,
+            end=end,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/cases/search",
+    response_model=CaseSearchResponse,
+    summary="Find stored cases similar to a description",
+    tags=["Cases"]
+)
+def search_case_history(
+    q: str = Query(..., min_length=2, max_length=10000, description="Case description or keywords"),
+    domain: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Inclusive, UTC"),
+    end: Optional[datetime] = Query(None, description="Exclusive, UTC"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Stored cases ranked by full-text relevance (BM25) to the query,
+    most similar first. Words common to most cases are not ranked by.
+    """
+    try:
+        return search_cases(q, domain=domain, start=start, end=end, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/cases/stats",
+    response_model=CaseAggregatesResponse,
+    summary="Case counts and confidence histograms",
+    tags=["Cases"]
+)
+def get_case_stats(
+    start: Optional[datetime] = Query(None, description="Inclusive, truncated to the day"),
+    end: Optional[datetime] = Query(None, description="Exclusive, truncated to the day")
+):
+    """
+    Counts per domain and route, and confidence histograms per day.
+    """
+    return case_aggregates(start=start, end=end)
+
+
+# ======================================================
+# Admin
+# ======================================================
+
+def _require_admin(
+    authorization: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Bearer token or X-Admin-Token must match ADMIN_TOKEN. Without
+    ADMIN_TOKEN, or with profiling off, the routes don't exist (404).
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    token = x_admin_token or ""
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[len("bearer "):].strip()
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+    profiler = get_profiler()
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is off (set PROFILE_SLOW_MS or PROFILE_SAMPLE_RATE)")
+    return profiler
+
+
+@router.get(
+    "/admin/profiles",
+    response_model=List[ProfileSummary],
+    summary="Stored profiles of slow or sampled triages",
+    tags=["Admin"]
+)
+def list_profiles(
+    limit: int = Query(50, ge=1, le=1000),
+    profiler=Depends(_require_admin)
+):
+    """
+    Newest first, with agent timings; stacks are left out.
+    """
+    return profiler.list(limit=limit)
+
+
+@router.get(
+    "/admin/profiles/collapsed",
+    response_class=PlainTextResponse,
+    summary="Stacks of the newest profiles, merged",
+    tags=["Admin"]
+)
+def merged_profile(
+    limit: int = Query(50, ge=1, le=1000),
+    reason: Optional[str] = Query(None, description="Only slow or only sampled profiles"),
+    profiler=Depends(_require_admin)
+):
+    """
+    Collapsed stacks ("frame;frame;frame samples" per line) summed over
+    the newest profiles, ready for flamegraph.pl or speedscope.
+    """
+    profiles = [
+        profiler.load(summary["id"])
+        for summary in profiler.list(limit=limit)
+        if reason is None or summary["reason"] == reason
+    ]
+    return profiler.collapsed([profile for profile in profiles if profile is not None])
+
+
+@router.get(
+    "/admin/profiles/{profile_id}",
+    summary="One stored profile",
+    tags=["Admin"]
+)
+def get_profile(
+    profile_id: str,
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    profiler=Depends(_require_admin)
+):
+    """
+    Collapsed stacks by default; format=json for the stored profile,
+    timings included.
+    """
+    profile = profiler.load(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "json":
+        return profile
+    return PlainTextResponse(profiler.collapsed([profile]))
@@ -0,0 +1,169 @@
+"""
+Case archive CLI for Agentic Case Triage AI.
+
+Responsibility:
+- Show the monthly partitions of the hot case store
+- Export closed months to archive files and prune them from the store
+- Query and summarise the archives for audit reports, in bounded memory
+- Re-import case records the write-behind writer spilled to
+  triage.db.unwritten.jsonl while the store was unwritable
+
+Run `archive` from cron (e.g. nightly); it is a no-op until a month
+closes and safe to rerun after an interruption.
+
+Usage:
+    python -m backend.archive partitions
+    python -m backend.archive archive --keep-months 3
+    python -m backend.archive query --start 2023-01-01 --end 2024-01-01 --domain HOUSING
+    python -m backend.archive report --by domain route --start 2023-01-01
+    python -m backend.archive reimport
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from backend.agents.memory import DEFAULT_DB_PATH, MemoryAgent
+from backend.services.case_archive import DEFAULT_ARCHIVE_DIR, CaseArchive, CaseArchiver
+
+
+def _archiver(args: argparse.Namespace) -> CaseArchiver:
+    # Creates the store and applies pending migrations (case_archives)
+    memory = MemoryAgent(db_path=args.db)
+    return CaseArchiver(
+        memory.db_path,
+        archive_dir=args.archive_dir,
+        keep_months=args.keep_months,
+        batch_size=args.batch_size,
+        file_format=args.format
+    )
+
+
+def _filters(args: argparse.Namespace) -> dict:
+    eligible = None
+    if args.eligible is not None:
+        eligible = args.eligible == "true"
+    return {
+        "domain": args.domain,
+        "route": args.route,
+        "eligible": eligible,
+        "start": args.start,
+        "end": args.end
+    }
+
+
+# ======================================================
+# Commands
+# ======================================================
+
+def cmd_partitions(args: argparse.Namespace) -> int:
+    archiver = _archiver(args)
+    for partition in archiver.partitions():
+        state = "closed" if partition["closed"] else "open"
+        print(f"{partition['month']}  {partition['cases']:>10}  {state}")
+    for record in archiver.files():
+        print(f"{record['month']}  {record['cases']:>10}  archived -> {record['path']}")
+    return 0
+
+
+def cmd_archive(args: argparse.Namespace) -> int:
+    archiver = _archiver(args)
+    archived = archiver.archive(vacuum=args.vacuum)
+    for entry in archived:
+        record = entry["file"]
+        target = record["path"] if record else "nothing new"
+        print(f"{entry['month']}: {entry['pruned']} pruned, {target}", file=sys.stderr)
+    if not archived:
+        print(f"No closed months before {archiver.cutoff()}", file=sys.stderr)
+    return 0
+
+
+def cmd_query(args: argparse.Namespace) -> int:
+    archive = CaseArchive(args.archive_dir, batch_size=args.batch_size)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for case in archive.iter_cases(**_filters(args)):
+            out.write(json.dumps(case) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_report(args: argparse.Namespace) -> int:
+    archive = CaseArchive(args.archive_dir, batch_size=args.batch_size)
+    json.dump(archive.count(by=args.by, **_filters(args)), sys.stdout, indent=2)
+    print()
+    return 0
+
+
+def cmd_reimport(args: argparse.Namespace) -> int:
+    imported = MemoryAgent(db_path=args.db).reimport_unwritten()
+    print(f"{imported} spilled case records imported", file=sys.stderr)
+    return 0
+
+
+# ======================================================
+# Entry point
+# ======================================================
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Archive and query old triage cases")
+    parser.add_argument("--db", default=os.getenv("TRIAGE_DB_PATH") or DEFAULT_DB_PATH,
+                        help="hot case store")
+    parser.add_argument("--archive-dir", default=os.getenv("ARCHIVE_DIR") or DEFAULT_ARCHIVE_DIR)
+    parser.add_argument("--keep-months", type=int, default=int(os.getenv("ARCHIVE_KEEP_MONTHS", "3")),
+                        help="months kept hot before the current one")
+    parser.add_argument("--batch-size", type=int, default=10000,
+                        help="rows held in memory at once")
+    parser.add_argument("--format", choices=["parquet", "jsonl.gz"],
+                        default=os.getenv("ARCHIVE_FORMAT") or None,
+                        help="default: parquet if pyarrow is installed")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("partitions", help="list hot months and archive files")
+
+    archive = commands.add_parser("archive", help="export and prune closed months")
+    archive.add_argument("--vacuum", action="store_true",
+                         help="shrink the database file afterwards (blocks writers)")
+
+    for name, help_text in (("query", "stream matching cases as JSONL"),
+                            ("report", "case counts per group")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--domain")
+        command.add_argument("--route")
+        command.add_argument("--eligible", choices=["true", "false"])
+        command.add_argument("--start", type=datetime.fromisoformat, help="inclusive, UTC")
+        command.add_argument("--end", type=datetime.fromisoformat, help="exclusive, UTC")
+
+    commands.add_parser("reimport", help="write case records spilled by write-behind back to the store")
+
+    commands.choices["query"].add_argument("-o", "--output", help="JSONL file (default: stdout)")
+    commands.choices["report"].add_argument("--by", nargs="+", default=["domain"],
+                                            choices=["domain", "route", "eligible", "reasoning_mode"])
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+
+    handlers = {
+        "partitions": cmd_partitions,
+        "archive": cmd_archive,
+        "query": cmd_query,
+        "report": cmd_report,
+        "reimport": cmd_reimport,
+    }
+    return handlers[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
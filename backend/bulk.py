@@ -0,0 +1,396 @@
+"""
+Bulk triage CLI for Agentic Case Triage AI.
+
+Responsibility:
+- Stream a JSONL file of cases through TriageEngine, one line at a time
+- Run them on a bounded async or process pool
+- Stream results to a JSONL file as they complete
+- Checkpoint progress so an interrupted run resumes without redoing work
+- Retry, on the next run, cases that failed on an engine or LLM error
+- Keep memory flat: at most `concurrency` cases are held at once
+
+Input lines may carry the message as "message", or as "body" with an
+optional "title" (the shape of requests.jsonl). "request_id" or "id",
+if present, is echoed back on the result.
+
+A case that fails with an exception (e.g. the LLM provider is down) is
+written with "ok": false and "retryable": true, and triaged again by the
+next run of the same command; its new result is appended, so the last
+result for a line is the one that counts. Unusable input lines are not
+retried.
+
+Usage:
+    python -m backend.bulk cases.jsonl -o results.jsonl --concurrency 16
+    python -m backend.bulk cases.jsonl -o results.jsonl --mode process --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+
+# ======================================================
+# Input
+# ======================================================
+
+def read_cases(path: str) -> Iterator[Tuple[int, str]]:
+    """Yield (line number, raw line), lazily, 1-based like editors show"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, raw in enumerate(f, start=1):
+            yield line_no, raw
+
+
+def parse_case(raw: str) -> Tuple[Optional[str], str]:
+    """(case id, message) from one JSONL line; raises ValueError if unusable"""
+    try:
+        record = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+
+    if not isinstance(record, dict):
+        raise ValueError("Each line must be a JSON object")
+
+    case_id = record.get("request_id", record.get("id"))
+
+    message = record.get("message")
+    if message is None and record.get("body") is not None:
+        title = record.get("title")
+        message = f"{title}\n\n{record['body']}" if title else record["body"]
+
+    if not isinstance(message, str) or not message.strip():
+        raise ValueError("Missing message (expected 'message' or 'body')")
+
+    return case_id, message
+
+
+# ======================================================
+# Checkpoint
+# ======================================================
+
+class Checkpoint:
+    """
+    Which input lines are finished, in constant space: every line below
+    `watermark` is done, plus the few above it that finished out of order.
+    Lines whose last result was a retryable failure are also kept, in
+    `failed`, for the next run to triage again.
+
+    The output file is the source of truth. The checkpoint also records how
+    many bytes of output it covers; on resume, results written after the
+    last checkpoint are read back from that offset, so no case that made it
+    into the output is ever triaged (or billed) twice.
+    """
+
+    def __init__(self, path: str, input_path: str):
+        self.path = path
+        self.input_path = os.path.abspath(input_path)
+        self.watermark = 1
+        self.done_ahead: Set[int] = set()
+        self.failed: Set[int] = set()
+        self.output_offset = 0
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("input") != self.input_path:
+            raise RuntimeError(
+                f"Checkpoint {self.path} belongs to {data.get('input')}; "
+                "use --restart to start over"
+            )
+
+        self.watermark = data["watermark"]
+        self.done_ahead = set(data["done_ahead"])
+        self.failed = set(data.get("failed", []))
+        self.output_offset = data["output_offset"]
+        return True
+
+    def save(self, output_offset: int) -> None:
+        self.output_offset = output_offset
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "input": self.input_path,
+                "watermark": self.watermark,
+                "done_ahead": sorted(self.done_ahead),
+                "failed": sorted(self.failed),
+                "output_offset": output_offset
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        # Atomic: a crash leaves either the old or the new checkpoint
+        os.replace(tmp_path, self.path)
+
+    def is_done(self, line_no: int) -> bool:
+        """Finished, and not to be retried"""
+        if line_no in self.failed:
+            return False
+        return line_no < self.watermark or line_no in self.done_ahead
+
+    def record(self, result: Dict) -> None:
+        """Account for a result line; retryable failures stay pending for the next run"""
+        self.mark_done(result["line"])
+        if result.get("retryable"):
+            self.failed.add(result["line"])
+        else:
+            self.failed.discard(result["line"])
+
+    def mark_done(self, line_no: int) -> None:
+        if line_no < self.watermark:
+            return
+        self.done_ahead.add(line_no)
+        while self.watermark in self.done_ahead:
+            self.done_ahead.remove(self.watermark)
+            self.watermark += 1
+
+
+class ResultSink:
+    """Appends result lines and checkpoints every `checkpoint_every` of them"""
+
+    def __init__(self, output_path: str, checkpoint: Checkpoint, checkpoint_every: int):
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self._recover(output_path)
+        self.file = open(output_path, "a", encoding="utf-8")
+
+        self.written = 0
+        self.failed = 0
+        self._since_checkpoint = 0
+
+    def _recover(self, output_path: str) -> None:
+        """Mark results written after the last checkpoint as done; drop a torn last line"""
+        if not os.path.exists(output_path):
+            return
+
+        with open(output_path, "r+b") as f:
+            f.seek(self.checkpoint.output_offset)
+            valid_end = self.checkpoint.output_offset
+
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    self.checkpoint.record(json.loads(raw))
+                except (ValueError, KeyError):
+                    break
+                valid_end += len(raw)
+
+            f.truncate(valid_end)
+
+    def write(self, result: Dict) -> None:
+        self.file.write(json.dumps(result) + "\n")
+        self.checkpoint.record(result)
+
+        self.written += 1
+        if not result["ok"]:
+            self.failed += 1
+
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.flush()
+
+    def flush(self) -> None:
+        # Output must be durable before the checkpoint that covers it
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.checkpoint.save(self.file.tell())
+        self._since_checkpoint = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+# ======================================================
+# Runners
+# ======================================================
+
+def _failure(line_no: int, case_id, error: str, retryable: bool = False) -> Dict:
+    return {"line": line_no, "id": case_id, "ok": False, "error": error, "retryable": retryable}
+
+
+def pending_cases(path: str, checkpoint: Checkpoint, sink: ResultSink) -> Iterator[Tuple[int, object, str]]:
+    """
+    Lines still to triage as (line, id, message). Blank lines are skipped
+    and unparseable ones are written out as failures right here.
+    """
+    for line_no, raw in read_cases(path):
+        if checkpoint.is_done(line_no):
+            continue
+
+        if not raw.strip():
+            checkpoint.mark_done(line_no)
+            continue
+
+        try:
+            case_id, message = parse_case(raw)
+        except ValueError as e:
+            sink.write(_failure(line_no, None, str(e)))
+            continue
+
+        yield line_no, case_id, message
+
+
+async def run_async(args: argparse.Namespace, checkpoint: Checkpoint, sink: ResultSink) -> None:
+    from backend.services.triage_engine import TriageEngine
+
+    engine = TriageEngine()
+
+    async def triage(line_no: int, case_id, message: str) -> Dict:
+        try:
+            result = await engine.arun(message)
+        except Exception as e:
+            return _failure(line_no, case_id, str(e), retryable=True)
+        return {"line": line_no, "id": case_id, "ok": True, "result": result}
+
+    in_flight: Set[asyncio.Task] = set()
+    try:
+        for case in pending_cases(args.input, checkpoint, sink):
+            if len(in_flight) >= args.concurrency:
+                finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    sink.write(task.result())
+            in_flight.add(asyncio.create_task(triage(*case)))
+
+        while in_flight:
+            finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                sink.write(task.result())
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await asyncio.to_thread(engine.close)
+
+
+# ----------------------------
+# Process pool
+# ----------------------------
+_worker_engine = None
+
+
+def _init_worker() -> None:
+    global _worker_engine
+
+    # Ctrl-C is handled once, by the parent, which stops submitting work
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Pool workers are killed without running shutdown hooks, so records
+    # must be written synchronously rather than queued behind the response
+    os.environ["MEMORY_WRITE_BEHIND"] = "false"
+    os.environ["TRIAGE_DEFER_SIDE_EFFECTS"] = "false"
+
+    from backend.services.triage_engine import TriageEngine
+    _worker_engine = TriageEngine()
+
+
+def _triage_in_worker(line_no: int, case_id, message: str) -> Dict:
+    try:
+        result = _worker_engine.run(message)
+    except Exception as e:
+        return _failure(line_no, case_id, str(e), retryable=True)
+    return {"line": line_no, "id": case_id, "ok": True, "result": result}
+
+
+def run_processes(args: argparse.Namespace, checkpoint: Checkpoint, sink: ResultSink) -> None:
+    # Submitting by hand (not Executor.map) keeps at most `window` cases
+    # in memory; map would read the whole input up front
+    window = args.workers * args.concurrency
+
+    pool = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker)
+    in_flight = set()
+    try:
+        for case in pending_cases(args.input, checkpoint, sink):
+            if len(in_flight) >= window:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    sink.write(future.result())
+            in_flight.add(pool.submit(_triage_in_worker, *case))
+
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                sink.write(future.result())
+    finally:
+        # Results still in flight are simply not recorded; a rerun redoes them
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ======================================================
+# Entry point
+# ======================================================
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Triage a JSONL file of cases")
+    parser.add_argument("input", help="JSONL file, one case per line")
+    parser.add_argument("-o", "--output", help="results JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("--mode", choices=["async", "process"], default="async")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="cases in flight (per worker in process mode)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes in process mode")
+    parser.add_argument("--checkpoint-every", type=int, default=100,
+                        help="results between checkpoints")
+    parser.add_argument("--restart", action="store_true",
+                        help="discard previous output and checkpoint")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+
+    if not os.path.isfile(args.input):
+        print(f"No such file: {args.input}", file=sys.stderr)
+        return 2
+
+    output = args.output or f"{args.input}.results.jsonl"
+    checkpoint_path = f"{output}.checkpoint"
+
+    if args.restart:
+        for path in (output, checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    checkpoint = Checkpoint(checkpoint_path, args.input)
+    resumed = checkpoint.load()
+
+    sink = ResultSink(output, checkpoint, args.checkpoint_every)
+    if resumed:
+        print(
+            f"Resuming from line {checkpoint.watermark}, "
+            f"retrying {len(checkpoint.failed)} failed cases",
+            file=sys.stderr
+        )
+    started = time.perf_counter()
+
+    try:
+        if args.mode == "process":
+            run_processes(args, checkpoint, sink)
+        else:
+            asyncio.run(run_async(args, checkpoint, sink))
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume", file=sys.stderr)
+        return 130
+    finally:
+        sink.close()
+        elapsed = time.perf_counter() - started
+        print(
+            f"{sink.written} results ({sink.failed} failed) in {elapsed:.1f}s -> {output}",
+            file=sys.stderr
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
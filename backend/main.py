@@ -3,6 +3,7 @@ Main application entry point for Agentic Case Triage AI.
 
 - Initializes FastAPI app
 - Registers API routes
+- Builds the triage engine in the background at startup
 - Enables CORS for frontend
 - Serves React static files (for Hugging Face / Docker)
 """
@@ -10,14 +11,63 @@ Main application entry point for Agentic Case Triage AI.
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
 load_dotenv()
 from backend.api import router as triage_router
+from backend.services import metrics
+from backend.services.triage_engine import close_triage, init_triage, triage_readiness
 
 
 
+# ======================================================
+# Lifecycle
+# ======================================================
+
+def _eager_init() -> bool:
+    return os.getenv("TRIAGE_EAGER_INIT", "true").lower() == "true"
+
+
+def _warm_up() -> bool:
+    return os.getenv("TRIAGE_WARM_UP", "false").lower() == "true"
+
+
+def _build_engine() -> None:
+    try:
+        init_triage(_warm_up())
+    except Exception:
+        # Reported by /ready as state "failed"
+        pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup: build (and optionally warm up) the engine on a worker thread,
+    so the server binds straight away; /ready turns 200 once it is done.
+    Requests arriving earlier wait for the same build.
+
+    Shutdown: drain queued case records and flush the semantic cache index.
+    """
+    startup = None
+    if _eager_init():
+        startup = asyncio.create_task(asyncio.to_thread(init_triage, _warm_up()))
+
+    yield
+
+    if startup is not None:
+        try:
+            await startup
+        except Exception:
+            # Already reported by /ready; nothing to close
+            pass
+    close_triage()
+
+
 # ======================================================
 # App Initialization
 # ======================================================
@@ -25,7 +75,8 @@ from backend.api import router as triage_router
 app = FastAPI(
     title="Agentic Case Triage AI",
     description="A multi-agent system for autonomous case triage",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # ======================================================
@@ -46,9 +97,49 @@ app.add_middleware(
 
 app.include_router(triage_router)
 
+# ======================================================
+# Health Check
+# ======================================================
+
+@app.get("/health", tags=["Health"])
+def health_check():
+    return {"status": "ok"}
+
+
+@app.get("/ready", tags=["Health"])
+def readiness_check():
+    """
+    Readiness probe: 503 until the triage engine is built (and warmed up,
+    if TRIAGE_WARM_UP is set). /health only reports that the process is up.
+
+    With TRIAGE_EAGER_INIT=false the first probe starts the build, so a
+    load balancer waiting for readiness doesn't wait forever.
+    """
+    readiness = triage_readiness()
+    if readiness["state"] == "idle" and not _eager_init():
+        # Concurrent probes may start two threads; init_triage builds once
+        threading.Thread(target=_build_engine, name="triage-init", daemon=True).start()
+        readiness = {**readiness, "state": "starting"}
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
+# ======================================================
+# Metrics (Prometheus)
+# ======================================================
+
+@app.get("/metrics", tags=["Health"])
+def prometheus_metrics():
+    """
+    Per-agent, LLM and persistence latency histograms, cache counters,
+    triage outcomes and in-flight requests, in Prometheus text format.
+    """
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # ======================================================
 # Static Frontend (React build)
 # ======================================================
+# Registered last: the "/" mount and catch-all would shadow later routes.
 
 FRONTEND_DIST = "frontend/dist"
 
@@ -68,12 +159,3 @@ if os.path.isdir(FRONTEND_DIST):
         if os.path.exists(index_path):
             return FileResponse(index_path)
         return {"detail": "Frontend not built."}
-
-
-# ======================================================
-# Health Check
-# ======================================================
-
-@app.get("/health", tags=["Health"])
-def health_check():
-    return {"status": "ok"}
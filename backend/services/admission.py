@@ -0,0 +1,217 @@
+"""
+Admission Control
+
+Responsibility:
+- Cap the number of triages running at once
+- Hold excess requests in a bounded FIFO queue, each with a deadline
+- Shed load quickly once the queue is full (503) or a client is over
+  its quota (429), with a Retry-After hint
+- Report queue length, waits and shed requests as metrics
+
+Keeps p99 latency bounded under spikes: a request either starts within
+the queue deadline or is turned away straight away, instead of piling
+up behind slow LLM calls.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+from backend.services import metrics
+
+
+class AdmissionRejected(Exception):
+    """Turned away before any triage work started"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        # Whole seconds, as the Retry-After header expects
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """`rate` requests per second on average, bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """0 if a request may go ahead, else seconds until it could"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Slot:
+    """A running triage's place; release() is idempotent"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+        self.started = time.monotonic()
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self)
+
+
+class AdmissionController:
+    """
+    Not thread-safe: use from the event loop only.
+    max_concurrent <= 0 admits everything (quotas still apply);
+    client_rate <= 0 disables per-client quotas.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 0,
+        max_queue: int = 100,
+        queue_timeout: float = 2.0,
+        client_rate: float = 0.0,
+        client_burst: float = 20.0,
+        max_clients: int = 10000
+    ):
+        self.name = "AdmissionController"
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # client -> bucket, least recently seen first
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+        # Smoothed time a slot is held, for Retry-After
+        self._service_time = 0.5
+
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0, "client_quota": 0}
+
+        metrics.ADMISSION_ACTIVE.set_function(lambda: self._active)
+        metrics.ADMISSION_QUEUE_DEPTH.set_function(lambda: len(self._waiters))
+
+    async def admit(self, client: Optional[str] = None) -> Slot:
+        """
+        Wait for a slot. Raises AdmissionRejected (429 over quota, 503
+        queue full or deadline passed) without waiting longer than
+        queue_timeout.
+        """
+        if self.client_rate > 0 and client is not None:
+            wait = self._bucket(client).take()
+            if wait > 0:
+                raise self._reject(429, "client_quota", wait)
+
+        if self.max_concurrent <= 0 or (self._active < self.max_concurrent and not self._waiters):
+            return self._grant()
+
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(503, "queue_full", self._estimated_wait(len(self._waiters)))
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        started = time.monotonic()
+
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(future)
+            raise self._reject(503, "queue_timeout", self._estimated_wait(len(self._waiters)))
+        except asyncio.CancelledError:
+            # The client went away while queued
+            self._abandon(future)
+            raise
+        finally:
+            metrics.ADMISSION_WAIT.observe(time.monotonic() - started)
+
+        # _release() handed its slot straight to us
+        self.admitted += 1
+        return Slot(self)
+
+    def _grant(self) -> Slot:
+        self._active += 1
+        self.admitted += 1
+        return Slot(self)
+
+    def _release(self, slot: Optional[Slot] = None) -> None:
+        if slot is not None:
+            # Smoothed time a slot is held, for Retry-After
+            held = time.monotonic() - slot.started
+            self._service_time = 0.9 * self._service_time + 0.1 * held
+
+        # Pass the slot on to the longest waiter still interested
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        if future.done() and not future.cancelled():
+            # Granted just as we gave up: pass it on
+            self._release()
+            return
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def _estimated_wait(self, queued: int) -> float:
+        return (queued + 1) * self._service_time / max(self.max_concurrent, 1)
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.client_rate, self.client_burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def _reject(self, status_code: int, reason: str, retry_after: float) -> AdmissionRejected:
+        self.shed[reason] += 1
+        metrics.ADMISSION_SHED.labels(reason).inc()
+        return AdmissionRejected(status_code, reason, retry_after)
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self._active,
+            "queue_length": len(self._waiters),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+            "avg_service_ms": round(self._service_time * 1000, 3)
+        }
+
+
+def build_admission() -> AdmissionController:
+    return AdmissionController(
+        max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "0")),
+        max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "100")),
+        queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "2000")) / 1000,
+        client_rate=float(os.getenv("ADMISSION_CLIENT_RATE", "0")),
+        client_burst=float(os.getenv("ADMISSION_CLIENT_BURST", "20"))
+    )
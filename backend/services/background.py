@@ -0,0 +1,89 @@
+"""
+Background Runner
+
+Responsibility:
+- Run side-effect-only work after the response has been built
+- Bound the backlog: callers run the work themselves when it is full
+- Count failures instead of raising them into a request that has finished
+- Finish queued work on close
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from backend.services import metrics
+
+
+class BackgroundRunner:
+    def __init__(self, max_workers: int = 4, max_pending: int = 1000):
+        self.name = "BackgroundRunner"
+        self.max_pending = max_pending
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deferred")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.last_error = None
+
+    def submit(self, label: str, fn: Callable, *args) -> bool:
+        """
+        Queue fn(*args). Returns False, without queueing, when the backlog
+        is full or the runner is closed; the caller should run it inline.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                return False
+            self._pending += 1
+
+        try:
+            self._pool.submit(self._run, label, fn, *args)
+        except RuntimeError:
+            # Shut down
+            self._finished()
+            self.rejected += 1
+            return False
+
+        metrics.DEFERRED_PENDING.inc()
+        return True
+
+    def _run(self, label: str, fn: Callable, *args) -> None:
+        try:
+            fn(*args)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            self.last_error = str(e)
+            metrics.DEFERRED_FAILURES.labels(label).inc()
+        finally:
+            self._finished()
+            metrics.DEFERRED_PENDING.dec()
+
+    def _finished(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until nothing is queued or running; False on timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self) -> None:
+        """Wait for queued work; safe to call twice"""
+        self._pool.shutdown(wait=True)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": self._pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,489 @@
+"""
+Case Archive
+
+Responsibility:
+- Treat each calendar month of the cases table as a partition
+- Export closed months (older than the retention window) to compressed
+  columnar files, streaming, one batch of rows at a time
+- Prune exported months from the hot database in short transactions
+- Read the archives back, filtered and in batches, for audit reporting
+
+Files are Parquet (zstd) when pyarrow is installed, gzip JSONL otherwise.
+The case_daily_stats rollup is never pruned, so /cases/stats keeps
+covering archived months. Schema and migrations are owned by MemoryAgent.
+"""
+
+import gzip
+import json
+import os
+import re
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from backend.services.case_history import CASE_COLUMNS, _timestamp
+
+
+DEFAULT_ARCHIVE_DIR = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        "..",
+        "data",
+        "archive"
+    )
+)
+
+# cases-<YYYY-MM>-<first case id>.<format>
+ARCHIVE_FILE = re.compile(r"^cases-(\d{4}-\d{2})-(\d+)\.(parquet|jsonl\.gz)$")
+
+
+def _pyarrow():
+    """pyarrow modules, or None; imported lazily as it is optional and slow to load"""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def month_bounds(month: str) -> Tuple[str, str]:
+    """[start, end) of a 'YYYY-MM' month, as stored created_at strings compare"""
+    year, number = int(month[:4]), int(month[5:7])
+    following = f"{year + 1:04d}-01" if number == 12 else f"{year:04d}-{number + 1:02d}"
+    return f"{month}-01", f"{following}-01"
+
+
+def shift_month(month: str, months: int) -> str:
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _columns(rows: List[Tuple]) -> Dict[str, list]:
+    columns = dict(zip(CASE_COLUMNS, (list(values) for values in zip(*rows))))
+    columns["eligible"] = [None if v is None else bool(v) for v in columns["eligible"]]
+    return columns
+
+
+# ======================================================
+# Writing
+# ======================================================
+
+class _ParquetSink:
+    def __init__(self, path: str):
+        pa = _pyarrow()
+        self._pa = pa
+        self.schema = pa.schema([
+            ("id", pa.int64()),
+            ("message", pa.string()),
+            ("domain", pa.string()),
+            ("eligible", pa.bool_()),
+            ("route", pa.string()),
+            ("confidence", pa.float64()),
+            ("reasoning_mode", pa.string()),
+            ("input_tokens", pa.int64()),
+            ("output_tokens", pa.int64()),
+            ("created_at", pa.string()),
+        ])
+        # One row group per batch; rows arrive sorted by created_at, so
+        # row group statistics let readers skip whole groups by date
+        self._writer = pa.parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows: List[Tuple]) -> None:
+        columns = _columns(rows)
+        batch = self._pa.record_batch(
+            [self._pa.array(columns[field.name], field.type) for field in self.schema],
+            schema=self.schema
+        )
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class _JsonlSink:
+    def __init__(self, path: str):
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, rows: List[Tuple]) -> None:
+        for row in rows:
+            case = dict(zip(CASE_COLUMNS, row))
+            if case["eligible"] is not None:
+                case["eligible"] = bool(case["eligible"])
+            self._file.write(json.dumps(case) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CaseArchiver:
+    def __init__(
+        self,
+        db_path: str,
+        archive_dir: str = None,
+        keep_months: int = 3,
+        batch_size: int = 10000,
+        file_format: Optional[str] = None
+    ):
+        """
+        keep_months: months kept hot before the current one; anything
+        older is closed and may be archived.
+        file_format: "parquet" or "jsonl.gz"; default parquet if pyarrow
+        is installed.
+        """
+        self.name = "CaseArchiver"
+        self.db_path = db_path
+        self.archive_dir = os.path.abspath(archive_dir or DEFAULT_ARCHIVE_DIR)
+        self.keep_months = keep_months
+        self.batch_size = batch_size
+
+        if file_format is None:
+            file_format = "parquet" if _pyarrow() is not None else "jsonl.gz"
+        if file_format == "parquet" and _pyarrow() is None:
+            raise RuntimeError("pyarrow is required for Parquet archives")
+        if file_format not in ("parquet", "jsonl.gz"):
+            raise ValueError(f"Unknown archive format: {file_format}")
+        self.file_format = file_format
+
+    def _connect(self) -> sqlite3.Connection:
+        # Long timeout: pruning competes with MemoryAgent for the write lock
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    # ----------------------------
+    # Partitions
+    # ----------------------------
+    def partitions(self, now: Optional[datetime] = None) -> List[Dict]:
+        """
+        Hot months with their case counts, oldest first. Each count is a
+        range over idx_cases_created, so only index entries of the month
+        are read.
+        """
+        cutoff = self.cutoff(now)
+        partitions = []
+        with self._connect() as conn:
+            for month in self._months(conn):
+                start, end = month_bounds(month)
+                count = conn.execute(
+                    "SELECT COUNT(*) FROM cases WHERE created_at >= ? AND created_at < ?",
+                    (start, end)
+                ).fetchone()[0]
+                partitions.append({"month": month, "cases": count, "closed": month < cutoff})
+        return partitions
+
+    def _months(self, conn: sqlite3.Connection, until: Optional[str] = None) -> Iterator[str]:
+        """
+        Months holding at least one hot case, oldest first, stopping
+        before `until`. Each step is one MIN(created_at) over
+        idx_cases_created from the end of the previous month: empty
+        months are skipped, and the table itself is never scanned.
+        """
+        start = "0000-01"
+        while True:
+            oldest = conn.execute(
+                "SELECT MIN(created_at) FROM cases WHERE created_at >= ?",
+                (start,)
+            ).fetchone()[0]
+            if oldest is None:
+                return
+            month = oldest[:7]
+            if until is not None and month >= until:
+                return
+            yield month
+            start = month_bounds(month)[1]
+
+    def cutoff(self, now: Optional[datetime] = None) -> str:
+        """First month that is still open; earlier months are closed"""
+        current = (now or datetime.utcnow()).strftime("%Y-%m")
+        return shift_month(current, -self.keep_months)
+
+    # ----------------------------
+    # Archival
+    # ----------------------------
+    def archive(self, now: Optional[datetime] = None, vacuum: bool = False) -> List[Dict]:
+        """
+        Export and prune every closed month. Safe to rerun after a crash:
+        a file is only recorded once complete, and recorded rows still in
+        the hot database are pruned, not exported again.
+        """
+        with self._connect() as conn:
+            closed = list(self._months(conn, until=self.cutoff(now)))
+
+        archived = []
+        for month in closed:
+            pruned = self._prune_recorded(month)
+            exported = self._export(month)
+            if exported is not None:
+                pruned += self._prune(month, exported["min_id"], exported["max_id"])
+            archived.append({"month": month, "file": exported, "pruned": pruned})
+
+        if vacuum and archived:
+            # Pruned pages are reused by new inserts anyway; VACUUM only
+            # matters to shrink the file (e.g. before a backup). It needs
+            # exclusive access for its duration.
+            with self._connect() as conn:
+                conn.execute("VACUUM")
+
+        return archived
+
+    def _export(self, month: str) -> Optional[Dict]:
+        """Stream one month's hot rows into a new archive file and record it"""
+        start, end = month_bounds(month)
+
+        with self._connect() as conn:
+            # Walks idx_cases_created: already in (created_at, id) order, no sort
+            cursor = conn.execute(
+                f"SELECT {', '.join(CASE_COLUMNS)} FROM cases "
+                "WHERE created_at >= ? AND created_at < ? "
+                "ORDER BY created_at, id",
+                (start, end)
+            )
+
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                return None
+
+            os.makedirs(self.archive_dir, exist_ok=True)
+            first_id = min(row[0] for row in rows)
+            path = os.path.join(self.archive_dir, f"cases-{month}-{first_id}.{self.file_format}")
+            partial = path + ".partial"
+
+            sink_type = _ParquetSink if self.file_format == "parquet" else _JsonlSink
+            sink = sink_type(partial)
+            count, min_id, max_id = 0, first_id, 0
+            try:
+                while rows:
+                    sink.write(rows)
+                    count += len(rows)
+                    min_id = min(min_id, min(row[0] for row in rows))
+                    max_id = max(max_id, max(row[0] for row in rows))
+                    rows = cursor.fetchmany(self.batch_size)
+            finally:
+                sink.close()
+
+        # Rows are pruned once recorded, so the file must be on disk first;
+        # and only a complete file ever has the final name
+        with open(partial, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(partial, path)
+
+        record = {
+            "path": os.path.basename(path),
+            "month": month,
+            "cases": count,
+            "min_id": min_id,
+            "max_id": max_id,
+            "format": self.file_format,
+            "archived_at": datetime.utcnow().isoformat()
+        }
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO case_archives "
+                "(path, month, cases, min_id, max_id, format, archived_at) "
+                "VALUES (:path, :month, :cases, :min_id, :max_id, :format, :archived_at)",
+                record
+            )
+        return record
+
+    def _prune_recorded(self, month: str) -> int:
+        """Rows of an earlier, interrupted run that are archived but not yet pruned"""
+        with self._connect() as conn:
+            ranges = conn.execute(
+                "SELECT min_id, max_id FROM case_archives WHERE month = ?",
+                (month,)
+            ).fetchall()
+        return sum(self._prune(month, min_id, max_id) for min_id, max_id in ranges)
+
+    def _prune(self, month: str, min_id: int, max_id: int) -> int:
+        """
+        Delete a month's archived id range, batch by batch, so inserts are
+        never blocked for long. Rows of the month that arrived after the
+        export (id outside the range) stay for the next run.
+        """
+        start, end = month_bounds(month)
+        pruned = 0
+
+        while True:
+            with self._connect() as conn:
+                deleted = conn.execute(
+                    "DELETE FROM cases WHERE id IN ("
+                    " SELECT id FROM cases"
+                    " WHERE created_at >= ? AND created_at < ? AND id BETWEEN ? AND ?"
+                    " LIMIT ?)",
+                    (start, end, min_id, max_id, self.batch_size)
+                ).rowcount
+            pruned += deleted
+            if deleted < self.batch_size:
+                return pruned
+
+    def files(self) -> List[Dict]:
+        """Archive files recorded in the hot database, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path, month, cases, min_id, max_id, format, archived_at "
+                "FROM case_archives ORDER BY month, min_id"
+            ).fetchall()
+        keys = ["path", "month", "cases", "min_id", "max_id", "format", "archived_at"]
+        return [dict(zip(keys, row)) for row in rows]
+
+
+# ======================================================
+# Reading
+# ======================================================
+
+class CaseArchive:
+    """
+    Queries over archive files. Needs only the archive directory, not the
+    hot database, so it works on archives copied to cold storage. Memory
+    is bounded by batch_size whatever the date range.
+    """
+
+    def __init__(self, archive_dir: str = None, batch_size: int = 10000):
+        self.name = "CaseArchive"
+        self.archive_dir = os.path.abspath(archive_dir or DEFAULT_ARCHIVE_DIR)
+        self.batch_size = batch_size
+
+    def paths(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[str]:
+        """Archive files that may hold cases in [start, end), oldest first"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+
+        first = _timestamp(start)[:7] if start is not None else None
+        last = _timestamp(end) if end is not None else None
+
+        found = []
+        for name in os.listdir(self.archive_dir):
+            match = ARCHIVE_FILE.match(name)
+            if match is None:
+                continue
+            month = match.group(1)
+            if first is not None and month < first:
+                continue
+            if last is not None and month_bounds(month)[0] >= last:
+                continue
+            found.append((month, int(match.group(2)), name))
+
+        return [os.path.join(self.archive_dir, name) for _, _, name in sorted(found)]
+
+    def batches(
+        self,
+        domain: Optional[str] = None,
+        route: Optional[str] = None,
+        eligible: Optional[bool] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> Iterator[Dict[str, list]]:
+        """Matching cases as column -> values batches, oldest file first"""
+        columns = list(columns or CASE_COLUMNS)
+        filters = {
+            "domain": domain,
+            "route": route,
+            "eligible": eligible,
+            "start": _timestamp(start),
+            "end": _timestamp(end)
+        }
+
+        for path in self.paths(start, end):
+            if path.endswith(".parquet"):
+                yield from self._parquet_batches(path, columns, filters)
+            else:
+                yield from self._jsonl_batches(path, columns, filters)
+
+    def iter_cases(self, **filters) -> Iterator[Dict]:
+        """Matching cases one at a time (same filters as batches())"""
+        for batch in self.batches(**filters):
+            names = list(batch)
+            for values in zip(*batch.values()):
+                yield dict(zip(names, values))
+
+    def count(self, by: Sequence[str] = ("domain",), **filters) -> List[Dict]:
+        """Case counts grouped by the given columns, largest first"""
+        by = list(by)
+        counts: Counter = Counter()
+        for batch in self.batches(columns=by, **filters):
+            counts.update(zip(*(batch[column] for column in by)))
+        return [
+            {**dict(zip(by, key)), "cases": n}
+            for key, n in counts.most_common()
+        ]
+
+    # ----------------------------
+    # Formats
+    # ----------------------------
+    def _parquet_batches(
+        self,
+        path: str,
+        columns: List[str],
+        filters: Dict
+    ) -> Iterator[Dict[str, list]]:
+        pa = _pyarrow()
+        if pa is None:
+            raise RuntimeError(f"pyarrow is required to read {os.path.basename(path)}")
+        field = pa.dataset.field
+
+        expression = None
+        conditions = []
+        if filters["domain"] is not None:
+            conditions.append(field("domain") == filters["domain"])
+        if filters["route"] is not None:
+            conditions.append(field("route") == filters["route"])
+        if filters["eligible"] is not None:
+            conditions.append(field("eligible") == filters["eligible"])
+        if filters["start"] is not None:
+            conditions.append(field("created_at") >= filters["start"])
+        if filters["end"] is not None:
+            conditions.append(field("created_at") < filters["end"])
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        # Filters are pushed down: row groups outside the range are skipped
+        dataset = pa.dataset.dataset(path, format="parquet")
+        for batch in dataset.to_batches(
+            columns=columns,
+            filter=expression,
+            batch_size=self.batch_size
+        ):
+            if batch.num_rows:
+                yield batch.to_pydict()
+
+    def _jsonl_batches(
+        self,
+        path: str,
+        columns: List[str],
+        filters: Dict
+    ) -> Iterator[Dict[str, list]]:
+        batch: Dict[str, list] = {column: [] for column in columns}
+        size = 0
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                case = json.loads(line)
+                if not self._matches(case, filters):
+                    continue
+                for column in columns:
+                    batch[column].append(case.get(column))
+                size += 1
+                if size >= self.batch_size:
+                    yield batch
+                    batch = {column: [] for column in columns}
+                    size = 0
+
+        if size:
+            yield batch
+
+    def _matches(self, case: Dict, filters: Dict) -> bool:
+        for column in ("domain", "route", "eligible"):
+            if filters[column] is not None and case.get(column) != filters[column]:
+                return False
+        created_at = case.get("created_at") or ""
+        if filters["start"] is not None and created_at < filters["start"]:
+            return False
+        if filters["end"] is not None and created_at >= filters["end"]:
+            return False
+        return True
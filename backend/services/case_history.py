@@ -0,0 +1,418 @@
+"""
+Case History
+
+Responsibility:
+- Read stored triage cases back for audit and reporting
+- Filter by domain, route, eligibility and created_at range
+- Paginate with keyset cursors (no OFFSET scans on large tables)
+- Serve aggregates from the case_daily_stats rollup, never from cases
+- Find similar past cases through the cases_fts full-text index
+
+Schema and migrations are owned by MemoryAgent.
+"""
+
+import base64
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+
+CASE_COLUMNS = [
+    "id",
+    "message",
+    "domain",
+    "eligible",
+    "route",
+    "confidence",
+    "reasoning_mode",
+    "input_tokens",
+    "output_tokens",
+    "created_at",
+]
+
+
+# Too common to tell cases apart; dropped without an index lookup
+STOPWORDS = frozenset("""
+    a about after again all also am an and any are as at be because been
+    before but by can could did do does for from had has have he her him
+    his how i if in into is it its me my no not of on or our out she so
+    some than that the their them then there they this to too up us was
+    we were what when which who will with would you your
+""".split())
+
+# Words of the query text looked up, and words ranked by, at most
+MAX_QUERY_TERMS = 16
+MAX_RANKED_TERMS = 8
+
+# Newest matches ranked when every word is too common for BM25
+NEWEST_CANDIDATES = 1000
+
+# Case ids are assigned at insert, a little after created_at is stamped
+# (write-behind flushes, several writer processes); date bounds on ids
+# are widened by this much and the exact filter applied on top
+ID_CLOCK_SKEW = timedelta(hours=1)
+
+
+def search_terms(text: str) -> List[str]:
+    """Distinct words of the query, in order, as quoted FTS5 strings"""
+    terms: List[str] = []
+    for word in re.findall(r"\w+", text.lower()):
+        if len(word) < 2 or word in STOPWORDS or word in terms:
+            continue
+        terms.append(word)
+        if len(terms) == MAX_QUERY_TERMS:
+            break
+    # \w+ never contains a double quote, so quoting is enough to escape
+    return [f'"{term}"' for term in terms]
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    """Stored timestamps are naive UTC ISO strings; compare like with like"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def encode_cursor(created_at: str, case_id: int) -> str:
+    raw = f"{created_at}|{case_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, case_id = raw.rsplit("|", 1)
+        return created_at, int(case_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class CaseHistory:
+    def __init__(self, db_path: str, search_candidates: int = 5000):
+        self.name = "CaseHistory"
+        self.db_path = db_path
+        # Most cases one search ranks; bounds its cost whatever the store size
+        self.search_candidates = search_candidates
+
+    def _connect(self) -> sqlite3.Connection:
+        # Read-only: history queries must never write to the case store
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=5)
+
+    # ----------------------------
+    # Listing
+    # ----------------------------
+    def list_cases(
+        self,
+        domain: Optional[str] = None,
+        route: Optional[str] = None,
+        eligible: Optional[bool] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict:
+        """
+        Newest first. Pass the returned next_cursor back to get the next page.
+        start is inclusive, end is exclusive.
+        """
+        where: List[str] = []
+        params: List = []
+
+        if domain is not None:
+            where.append("domain = ?")
+            params.append(domain)
+        if route is not None:
+            where.append("route = ?")
+            params.append(route)
+        if eligible is not None:
+            where.append("eligible = ?")
+            params.append(1 if eligible else 0)
+        if start is not None:
+            where.append("created_at >= ?")
+            params.append(_timestamp(start))
+        if end is not None:
+            where.append("created_at < ?")
+            params.append(_timestamp(end))
+
+        if cursor is not None:
+            after_created_at, after_id = decode_cursor(cursor)
+            where.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([after_created_at, after_created_at, after_id])
+
+        sql = f"SELECT {', '.join(CASE_COLUMNS)} FROM cases"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+
+        # One extra row tells us whether another page exists
+        params.append(limit + 1)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        items = [self._case(row) for row in rows[:limit]]
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+
+        return {"items": items, "next_cursor": next_cursor}
+
+    def _case(self, row: Tuple) -> Dict:
+        case = dict(zip(CASE_COLUMNS, row))
+        if case["eligible"] is not None:
+            case["eligible"] = bool(case["eligible"])
+        return case
+
+    # ----------------------------
+    # Aggregates
+    # ----------------------------
+    def aggregates(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Case counts per domain and per route, and a per-day histogram of
+        confidence in ten 0.1-wide buckets. Day granularity: start and end
+        are truncated to their date (end exclusive).
+        """
+        where: List[str] = []
+        params: List = []
+
+        if start is not None:
+            where.append("day >= ?")
+            params.append(_timestamp(start)[:10])
+        if end is not None:
+            where.append("day < ?")
+            params.append(_timestamp(end)[:10])
+
+        clause = (" WHERE " + " AND ".join(where)) if where else ""
+
+        with self._connect() as conn:
+            by_domain = conn.execute(
+                f"SELECT domain, SUM(cases) FROM case_daily_stats{clause} "
+                "GROUP BY domain ORDER BY 2 DESC",
+                params
+            ).fetchall()
+
+            by_route = conn.execute(
+                f"SELECT route, SUM(cases) FROM case_daily_stats{clause} "
+                "GROUP BY route ORDER BY 2 DESC",
+                params
+            ).fetchall()
+
+            buckets = conn.execute(
+                f"SELECT day, confidence_bucket, SUM(cases) FROM case_daily_stats{clause} "
+                "GROUP BY day, confidence_bucket ORDER BY day",
+                params
+            ).fetchall()
+
+        histogram: Dict[str, List[int]] = {}
+        for day, bucket, count in buckets:
+            histogram.setdefault(day, [0] * 10)[bucket] += count
+
+        # Empty strings stand in for NULL inside the rollup key
+        return {
+            "by_domain": [{"domain": d or None, "cases": n} for d, n in by_domain],
+            "by_route": [{"route": r or None, "cases": n} for r, n in by_route],
+            "confidence_histogram": [
+                {"day": day, "buckets": counts} for day, counts in histogram.items()
+            ]
+        }
+
+    # ----------------------------
+    # Similar-case search
+    # ----------------------------
+    def search(
+        self,
+        text: str,
+        domain: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 20
+    ) -> Dict:
+        """
+        Stored cases whose messages best match the words of `text`, best
+        first (higher score is better). start is inclusive, end is
+        exclusive.
+
+        BM25 costs time per matching case, so words are ranked rarest
+        first and only while their cases fit in search_candidates: common
+        words ("landlord", "deposit") say little about similarity anyway.
+        If even the rarest word is that common, `exhaustive` is false and
+        only the newest matches are ranked, by words shared (score is the
+        count).
+        """
+        terms = search_terms(text)
+        if not terms:
+            raise ValueError("Search text has no searchable words")
+
+        with self._connect() as conn:
+            # Matching cases per word, counted no further than the budget;
+            # words no case contains cannot help and are left out
+            counts = [(self._count_matches(conn, term), term) for term in terms]
+            counts = sorted(pair for pair in counts if pair[0] > 0)
+            if not counts:
+                return {"items": [], "terms": [], "exhaustive": True}
+
+            ranked: List[str] = []
+            total = 0
+            for count, term in counts[:MAX_RANKED_TERMS]:
+                if total + count > self.search_candidates:
+                    break
+                ranked.append(term)
+                total += count
+
+            where: List[str] = []
+            params: List = []
+
+            if domain is not None:
+                where.append("c.domain = ?")
+                params.append(domain)
+            if start is not None:
+                where.append("c.created_at >= ?")
+                params.append(_timestamp(start))
+            if end is not None:
+                where.append("c.created_at < ?")
+                params.append(_timestamp(end))
+
+            if ranked:
+                scored = self._rank_bm25(conn, ranked, where, params, limit)
+            else:
+                ranked = [term for _, term in counts[:MAX_RANKED_TERMS]]
+                scored = self._rank_newest(conn, ranked, where, params, limit, start, end)
+
+            scores = dict(scored)
+            items = self._fetch(conn, list(scores))
+
+        for case in items:
+            case["score"] = round(scores[case["id"]], 4)
+
+        return {
+            "items": items,
+            "terms": [term.strip('"') for term in ranked],
+            "exhaustive": total > 0
+        }
+
+    def _rank_bm25(
+        self,
+        conn: sqlite3.Connection,
+        terms: List[str],
+        where: List[str],
+        params: List,
+        limit: int
+    ) -> List[Tuple[int, float]]:
+        """(id, score) of the best BM25 matches; at most search_candidates are scored"""
+        sql = "SELECT cases_fts.rowid, bm25(cases_fts) AS score FROM cases_fts "
+        if where:
+            # Cases are joined only to filter
+            sql += "JOIN cases c ON c.id = cases_fts.rowid "
+        sql += "WHERE " + " AND ".join(["cases_fts MATCH ?"] + where) + " ORDER BY score LIMIT ?"
+
+        rows = conn.execute(sql, [" OR ".join(terms)] + params + [limit]).fetchall()
+        # bm25() is negative, lower is better
+        return [(case_id, -score) for case_id, score in rows]
+
+    def _rank_newest(
+        self,
+        conn: sqlite3.Connection,
+        terms: List[str],
+        where: List[str],
+        params: List,
+        limit: int,
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ) -> List[Tuple[int, float]]:
+        """
+        Every word is too common for BM25 to pay off: its IDF alone scans
+        the word's whole posting list. Rank the newest NEWEST_CANDIDATES
+        matches by how many of the words each contains instead; each
+        word's postings are only read within the candidates' id range.
+        """
+        bounds = self._id_bounds(conn, start, end)
+        if bounds is None:
+            return []
+
+        sql = "SELECT cases_fts.rowid FROM cases_fts "
+        if where:
+            sql += "JOIN cases c ON c.id = cases_fts.rowid "
+        sql += (
+            "WHERE " + " AND ".join(["cases_fts MATCH ?"] + where + ["cases_fts.rowid BETWEEN ? AND ?"])
+            + " ORDER BY cases_fts.rowid DESC LIMIT ?"
+        )
+        candidates = [
+            row[0] for row in conn.execute(
+                sql,
+                [" OR ".join(terms)] + params + list(bounds) + [NEWEST_CANDIDATES]
+            )
+        ]
+        if not candidates:
+            return []
+
+        shared = dict.fromkeys(candidates, 0)
+        low, high = candidates[-1], candidates[0]
+        for term in terms:
+            for (case_id,) in conn.execute(
+                "SELECT rowid FROM cases_fts WHERE cases_fts MATCH ? AND rowid BETWEEN ? AND ?",
+                (term, low, high)
+            ):
+                if case_id in shared:
+                    shared[case_id] += 1
+
+        # Most words in common, then newest (candidates are newest first)
+        best = sorted(shared.items(), key=lambda item: -item[1])[:limit]
+        return [(case_id, float(count)) for case_id, count in best]
+
+    def _fetch(self, conn: sqlite3.Connection, ids: List[int]) -> List[Dict]:
+        """Cases by id, in the order given"""
+        if not ids:
+            return []
+        rows = conn.execute(
+            f"SELECT {', '.join(CASE_COLUMNS)} FROM cases "
+            f"WHERE id IN ({', '.join('?' * len(ids))})",
+            ids
+        ).fetchall()
+        by_id = {row[0]: self._case(row) for row in rows}
+        return [by_id[case_id] for case_id in ids if case_id in by_id]
+
+    def _count_matches(self, conn: sqlite3.Connection, term: str) -> int:
+        """Cases containing term, up to search_candidates + 1 (enough to rule it out)"""
+        return conn.execute(
+            "SELECT COUNT(*) FROM ("
+            " SELECT 1 FROM cases_fts WHERE cases_fts MATCH ? LIMIT ?)",
+            (term, self.search_candidates + 1)
+        ).fetchone()[0]
+
+    def _id_bounds(
+        self,
+        conn: sqlite3.Connection,
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ) -> Optional[Tuple[int, int]]:
+        """Case id range covering [start, end), or None if it holds no cases"""
+        low, high = 0, 2 ** 63 - 1
+
+        if start is not None:
+            row = conn.execute(
+                "SELECT id FROM cases WHERE created_at >= ? ORDER BY created_at, id LIMIT 1",
+                (_timestamp(start - ID_CLOCK_SKEW),)
+            ).fetchone()
+            if row is None:
+                return None
+            low = row[0]
+
+        if end is not None:
+            row = conn.execute(
+                "SELECT id FROM cases WHERE created_at < ? ORDER BY created_at DESC, id DESC LIMIT 1",
+                (_timestamp(end + ID_CLOCK_SKEW),)
+            ).fetchone()
+            if row is None:
+                return None
+            high = row[0]
+
+        return low, high
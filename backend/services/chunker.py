@@ -0,0 +1,108 @@
+"""
+Document Chunker
+
+Responsibility:
+- Decode uploaded documents incrementally, block by block
+- Cut text into chunks of at most `max_chars`, preferring paragraph,
+  then sentence, then word boundaries
+- Never hold more than one chunk (plus one block) of a document in memory
+"""
+
+import codecs
+import re
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List
+
+
+# Where a chunk may end, best first
+BOUNDARIES = (
+    re.compile(r"\n\s*\n"),
+    re.compile(r"[.!?]\s+"),
+    re.compile(r"\s+")
+)
+
+
+class DocumentTooLarge(ValueError):
+    """An uploaded document is over the configured size limit"""
+
+
+class Chunker:
+    def __init__(self, max_chars: int = 2000):
+        self.name = "Chunker"
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add text; return the chunks it completed"""
+        buffer = self._buffer + text
+
+        chunks = []
+        # Walk an offset rather than re-slicing the rest of a large block per chunk
+        start = 0
+        while len(buffer) - start > self.max_chars:
+            cut = start + self._cut_point(buffer[start:start + self.max_chars])
+            chunk = buffer[start:cut].strip()
+            if chunk:
+                chunks.append(chunk)
+            start = cut
+
+        self._buffer = buffer[start:]
+        return chunks
+
+    def finish(self) -> List[str]:
+        """Whatever is left once the document has ended"""
+        chunk, self._buffer = self._buffer.strip(), ""
+        return [chunk] if chunk else []
+
+    def _cut_point(self, window: str) -> int:
+        # Don't cut so early that chunks become fragments
+        floor = self.max_chars // 2
+
+        for boundary in BOUNDARIES:
+            ends = [m.end() for m in boundary.finditer(window) if m.end() >= floor]
+            if ends:
+                return ends[-1]
+
+        return self.max_chars
+
+
+def chunk_text(pieces: Iterable[str], max_chars: int = 2000) -> Iterator[str]:
+    chunker = Chunker(max_chars)
+    for piece in pieces:
+        yield from chunker.feed(piece)
+    yield from chunker.finish()
+
+
+async def achunk_text(pieces: AsyncIterable[str], max_chars: int = 2000) -> AsyncIterator[str]:
+    chunker = Chunker(max_chars)
+    async for piece in pieces:
+        for chunk in chunker.feed(piece):
+            yield chunk
+    for chunk in chunker.finish():
+        yield chunk
+
+
+async def adecode(
+    blocks: AsyncIterable[bytes],
+    max_bytes: int = 0,
+    encoding: str = "utf-8"
+) -> AsyncIterator[str]:
+    """
+    Text from a stream of byte blocks. A multi-byte character split
+    across blocks is decoded once both halves have arrived; invalid
+    bytes become U+FFFD. max_bytes > 0 raises DocumentTooLarge once the
+    stream goes past it.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    total = 0
+
+    async for block in blocks:
+        total += len(block)
+        if max_bytes > 0 and total > max_bytes:
+            raise DocumentTooLarge(f"Document is larger than {max_bytes} bytes")
+        text = decoder.decode(block)
+        if text:
+            yield text
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
@@ -0,0 +1,131 @@
+"""
+Jurisdiction Matcher
+
+Responsibility:
+- Find jurisdiction mentions in a message using eligibility_rules.yaml
+- Match whole words and phrases only ("indiana" is not "india")
+- Compile all terms into one pattern, so cost stays flat as rules grow
+- Pick up edits to the rules file without a restart
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from backend.services.rules import RULES_PATH, load_rules
+
+
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+
+
+class JurisdictionMatcher:
+    def __init__(self, rules_path: str = None, reload_interval: float = 2.0):
+        self.name = "JurisdictionMatcher"
+        self.rules_path = rules_path or RULES_PATH
+
+        # Minimum seconds between mtime checks of the rules file
+        self.reload_interval = reload_interval
+
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._mtime: Optional[float] = None
+
+        # (pattern, term -> ACCEPTED / REJECTED), swapped as one unit on reload
+        self._compiled: Tuple[Optional[Pattern], Dict[str, str]] = (None, {})
+
+        self.reload()
+
+    # ----------------------------
+    # Building
+    # ----------------------------
+    def reload(self) -> None:
+        """Rebuild the pattern from the rules file"""
+        mtime = os.stat(self.rules_path).st_mtime
+        rules = load_rules(self.rules_path)
+
+        compiled = self._compile(
+            rules.get("jurisdictions", []),
+            rules.get("rejected_jurisdictions", [])
+        )
+
+        with self._lock:
+            self._compiled = compiled
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+
+    def _compile(
+        self,
+        accepted: List[str],
+        rejected: List[str]
+    ) -> Tuple[Optional[Pattern], Dict[str, str]]:
+        kinds: Dict[str, str] = {}
+
+        for term in rejected:
+            kinds[self._normalize(term)] = REJECTED
+        # A term listed on both sides counts as inside the jurisdiction
+        for term in accepted:
+            kinds[self._normalize(term)] = ACCEPTED
+
+        if not kinds:
+            return None, kinds
+
+        # Longest first so "new zealand" wins over a shorter overlapping term
+        alternatives = sorted(
+            (r"\s+".join(re.escape(word) for word in term.split()) for term in kinds),
+            key=len,
+            reverse=True
+        )
+        pattern = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+        return pattern, kinds
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.rules_path).st_mtime
+        except OSError:
+            # Keep serving the last good rules
+            return
+
+        if mtime != self._mtime:
+            try:
+                self.reload()
+            except Exception:
+                # A half-written or invalid file must not break validation
+                pass
+
+    @staticmethod
+    def _normalize(term: str) -> str:
+        return " ".join(term.lower().split())
+
+    # ----------------------------
+    # Matching
+    # ----------------------------
+    def match(self, message: str) -> Dict[str, List[str]]:
+        """
+        Returns the distinct terms found, grouped by kind:
+        {"accepted": [...], "rejected": [...]}
+        """
+        self._maybe_reload()
+        pattern, kinds = self._compiled
+
+        found: Dict[str, List[str]] = {ACCEPTED: [], REJECTED: []}
+        if pattern is None:
+            return found
+
+        seen = set()
+        for m in pattern.finditer(message):
+            term = self._normalize(m.group(0))
+            if term in seen:
+                continue
+            seen.add(term)
+            found[kinds[term]].append(term)
+
+        return found
@@ -0,0 +1,240 @@
+"""
+LLM Backends
+
+Responsibility:
+- Give the reasoner one interface over whichever model answers prompts
+- Gemini (via langchain) for production
+- A deterministic local stub for benchmarks and offline development
+
+A backend exposes invoke(prompt) / ainvoke(prompt) returning an object
+with a `.content` string, like a langchain AIMessage.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional
+
+
+class LLMBackend:
+    # Reported as the reasoner mode; model_name is part of cache keys
+    mode = "unknown"
+    model_name = "unknown"
+
+    def invoke(self, prompt: str):
+        raise NotImplementedError
+
+    async def ainvoke(self, prompt: str):
+        return await asyncio.to_thread(self.invoke, prompt)
+
+    def warm_up(self) -> None:
+        """Open connections / load anything lazy before taking traffic"""
+        self.invoke("Reply with the word OK.")
+
+
+# ======================================================
+# Gemini
+# ======================================================
+
+class GeminiBackend(LLMBackend):
+    mode = "gemini"
+
+    def __init__(self, model_name: str = "gemini-2.5-flash", temperature: float = 0.2):
+        self.model_name = model_name
+
+        if not os.getenv("GEMINI_API_KEY"):
+            raise RuntimeError("GEMINI_API_KEY is required for reasoning")
+
+        # Deferred: langchain is slow to import and only needed for Gemini
+        try:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+        except ImportError:
+            raise RuntimeError("langchain-google-genai is required for the Gemini backend")
+
+        self.model = ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=temperature,
+            google_api_key=os.getenv("GEMINI_API_KEY")
+        )
+
+    def invoke(self, prompt: str):
+        return self.model.invoke(prompt)
+
+    async def ainvoke(self, prompt: str):
+        return await self.model.ainvoke(prompt)
+
+
+# ======================================================
+# Stub
+# ======================================================
+
+class StubMessage:
+    """Minimal stand-in for a langchain AIMessage"""
+
+    def __init__(self, content: str, input_tokens: int, output_tokens: int):
+        self.content = content
+        self.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        }
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic offline backend.
+
+    - Latency per call is drawn from a normal distribution
+      (latency_ms, jitter_ms), clipped at zero, from a seeded RNG.
+    - The domain for a message is picked from `domains` (name -> weight)
+      by hashing the message, so the same message always gets the same
+      answer regardless of call order.
+    - `invalid_rate` of messages get a non-JSON reply, exercising the
+      reasoner's fallback path.
+    - A prompt quoting several messages gets a JSON array, one entry each,
+      and takes `per_message_ms` longer for every message it quotes.
+    - `max_concurrent` > 0 models a provider concurrency / rate limit:
+      calls beyond it queue until one finishes.
+    """
+
+    mode = "stub"
+    model_name = "stub"
+
+    DEFAULT_DOMAINS = {
+        "HOUSING": 0.35,
+        "EMPLOYMENT": 0.3,
+        "IMMIGRATION": 0.2,
+        "UNKNOWN": 0.15
+    }
+
+    # Messages are quoted in the prompt as """...""" blocks
+    MESSAGE_PATTERN = re.compile(r'"""(.*?)"""', re.DOTALL)
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 10.0,
+        domains: Optional[Dict[str, float]] = None,
+        invalid_rate: float = 0.0,
+        seed: int = 0,
+        per_message_ms: float = 0.0,
+        max_concurrent: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_message_ms = per_message_ms
+        self.invalid_rate = invalid_rate
+        self.seed = seed
+
+        domains = domains or self.DEFAULT_DOMAINS
+        total = sum(domains.values())
+        self._domains: List = []
+        cumulative = 0.0
+        for name, weight in domains.items():
+            cumulative += weight / total
+            self._domains.append((cumulative, name))
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        self.max_concurrent = max_concurrent
+        self._limit = threading.BoundedSemaphore(max_concurrent) if max_concurrent > 0 else None
+        # asyncio semaphores belong to one event loop
+        self._async_limits = weakref.WeakKeyDictionary()
+
+        self.calls = 0
+
+    def _latency(self, prompt: str) -> float:
+        with self._rng_lock:
+            self.calls += 1
+            sample = self._rng.gauss(self.latency_ms, self.jitter_ms)
+        messages = max(len(self.MESSAGE_PATTERN.findall(prompt)), 1)
+        return (max(0.0, sample) + self.per_message_ms * messages) / 1000
+
+    def _unit(self, text: str, salt: str) -> float:
+        """Stable pseudo-random number in [0, 1) for a message"""
+        digest = hashlib.blake2b(f"{self.seed}:{salt}:{text}".encode("utf-8"), digest_size=8)
+        return int.from_bytes(digest.digest(), "big") / 2 ** 64
+
+    def _classify(self, message: str) -> Optional[Dict]:
+        if self._unit(message, "invalid") < self.invalid_rate:
+            return None
+
+        pick = self._unit(message, "domain")
+        domain = next(name for bound, name in self._domains if pick < bound or bound >= 1.0)
+
+        return {
+            "domain": domain,
+            "confidence": round(0.5 + 0.49 * self._unit(message, "confidence"), 2),
+            "why": "Stub classification.",
+            "missing_info": []
+        }
+
+    def _respond(self, prompt: str) -> StubMessage:
+        messages = self.MESSAGE_PATTERN.findall(prompt) or [prompt]
+        results = [self._classify(message) for message in messages]
+
+        if len(messages) > 1:
+            content = json.dumps([r or {"domain": "UNKNOWN", "confidence": 0.0} for r in results])
+        elif results[0] is None:
+            content = "I'm sorry, I can't help with that."
+        else:
+            content = json.dumps(results[0])
+
+        return StubMessage(content, len(prompt) // 4, len(content) // 4)
+
+    def invoke(self, prompt: str) -> StubMessage:
+        if self._limit is None:
+            time.sleep(self._latency(prompt))
+            return self._respond(prompt)
+
+        with self._limit:
+            time.sleep(self._latency(prompt))
+        return self._respond(prompt)
+
+    async def ainvoke(self, prompt: str) -> StubMessage:
+        if self._limit is None:
+            await asyncio.sleep(self._latency(prompt))
+            return self._respond(prompt)
+
+        loop = asyncio.get_running_loop()
+        limit = self._async_limits.get(loop)
+        if limit is None:
+            limit = self._async_limits[loop] = asyncio.Semaphore(self.max_concurrent)
+
+        async with limit:
+            await asyncio.sleep(self._latency(prompt))
+        return self._respond(prompt)
+
+
+# ======================================================
+# Factory
+# ======================================================
+
+def build_backend(name: str = None) -> LLMBackend:
+    """
+    Build the backend named by `name` or the LLM_BACKEND env var
+    (gemini by default). Stub settings come from STUB_LLM_* env vars.
+    """
+    name = (name or os.getenv("LLM_BACKEND", "gemini")).lower()
+
+    if name == "gemini":
+        return GeminiBackend()
+
+    if name == "stub":
+        return StubBackend(
+            latency_ms=float(os.getenv("STUB_LLM_LATENCY_MS", "50")),
+            jitter_ms=float(os.getenv("STUB_LLM_JITTER_MS", "10")),
+            invalid_rate=float(os.getenv("STUB_LLM_INVALID_RATE", "0")),
+            seed=int(os.getenv("STUB_LLM_SEED", "0")),
+            per_message_ms=float(os.getenv("STUB_LLM_PER_MESSAGE_MS", "0")),
+            max_concurrent=int(os.getenv("STUB_LLM_MAX_CONCURRENT", "0"))
+        )
+
+    raise ValueError(f"Unknown LLM backend: {name}")
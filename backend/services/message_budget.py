@@ -0,0 +1,65 @@
+"""
+Message Budget
+
+Responsibility:
+- Keep the part of a message sent to the LLM under a character budget
+- Prefer sentences that carry the legal issue over greetings and boilerplate
+- Keep the selected sentences in their original order
+- Estimate token counts when a backend does not report usage
+"""
+
+import re
+from typing import Callable
+
+
+# Sentence ends, or blank-line / line breaks in pasted letters
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+# Marks where sentences were left out
+GAP = " ... "
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough count for English text: about four characters per token"""
+    if not text:
+        return 0
+    return max(1, (len(text) + 3) // 4)
+
+
+def fit_message(message: str, max_chars: int, score: Callable[[str], int]) -> str:
+    """
+    Return message unchanged if it fits in max_chars (0 means no limit).
+    Otherwise keep the highest-scoring sentences that fit, ties going to
+    the earlier sentence, and fall back to a plain prefix if no single
+    sentence fits.
+    """
+    message = message.strip()
+    if max_chars <= 0 or len(message) <= max_chars:
+        return message
+
+    sentences = [s for s in SENTENCE_BOUNDARY.split(message) if s]
+
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: (-score(sentences[i]), i)
+    )
+
+    chosen = []
+    used = 0
+    for i in ranked:
+        # Budget for a gap marker in front of every sentence but the first
+        cost = len(sentences[i]) + (len(GAP) if chosen else 0)
+        if used + cost > max_chars:
+            continue
+        chosen.append(i)
+        used += cost
+
+    if not chosen:
+        return message[:max_chars].rstrip()
+
+    chosen.sort()
+    parts = [sentences[chosen[0]]]
+    for previous, current in zip(chosen, chosen[1:]):
+        parts.append((" " if current == previous + 1 else GAP) + sentences[current])
+
+    return "".join(parts)
@@ -0,0 +1,370 @@
+"""
+Metrics
+
+Responsibility:
+- Hold process-wide counters, gauges and histograms
+- Render them in the Prometheus text exposition format for /metrics
+- Stay dependency-free and cheap enough to update on every request
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Seconds; spans sub-millisecond agents up to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+        REGISTRY.append(self)
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _unlabelled(self):
+        return self._children[()]
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            lines.extend(child.render(self.name, list(zip(self.labelnames, key))))
+        return lines
+
+
+# ----------------------------
+# Counter
+# ----------------------------
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def render(self, name: str, labels) -> List[str]:
+        return [f"{name}{_format_labels(labels)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+
+# ----------------------------
+# Gauge
+# ----------------------------
+class _GaugeChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from `function` at scrape time"""
+        self._function = function
+
+    def render(self, name: str, labels) -> List[str]:
+        value = self._function() if self._function else self.value
+        return [f"{name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+
+# ----------------------------
+# Histogram
+# ----------------------------
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def render(self, name: str, labels) -> List[str]:
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            bucket_labels = labels + [("le", _format_value(bound))]
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.buckets = buckets
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return self._unlabelled().time()
+
+
+# ======================================================
+# Registry
+# ======================================================
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ======================================================
+# Triage metrics
+# ======================================================
+
+TRIAGE_IN_FLIGHT = Gauge(
+    "triage_in_flight",
+    "Triage requests currently being processed"
+)
+
+TRIAGE_DURATION = Histogram(
+    "triage_duration_seconds",
+    "End-to-end triage latency",
+    ["path"]
+)
+
+TRIAGE_OUTCOMES = Counter(
+    "triage_outcomes_total",
+    "Completed triages by final status (ERROR for failures)",
+    ["status"]
+)
+
+AGENT_DURATION = Histogram(
+    "triage_agent_duration_seconds",
+    "Latency of each agent step in the pipeline",
+    ["agent"]
+)
+
+LLM_DURATION = Histogram(
+    "triage_llm_duration_seconds",
+    "Latency of remote LLM calls made by the reasoner"
+)
+
+LLM_FAILURES = Counter(
+    "triage_llm_failures_total",
+    "LLM calls that did not produce a response, by reason (timeout, error, circuit_open)",
+    ["reason"]
+)
+
+LLM_HEDGES = Counter(
+    "triage_llm_hedges_total",
+    "Hedged LLM calls sent, and how many of them answered first",
+    ["result"]
+)
+
+LLM_CIRCUIT_STATE = Gauge(
+    "triage_llm_circuit_state",
+    "LLM circuit breaker state: 0 closed, 1 half-open, 2 open"
+)
+
+LLM_BATCH_SIZE = Histogram(
+    "triage_llm_batch_size",
+    "Messages classified per micro-batched LLM call",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+LLM_TOKENS = Counter(
+    "triage_llm_tokens_total",
+    "Tokens sent to and received from the LLM (estimated if not reported)",
+    ["direction"]
+)
+
+REASONING_TOTAL = Counter(
+    "triage_reasoning_total",
+    "Reasoning results by source (local, local_fallback, gemini, stub, semantic_cache)",
+    ["mode"]
+)
+
+REASONING_COALESCED = Counter(
+    "triage_reasoning_coalesced_total",
+    "Requests that shared an in-flight reasoning result for an identical message"
+)
+
+REASONING_CACHE = Counter(
+    "triage_reasoning_cache_total",
+    "Reasoning cache lookups by cache and result",
+    ["cache", "result"]
+)
+
+PERSIST_DURATION = Histogram(
+    "triage_persist_duration_seconds",
+    "Latency of SQLite case writes, per transaction",
+    ["mode"]
+)
+
+PERSIST_QUEUE_DEPTH = Gauge(
+    "triage_persist_queue_depth",
+    "Case records waiting in the write-behind queue"
+)
+
+DEFERRED_PENDING = Gauge(
+    "triage_deferred_pending",
+    "Deferred pipeline steps (e.g. persistence) queued or running after the response"
+)
+
+DEFERRED_FAILURES = Counter(
+    "triage_deferred_failures_total",
+    "Deferred pipeline steps that raised, by step",
+    ["step"]
+)
+
+ADMISSION_ACTIVE = Gauge(
+    "triage_admission_active",
+    "Triages holding an admission slot"
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "triage_admission_queue_depth",
+    "Requests waiting for an admission slot"
+)
+
+ADMISSION_WAIT = Histogram(
+    "triage_admission_wait_seconds",
+    "Time queued requests waited for a slot (admitted or not)"
+)
+
+ADMISSION_SHED = Counter(
+    "triage_admission_shed_total",
+    "Requests turned away, by reason (queue_full, queue_timeout, client_quota)",
+    ["reason"]
+)
+
+PROFILES_STORED = Counter(
+    "triage_profiles_stored_total",
+    "Triage profiles kept, by reason (slow, sampled)",
+    ["reason"]
+)
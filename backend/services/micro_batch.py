@@ -0,0 +1,104 @@
+"""
+Micro-Batching
+
+Responsibility:
+- Collect items submitted by concurrent coroutines over a short window
+- Hand them to a batch handler in one call, up to a maximum batch size
+- Return each caller its own result (or the batch's exception)
+- Never hold an item longer than the window
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.services import metrics
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        handler: Callable[[List], Awaitable[List]],
+        window: float = 0.01,
+        max_size: int = 16
+    ):
+        """
+        handler receives a list of items and must return one result per
+        item, in the same order.
+        """
+        self.name = "MicroBatcher"
+        self.handler = handler
+        self.window = window
+        self.max_size = max_size
+
+        self._pending: List[Tuple[object, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run(batch))
+        # Keep a reference until done, or the task can be garbage collected
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[object, asyncio.Future]]) -> None:
+        # Callers that gave up while waiting are left out
+        live = [(item, future) for item, future in batch if not future.done()]
+        if not live:
+            return
+
+        self.batches += 1
+        self.items += len(live)
+        metrics.LLM_BATCH_SIZE.observe(len(live))
+
+        try:
+            results = await self.handler([item for item, _ in live])
+            if len(results) != len(live):
+                raise ValueError(
+                    f"Batch handler returned {len(results)} results for {len(live)} items"
+                )
+        except Exception as e:
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        else:
+            for (_, future), result in zip(live, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # Cancelled or a BaseException: no caller may be left waiting
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(RuntimeError("Batch did not complete"))
+
+    def stats(self) -> Dict:
+        return {
+            "window_ms": round(self.window * 1000, 3),
+            "max_size": self.max_size,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,349 @@
+"""
+Slow Request Profiler
+
+Responsibility:
+- Sample the call stacks of in-flight triages on a background thread
+  (wall clock: time blocked on the LLM or SQLite shows up, not just CPU)
+- Keep a profile only if the triage was slow, or picked by sample rate
+- Store kept profiles, tagged with agent timings, in a bounded on-disk
+  ring buffer
+- Render profiles as collapsed stacks ("a;b;c 12" lines), the input
+  format of flamegraph.pl, speedscope and similar tools
+
+Async triages are followed through their await chain, into awaited
+tasks, so a request parked on an LLM call is attributed to that call.
+Nothing is sampled while no triage is in flight.
+"""
+
+import asyncio
+import gc
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from backend.services import metrics
+
+
+DEFAULT_PROFILE_DIR = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        "..",
+        "data",
+        "profiles"
+    )
+)
+
+# Innermost frames kept per sample; deeper stacks are cut at the root end
+MAX_STACK_DEPTH = 128
+
+# Leaf for a task waiting on something that is not a coroutine
+# (a future: LLM I/O, a thread, a timer)
+AWAITING = "(awaiting)"
+
+
+class Capture:
+    """Samples for one triage while it runs"""
+
+    __slots__ = ("label", "thread_id", "task", "sampled", "started", "stacks", "samples")
+
+    def __init__(self, label: str, thread_id: int, task: Optional[asyncio.Task], sampled: bool):
+        self.label = label
+        self.thread_id = thread_id
+        self.task = task
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+
+class SlowRequestProfiler:
+    def __init__(
+        self,
+        directory: str = None,
+        slow_ms: float = 1000.0,
+        sample_rate: float = 0.0,
+        interval_ms: float = 10.0,
+        max_profiles: int = 200,
+        max_active: int = 32
+    ):
+        """
+        slow_ms <= 0 keeps no profile for being slow; sample_rate is the
+        share of triages kept whatever their latency. At most max_active
+        triages are sampled at once; later ones are not profiled.
+        """
+        if max_profiles < 1:
+            raise ValueError(f"max_profiles must be at least 1, got {max_profiles}")
+
+        self.name = "SlowRequestProfiler"
+        self.directory = os.path.abspath(directory or DEFAULT_PROFILE_DIR)
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.max_profiles = max_profiles
+        self.max_active = max_active
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._active: Dict[int, Capture] = {}
+        self._closed = False
+        self._sequence = 0
+        # code object -> frame label, so each function is formatted once
+        self._labels: Dict = {}
+
+        self.captured = 0
+        self.kept = 0
+        self.skipped = 0
+
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+
+    # ----------------------------
+    # Capturing
+    # ----------------------------
+    def start(self, label: str) -> Optional[Capture]:
+        """Begin sampling the calling thread, or task if called from one"""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+
+        capture = Capture(
+            label,
+            threading.get_ident(),
+            task,
+            sampled=self.sample_rate > 0 and random.random() < self.sample_rate
+        )
+
+        with self._lock:
+            if self._closed or len(self._active) >= self.max_active:
+                self.skipped += 1
+                return None
+            self._active[id(capture)] = capture
+            self.captured += 1
+            self._wake.notify()
+        return capture
+
+    def stop(self, capture: Capture, status: str, timings: Dict[str, float]) -> Optional[Dict]:
+        """Stop sampling; the profile to keep, if the triage qualifies"""
+        with self._lock:
+            self._active.pop(id(capture), None)
+
+        duration_ms = (time.perf_counter() - capture.started) * 1000
+        if capture.sampled:
+            reason = "sampled"
+        elif self.slow_ms > 0 and duration_ms >= self.slow_ms:
+            reason = "slow"
+        else:
+            return None
+        if not capture.samples:
+            return None
+
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+
+        now = datetime.utcnow()
+        return {
+            # Sorts by time; pid keeps uvicorn workers sharing the directory apart
+            "id": f"{now.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{sequence:06d}",
+            "created_at": now.isoformat(),
+            "label": capture.label,
+            "status": status,
+            "reason": reason,
+            "duration_ms": round(duration_ms, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": capture.samples,
+            "timings": dict(timings),
+            "stacks": dict(capture.stacks)
+        }
+
+    def _sample_loop(self) -> None:
+        while True:
+            with self._lock:
+                # Idle until a triage starts
+                while not self._active and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+            time.sleep(self.interval)
+            self._sample()
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        with self._lock:
+            captures = list(self._active.values())
+
+        for capture in captures:
+            try:
+                if capture.task is not None:
+                    stack = self._task_stack(capture.task, frames.get(capture.thread_id))
+                else:
+                    stack = self._thread_stack(frames.get(capture.thread_id))
+            except Exception:
+                # The stack changed under us; skip this sample
+                continue
+            if stack:
+                capture.stacks[";".join(stack)] += 1
+                capture.samples += 1
+
+    def _thread_stack(self, frame) -> List[str]:
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return labels
+
+    def _task_stack(self, task: asyncio.Task, thread_frame) -> List[str]:
+        """
+        Root-first frames of a task's await chain, following awaited
+        tasks. If the innermost coroutine is running right now, the
+        plain calls it is making (parsing, SQLite, ...) are appended from
+        the event loop thread's stack.
+        """
+        frames = []
+        awaited = task.get_coro()
+        while awaited is not None and len(frames) < MAX_STACK_DEPTH:
+            if isinstance(awaited, asyncio.Task):
+                awaited = awaited.get_coro()
+                continue
+            if type(awaited).__name__ in ("async_generator_asend", "async_generator_athrow"):
+                # `async for` step: its generator is reachable only through gc
+                awaited = next(
+                    (ref for ref in gc.get_referents(awaited) if hasattr(ref, "ag_frame")),
+                    None
+                )
+                continue
+            children = getattr(awaited, "_children", None)
+            if children is not None:
+                # asyncio.gather(): follow the first child still running
+                awaited = next((child for child in children if not child.done()), None)
+                continue
+            frame = (
+                getattr(awaited, "cr_frame", None)
+                or getattr(awaited, "ag_frame", None)
+                or getattr(awaited, "gi_frame", None)
+            )
+            if frame is None:
+                break
+            frames.append(frame)
+            awaited = (
+                getattr(awaited, "cr_await", None)
+                or getattr(awaited, "ag_await", None)
+                or getattr(awaited, "gi_yieldfrom", None)
+            )
+
+        if not frames:
+            return []
+        labels = [self._label(frame.f_code) for frame in frames]
+
+        # Calls below the innermost coroutine, if it is the one executing
+        below = []
+        frame = thread_frame
+        while frame is not None and frame is not frames[-1]:
+            below.append(self._label(frame.f_code))
+            frame = frame.f_back
+        if frame is not None:
+            labels.extend(reversed(below))
+        elif awaited is not None:
+            labels.append(AWAITING)
+
+        return labels[-MAX_STACK_DEPTH:]
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            for marker in ("/backend/", "/site-packages/", "/lib/python"):
+                index = path.rfind(marker)
+                if index >= 0:
+                    path = path[index + 1:]
+                    break
+            label = self._labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})"
+        return label
+
+    # ----------------------------
+    # Ring buffer
+    # ----------------------------
+    def save(self, profile: Dict) -> None:
+        """Store a profile, dropping the oldest beyond max_profiles"""
+        path = os.path.join(self.directory, f"{profile['id']}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(profile, f)
+        # Atomic: readers never see half a profile
+        os.replace(tmp_path, path)
+
+        self.kept += 1
+        metrics.PROFILES_STORED.labels(profile["reason"]).inc()
+
+        ids = self._ids()
+        for stale in ids[:max(len(ids) - self.max_profiles, 0)]:
+            try:
+                os.remove(os.path.join(self.directory, f"{stale}.json"))
+            except FileNotFoundError:
+                # Another worker pruned it first
+                pass
+
+    def _ids(self) -> List[str]:
+        """Stored profile ids, oldest first"""
+        return sorted(
+            name[:-len(".json")] for name in os.listdir(self.directory)
+            if name.endswith(".json")
+        )
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        """Newest first, without stacks"""
+        summaries = []
+        for profile_id in reversed(self._ids()):
+            profile = self.load(profile_id)
+            if profile is None:
+                continue
+            profile.pop("stacks")
+            summaries.append(profile)
+            if len(summaries) >= limit:
+                break
+        return summaries
+
+    def load(self, profile_id: str) -> Optional[Dict]:
+        # Ids are file names; refuse anything that could leave the directory
+        if not profile_id or os.path.basename(profile_id) != profile_id or profile_id.startswith("."):
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{profile_id}.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def collapsed(self, profiles: List[Dict]) -> str:
+        """Collapsed stacks summed over profiles, one "frames count" line each"""
+        stacks: Counter = Counter()
+        for profile in profiles:
+            stacks.update(profile["stacks"])
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def close(self) -> None:
+        """Stop the sampler thread; safe to call twice"""
+        with self._lock:
+            self._closed = True
+            self._active.clear()
+            self._wake.notify()
+        self._thread.join(timeout=1)
+
+    def stats(self) -> Dict:
+        return {
+            "slow_ms": self.slow_ms,
+            "sample_rate": self.sample_rate,
+            "active": len(self._active),
+            "captured": self.captured,
+            "kept": self.kept,
+            "skipped": self.skipped
+        }
@@ -0,0 +1,258 @@
+"""
+Reasoning Cache
+
+Responsibility:
+- Remember LLM reasoning for messages we have already classified
+- Serve hot entries from an in-process LRU tier (with TTL)
+- Share entries across workers and restarts via a SQLite tier, pruned
+  of expired entries and capped at max_entries like the memory tier
+- Never change what the reasoner would have returned
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+def normalize_message(message: str) -> str:
+    """Case- and whitespace-insensitive form of a message, used for cache keys"""
+    return " ".join(message.lower().split())
+
+
+class ReasoningCache:
+    def __init__(
+        self,
+        db_path: str = None,
+        max_entries: int = 1024,
+        ttl_seconds: float = 86400,
+        prune_every: int = 64
+    ):
+        self.name = "ReasoningCache"
+
+        if db_path is None:
+            db_path = os.path.join(
+                os.path.dirname(__file__),
+                "..",
+                "data",
+                "reasoning_cache.db"
+            )
+
+        self.db_path = os.path.abspath(db_path)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # SQLite inserts between two prunes of the SQLite tier
+        self.prune_every = prune_every
+        self._inserts = 0
+
+        # key -> (stored_at, reasoning)
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.sqlite_hits = 0
+
+        self._init_db()
+
+    def _init_db(self):
+        """Create table if it doesn't exist"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reasoning_cache (
+                    key TEXT PRIMARY KEY,
+                    reasoning TEXT,
+                    stored_at REAL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reasoning_cache_stored "
+                "ON reasoning_cache(stored_at)"
+            )
+            conn.commit()
+
+        # Whatever earlier runs left behind
+        self.prune()
+
+    @staticmethod
+    def key(message: str, prompt_version: str, model_name: str) -> str:
+        raw = "\x1f".join([normalize_message(message), prompt_version, model_name])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ----------------------------
+    # Lookup
+    # ----------------------------
+    def get(self, key: str) -> Optional[Tuple[Dict, str]]:
+        """
+        Return (reasoning, tier) on a hit, where tier is "memory" or "sqlite".
+        Return None on a miss.
+        """
+        reasoning = self._get_memory(key)
+        if reasoning is not None:
+            return self._hit(reasoning, "memory")
+
+        row = self._get_sqlite(key)
+        if row is not None:
+            reasoning, stored_at = row
+            self._set_memory(key, reasoning, stored_at)
+            return self._hit(reasoning, "sqlite")
+
+        return self._miss()
+
+    async def aget(self, key: str) -> Optional[Tuple[Dict, str]]:
+        """Like get(), but the SQLite tier is read on a worker thread"""
+        reasoning = self._get_memory(key)
+        if reasoning is not None:
+            return self._hit(reasoning, "memory")
+
+        row = await asyncio.to_thread(self._get_sqlite, key)
+        if row is not None:
+            reasoning, stored_at = row
+            self._set_memory(key, reasoning, stored_at)
+            return self._hit(reasoning, "sqlite")
+
+        return self._miss()
+
+    # ----------------------------
+    # Store
+    # ----------------------------
+    def set(self, key: str, reasoning: Dict) -> None:
+        self._set_memory(key, reasoning)
+        self._set_sqlite(key, reasoning)
+
+    async def aset(self, key: str, reasoning: Dict) -> None:
+        self._set_memory(key, reasoning)
+        await asyncio.to_thread(self._set_sqlite, key, reasoning)
+
+    def prune(self) -> int:
+        """
+        Delete expired entries from the SQLite tier, then the oldest
+        beyond max_entries. Returns the number of rows deleted.
+        """
+        try:
+            with sqlite3.connect(self.db_path, timeout=5) as conn:
+                expired = conn.execute(
+                    "DELETE FROM reasoning_cache WHERE stored_at < ?",
+                    (time.time() - self.ttl_seconds,)
+                ).rowcount
+                over = conn.execute(
+                    "DELETE FROM reasoning_cache WHERE key IN ("
+                    "SELECT key FROM reasoning_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+                conn.commit()
+        except sqlite3.Error:
+            return 0
+
+        return expired + over
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "sqlite_hits": self.sqlite_hits,
+            "memory_entries": len(self._entries)
+        }
+
+    # ----------------------------
+    # Internals
+    # ----------------------------
+    def _hit(self, reasoning: Dict, tier: str) -> Tuple[Dict, str]:
+        with self._lock:
+            self.hits += 1
+            if tier == "memory":
+                self.memory_hits += 1
+            else:
+                self.sqlite_hits += 1
+        return copy.deepcopy(reasoning), tier
+
+    def _miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    def _get_memory(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, reasoning = entry
+            if self._expired(stored_at):
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return reasoning
+
+    def _set_memory(self, key: str, reasoning: Dict, stored_at: float = None) -> None:
+        with self._lock:
+            self._entries[key] = (stored_at or time.time(), copy.deepcopy(reasoning))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_sqlite(self, key: str) -> Optional[Tuple[Dict, float]]:
+        try:
+            with sqlite3.connect(self.db_path, timeout=5) as conn:
+                row = conn.execute(
+                    "SELECT reasoning, stored_at FROM reasoning_cache WHERE key = ?",
+                    (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            # The cache must never fail a triage
+            return None
+
+        if row is None:
+            return None
+
+        reasoning, stored_at = row
+        if self._expired(stored_at):
+            self._delete_sqlite(key, stored_at)
+            return None
+
+        return json.loads(reasoning), stored_at
+
+    def _delete_sqlite(self, key: str, stored_at: float) -> None:
+        """Delete an expired entry, unless another worker has just rewritten it"""
+        try:
+            with sqlite3.connect(self.db_path, timeout=5) as conn:
+                conn.execute(
+                    "DELETE FROM reasoning_cache WHERE key = ? AND stored_at = ?",
+                    (key, stored_at)
+                )
+                conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def _set_sqlite(self, key: str, reasoning: Dict) -> None:
+        try:
+            with sqlite3.connect(self.db_path, timeout=5) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO reasoning_cache (key, reasoning, stored_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(reasoning), time.time())
+                )
+                conn.commit()
+        except sqlite3.Error:
+            return
+
+        with self._lock:
+            self._inserts += 1
+            due = self._inserts % self.prune_every == 0
+        if due:
+            self.prune()
@@ -0,0 +1,331 @@
+"""
+LLM Resilience
+
+Responsibility:
+- Put a deadline on every LLM call
+- Optionally hedge: send a second identical call once the first has
+  taken longer than the recent p95, and use whichever answers first
+- Stop calling a failing provider (circuit breaker) and probe it again
+  after a cool-down
+- Report breaker state, timeouts and hedges as metrics
+
+ResilientBackend wraps any LLMBackend. Calls it cannot complete raise
+LLMUnavailable; the reasoner then degrades to local classification.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+from backend.services import metrics
+from backend.services.llm import LLMBackend
+
+
+class LLMUnavailable(Exception):
+    """The LLM could not answer in time, failed, or is switched off by the breaker"""
+
+    reason = "error"
+
+
+class LLMTimeout(LLMUnavailable):
+    reason = "timeout"
+
+
+class CircuitOpen(LLMUnavailable):
+    reason = "circuit_open"
+
+
+# ======================================================
+# Circuit breaker
+# ======================================================
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Gauge values for triage_llm_circuit_state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. After
+    `reset_timeout` seconds one trial call is let through (half-open):
+    success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = "CircuitBreaker"
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+
+            # Half-open: a single trial call at a time
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """An admitted call ended without an outcome (e.g. the caller cancelled)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened_count += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class LatencyWindow:
+    """Durations of the most recent successful calls, for the hedge delay"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 20) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+# ======================================================
+# Backend wrapper
+# ======================================================
+
+class ResilientBackend(LLMBackend):
+    def __init__(
+        self,
+        backend: LLMBackend,
+        timeout: float = 20.0,
+        hedge: bool = False,
+        hedge_min_delay: float = 0.2,
+        breaker: Optional[CircuitBreaker] = None,
+        max_threads: int = 32
+    ):
+        self.name = "ResilientBackend"
+        self.backend = backend
+        self.mode = backend.mode
+        self.model_name = backend.model_name
+
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyWindow()
+
+        # Sync calls run here so the caller can stop waiting at the deadline
+        self._pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="llm-call")
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.rejected = 0
+
+        metrics.LLM_CIRCUIT_STATE.set_function(lambda: STATE_VALUES[self.breaker.state])
+
+    def warm_up(self) -> None:
+        self.backend.warm_up()
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Hedge once the call is slower than the recent p95 (None = don't hedge)"""
+        if not self.hedge or self.breaker.state != CLOSED:
+            return None
+        p95 = self.latency.percentile(95)
+        if p95 is None:
+            return None
+        delay = max(p95, self.hedge_min_delay)
+        return delay if delay < self.timeout else None
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            self.rejected += 1
+            metrics.LLM_FAILURES.labels(CircuitOpen.reason).inc()
+            raise CircuitOpen("LLM circuit breaker is open")
+        self.calls += 1
+
+    def _succeeded(self, started: float) -> None:
+        self.breaker.record_success()
+        self.latency.observe(time.monotonic() - started)
+
+    def _failed(self, error: Exception) -> LLMUnavailable:
+        self.breaker.record_failure()
+
+        if isinstance(error, LLMUnavailable):
+            failure = error
+        else:
+            failure = LLMUnavailable(f"LLM call failed: {error}")
+
+        if isinstance(failure, LLMTimeout):
+            self.timeouts += 1
+        else:
+            self.failures += 1
+        metrics.LLM_FAILURES.labels(failure.reason).inc()
+        return failure
+
+    def _hedge_sent(self) -> None:
+        self.hedges += 1
+        metrics.LLM_HEDGES.labels("sent").inc()
+
+    def _hedge_won(self) -> None:
+        self.hedge_wins += 1
+        metrics.LLM_HEDGES.labels("won").inc()
+
+    # ----------------------------
+    # Sync
+    # ----------------------------
+    def invoke(self, prompt: str):
+        self._admit()
+        started = time.monotonic()
+        try:
+            response = self._invoke_hedged(prompt, started + self.timeout)
+        except Exception as e:
+            raise self._failed(e) from e
+        self._succeeded(started)
+        return response
+
+    def _invoke_hedged(self, prompt: str, deadline: float):
+        primary = self._pool.submit(self.backend.invoke, prompt)
+        pending = {primary}
+        delay = self._hedge_delay()
+        hedge_at = None if delay is None else time.monotonic() + delay
+        error = None
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            until = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, pending = wait(pending, timeout=until - now, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._hedge_won()
+                    return future.result()
+                error = future.exception()
+
+            if hedge_at is not None and time.monotonic() >= hedge_at and pending:
+                hedge_at = None
+                self._hedge_sent()
+                pending.add(self._pool.submit(self.backend.invoke, prompt))
+
+        for future in pending:
+            future.cancel()
+
+        if pending or error is None:
+            raise LLMTimeout(f"LLM call exceeded {self.timeout}s")
+        raise error
+
+    # ----------------------------
+    # Async
+    # ----------------------------
+    async def ainvoke(self, prompt: str):
+        self._admit()
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(self._ainvoke_hedged(prompt), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise self._failed(LLMTimeout(f"LLM call exceeded {self.timeout}s")) from e
+        except asyncio.CancelledError:
+            # The caller went away; says nothing about the provider
+            self.breaker.release()
+            raise
+        except Exception as e:
+            raise self._failed(e) from e
+        self._succeeded(started)
+        return response
+
+    async def _ainvoke_hedged(self, prompt: str):
+        primary = asyncio.ensure_future(self.backend.ainvoke(prompt))
+        delay = self._hedge_delay()
+
+        if delay is None:
+            return await primary
+
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                self._hedge_sent()
+                pending.add(asyncio.ensure_future(self.backend.ainvoke(prompt)))
+
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._hedge_won()
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Whichever call lost (or everything, on timeout/cancel)
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict:
+        p95 = self.latency.percentile(95)
+        return {
+            "circuit_state": self.breaker.state,
+            "circuit_opened": self.breaker.opened_count,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedges / self.calls, 4) if self.calls else 0.0,
+            "p95_ms": round(p95 * 1000, 3) if p95 is not None else None
+        }
@@ -0,0 +1,27 @@
+"""
+Eligibility Rules
+
+Responsibility:
+- Load backend/rules/eligibility_rules.yaml
+- Give agents one place to read jurisdiction and domain rules from
+"""
+
+import os
+from typing import Dict
+
+import yaml
+
+
+RULES_PATH = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        "..",
+        "rules",
+        "eligibility_rules.yaml"
+    )
+)
+
+
+def load_rules(path: str = None) -> Dict:
+    with open(path or RULES_PATH, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
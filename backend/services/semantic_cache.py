@@ -0,0 +1,317 @@
+"""
+Semantic Cache
+
+Responsibility:
+- Find past reasoning results for near-duplicate messages
+- Embed messages locally (sentence-transformers) and search a FAISS index
+- Persist the index and its metadata under backend/data
+- Evict oldest entries once the configured capacity is reached
+
+Only embeddings and a past result's domain and confidence are stored,
+never message text or the explanation written for it. Each entry is
+tagged with the prompt version and model that produced it, and only
+matches lookups made under the same ones.
+
+Every worker process keeps its own index and catches up from the store
+on the entries it is missing, so workers sharing the data directory
+never lose each other's entries.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+# Optional and heavy (sentence-transformers pulls in torch): imported by
+# the first SemanticCache, not at module import, to keep cold starts fast
+faiss = None
+np = None
+SentenceTransformer = None
+
+
+def _import_dependencies() -> None:
+    global faiss, np, SentenceTransformer
+
+    if SentenceTransformer is not None:
+        return
+
+    try:
+        import faiss as _faiss
+        import numpy as _np
+        from sentence_transformers import SentenceTransformer as _SentenceTransformer
+    except ImportError:
+        raise RuntimeError(
+            "sentence-transformers and faiss-cpu are required for the semantic cache"
+        )
+
+    faiss, np, SentenceTransformer = _faiss, _np, _SentenceTransformer
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        data_dir: str = None,
+        model_name: str = "all-MiniLM-L6-v2",
+        threshold: float = 0.92,
+        max_entries: int = 50000,
+        save_every: int = 50,
+        neighbours: int = 8
+    ):
+        self.name = "SemanticCache"
+
+        _import_dependencies()
+
+        if data_dir is None:
+            data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+
+        data_dir = os.path.abspath(data_dir)
+        os.makedirs(data_dir, exist_ok=True)
+
+        self.index_path = os.path.join(data_dir, "semantic_cache.faiss")
+        self.db_path = os.path.join(data_dir, "semantic_cache.db")
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.save_every = save_every
+        # Nearest entries checked per search: the closest may belong to
+        # another prompt version or model
+        self.neighbours = neighbours
+
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        # Entry ids in self.index
+        self._indexed = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._init_db()
+        self._load_index()
+
+    def _init_db(self):
+        """Create tables if they don't exist"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    embedding BLOB,
+                    reasoning TEXT,
+                    created_at REAL,
+                    version TEXT,
+                    model TEXT
+                )
+            """)
+
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            if "version" not in columns:
+                # Entries from before version tagging hold whole results
+                # and can never match a lookup again: drop them
+                conn.execute("ALTER TABLE entries ADD COLUMN version TEXT")
+                conn.execute("ALTER TABLE entries ADD COLUMN model TEXT")
+                conn.execute("DELETE FROM entries")
+
+            # Replaced by per-entry catch-up (see _catch_up)
+            conn.execute("DROP TABLE IF EXISTS index_state")
+            conn.commit()
+
+    def _load_index(self) -> None:
+        """Load the saved index, then add the stored entries it is missing"""
+        if os.path.exists(self.index_path):
+            index = faiss.read_index(self.index_path)
+        else:
+            # Inner product over normalized vectors == cosine similarity
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.dim))
+
+        self.index = index
+        self._indexed = set(faiss.vector_to_array(index.id_map).tolist())
+        self._catch_up()
+
+    def _catch_up(self) -> None:
+        """
+        Bring self.index in line with the store: add entries written by
+        other workers (or after the index was last saved) and drop those
+        evicted by them. Entries carry their embedding, so this never
+        re-embeds text. Callers hold self._lock, or are __init__.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            stored = {row[0] for row in conn.execute("SELECT id FROM entries")}
+            missing = sorted(stored - self._indexed)
+
+            rows = []
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                rows.extend(conn.execute(
+                    f"SELECT id, embedding FROM entries WHERE id IN ({','.join('?' * len(batch))})",
+                    batch
+                ))
+
+        gone = self._indexed - stored
+        if gone:
+            self.index.remove_ids(np.array(sorted(gone), dtype="int64"))
+            self._indexed -= gone
+            self._unsaved += 1
+
+        if rows:
+            ids = np.array([entry_id for entry_id, _ in rows], dtype="int64")
+            vectors = np.vstack([
+                np.frombuffer(blob, dtype="float32") for _, blob in rows
+            ])
+            self.index.add_with_ids(vectors, ids)
+            self._indexed.update(ids.tolist())
+            self._unsaved += len(rows)
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def embed(self, message: str):
+        vector = self.model.encode(
+            [message],
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        return vector.astype("float32")
+
+    def search(self, vector, version: str, model: str) -> Optional[Tuple[Dict, float]]:
+        """
+        Return (reasoning, similarity) for the closest past message stored
+        under the same prompt version and model, if it is within the
+        threshold, otherwise None. reasoning has only domain and confidence.
+        """
+        candidates = []
+        with self._lock:
+            count = min(self.neighbours, self.index.ntotal)
+            if count:
+                scores, ids = self.index.search(vector, count)
+                # Closest first
+                candidates = [
+                    (int(entry_id), float(score))
+                    for entry_id, score in zip(ids[0], scores[0])
+                    if entry_id >= 0 and score >= self.threshold
+                ]
+
+        rows = {}
+        if candidates:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = {
+                    entry_id: (entry_version, entry_model, reasoning)
+                    for entry_id, entry_version, entry_model, reasoning in conn.execute(
+                        "SELECT id, version, model, reasoning FROM entries "
+                        f"WHERE id IN ({','.join('?' * len(candidates))})",
+                        [entry_id for entry_id, _ in candidates]
+                    )
+                }
+
+        match = None
+        for entry_id, similarity in candidates:
+            row = rows.get(entry_id)
+            if row is not None and row[0] == version and row[1] == model:
+                match = json.loads(row[2]), similarity
+                break
+
+        # Evicted, by this worker or another, since they were indexed
+        gone = [entry_id for entry_id, _ in candidates if entry_id not in rows]
+
+        with self._lock:
+            if gone:
+                self.index.remove_ids(np.array(gone, dtype="int64"))
+                self._indexed.difference_update(gone)
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return match
+
+    def add(self, vector, reasoning: Dict, version: str, model: str) -> None:
+        """Store a result's domain and confidence; its explanation is specific to one message"""
+        stored = {
+            "domain": reasoning.get("domain", "UNKNOWN"),
+            "confidence": reasoning.get("confidence", 0.0)
+        }
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                "INSERT INTO entries (embedding, reasoning, created_at, version, model) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (vector.tobytes(), json.dumps(stored), time.time(), version, model)
+            )
+            entry_id = cursor.lastrowid
+            conn.commit()
+
+        with self._lock:
+            # A catch-up may have indexed it already
+            if entry_id not in self._indexed:
+                self.index.add_with_ids(vector, np.array([entry_id], dtype="int64"))
+                self._indexed.add(entry_id)
+                self._unsaved += 1
+            excess = self.index.ntotal - self.max_entries
+            unsaved = self._unsaved
+
+        if excess > 0:
+            self.evict(excess)
+
+        if unsaved >= self.save_every:
+            self.save()
+
+    def evict(self, count: int) -> int:
+        """Drop the `count` oldest entries from the index and the store"""
+        with sqlite3.connect(self.db_path) as conn:
+            ids = [
+                row[0] for row in conn.execute(
+                    "SELECT id FROM entries ORDER BY id LIMIT ?",
+                    (count,)
+                )
+            ]
+            conn.executemany("DELETE FROM entries WHERE id = ?", [(i,) for i in ids])
+            conn.commit()
+
+        if ids:
+            with self._lock:
+                self.index.remove_ids(np.array(ids, dtype="int64"))
+                self._indexed.difference_update(ids)
+                self.evictions += len(ids)
+                self._unsaved += 1
+
+        return len(ids)
+
+    def evict_older_than(self, seconds: float) -> int:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE created_at < ?",
+                (time.time() - seconds,)
+            ).fetchone()
+        return self.evict(row[0]) if row[0] else 0
+
+    def save(self) -> None:
+        """
+        Catch up with the store, then write the index atomically. Workers
+        overwrite each other's file; whichever file is loaded, the next
+        catch-up adds what it lacks.
+        """
+        with self._lock:
+            self._catch_up()
+            if self._unsaved == 0:
+                return
+
+            # Per process, so two workers saving at once don't share a temp file
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            faiss.write_index(self.index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+            self._unsaved = 0
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": self.index.ntotal,
+            "threshold": self.threshold
+        }
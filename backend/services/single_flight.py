@@ -0,0 +1,112 @@
+"""
+Single Flight
+
+Responsibility:
+- Run at most one computation per key at a time
+- Hand its result (or exception) to every caller that asked meanwhile
+- Forget the key as soon as the computation finishes: this is not a cache
+- Cancel a shared computation only when every caller has gone away
+"""
+
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.name = "SingleFlight"
+
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+        # key -> (task, number of callers awaiting it); event loop only
+        self._tasks: Dict[str, Tuple[asyncio.Task, int]] = {}
+
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: str, fn: Callable[[], object]) -> Tuple[object, bool]:
+        """
+        Returns (result, shared). shared is False for the caller that ran
+        fn, True for callers that waited for it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """Async do(). fn runs as its own task, so one caller cancelling doesn't cancel the others."""
+        entry = self._tasks.get(key)
+        shared = entry is not None
+
+        if shared:
+            task, waiters = entry
+            self.followers += 1
+        else:
+            task, waiters = asyncio.ensure_future(fn()), 0
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.leaders += 1
+
+        self._tasks[key] = (task, waiters + 1)
+
+        cancelled = False
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            entry = self._tasks.get(key)
+            if entry is not None and entry[0] is task:
+                if entry[1] > 1:
+                    self._tasks[key] = (task, entry[1] - 1)
+                else:
+                    # Forgotten as it is cancelled, so a new caller starts
+                    # afresh instead of joining a cancelled computation
+                    del self._tasks[key]
+                    if cancelled and not task.done():
+                        task.cancel()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        entry = self._tasks.get(key)
+        # The key may already belong to a newer computation
+        if entry is not None and entry[0] is task:
+            del self._tasks[key]
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._calls) + len(self._tasks),
+            "leaders": self.leaders,
+            "followers": self.followers
+        }
@@ -8,8 +8,13 @@ Responsibility:
 - Return final, explainable output
 """
 
+import asyncio
+import copy
 import os
-from typing import Dict, List
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 from backend.agents.planner import PlannerAgent
 from backend.agents.validator import ValidatorAgent
@@ -17,122 +22,741 @@ from backend.agents.reasoner import ReasonerAgent
 from backend.agents.router import RouterAgent
 from backend.agents.memory import MemoryAgent
 from backend.agents.explainer import ExplainerAgent
-
+from backend.agents.intake import IntakeAgent
+from backend.services import metrics
+from backend.services.background import BackgroundRunner
+from backend.services.case_history import CaseHistory
+from backend.services.llm import build_backend
+from backend.services.profiler import SlowRequestProfiler
+from backend.services.reasoning_cache import ReasoningCache, normalize_message
+from backend.services.resilience import CircuitBreaker, ResilientBackend
+from backend.services.semantic_cache import SemanticCache
+from backend.services.single_flight import SingleFlight
+from backend.services.triage_state import TriageState
+
+
+# Eligible and confidently classified locally, so warm-up never needs the LLM
+WARM_UP_MESSAGE = "My landlord in London is refusing to return my tenancy deposit."
+
+
+class CoalescingReasoner:
+    """
+    Stands in for the reasoner in the agent registry. Concurrent requests
+    with the same normalized message share one reasoning computation (one
+    LLM call); each still gets its own state, response and audit record.
+    """
+
+    def __init__(self, reasoner: ReasonerAgent):
+        self.name = reasoner.name
+        self.reasoner = reasoner
+        self.flights = SingleFlight()
+
+    def run(self, state: TriageState) -> TriageState:
+        message = state.message
+        result, shared = self.flights.do(
+            normalize_message(message),
+            lambda: self.reasoner.reason(message)
+        )
+        return self.reasoner.with_reasoning(state, *self._share(result, shared))
+
+    async def arun(self, state: TriageState) -> TriageState:
+        message = state.message
+        result, shared = await self.flights.ado(
+            normalize_message(message),
+            lambda: self.reasoner.areason(message)
+        )
+        return self.reasoner.with_reasoning(state, *self._share(result, shared))
+
+    def _share(self, result: Tuple, shared: bool) -> Tuple:
+        reasoning, lookup = result
+        if not shared:
+            return reasoning, lookup
+
+        metrics.REASONING_COALESCED.inc()
+
+        lookup = {**lookup, "coalesced": True}
+        # The call was paid for once, by the request that made it
+        if "tokens" in lookup:
+            lookup["tokens"] = {"input": 0, "output": 0, "estimated": False}
+
+        # Later agents must not see each other's edits
+        return copy.deepcopy(reasoning), lookup
+
+    def stats(self) -> Dict:
+        return self.flights.stats()
 
 
 class TriageEngine:
     def __init__(self):
         # Feature flags
         use_llm_reasoner = os.getenv("USE_LLM_REASONER", "false").lower() == "true"
+        use_reasoning_cache = os.getenv("REASONING_CACHE_ENABLED", "true").lower() == "true"
+        use_semantic_cache = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+
+        # Max number of batch items reasoned over concurrently
+        self.batch_concurrency = int(os.getenv("TRIAGE_BATCH_CONCURRENCY", "8"))
+
+        # Caches only sit in front of the LLM
+        reasoning_cache = None
+        if use_llm_reasoner and use_reasoning_cache:
+            reasoning_cache = ReasoningCache(
+                max_entries=int(os.getenv("REASONING_CACHE_MAX_ENTRIES", "1024")),
+                ttl_seconds=float(os.getenv("REASONING_CACHE_TTL_SECONDS", "86400"))
+            )
+
+        semantic_cache = None
+        if use_llm_reasoner and use_semantic_cache:
+            semantic_cache = SemanticCache(
+                model_name=os.getenv("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2"),
+                threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+                max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "50000"))
+            )
+
+        # Deadlines, hedging and a circuit breaker around every LLM call
+        backend = None
+        if use_llm_reasoner:
+            backend = ResilientBackend(
+                build_backend(),
+                timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "20")),
+                hedge=os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true",
+                hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "200")) / 1000,
+                breaker=CircuitBreaker(
+                    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                    reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+                )
+            )
 
         # Initialize agents
-        self.planner = PlannerAgent()
+        self.planner = PlannerAgent(
+            defer_side_effects=os.getenv("TRIAGE_DEFER_SIDE_EFFECTS", "false").lower() == "true"
+        )
         self.validator = ValidatorAgent()
-        self.reasoner = ReasonerAgent(use_llm=use_llm_reasoner)
+        self.reasoner = ReasonerAgent(
+            use_llm=use_llm_reasoner,
+            cache=reasoning_cache,
+            semantic_cache=semantic_cache,
+            local_threshold=float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.8")),
+            backend=backend,
+            prompt_mode=os.getenv("REASONER_PROMPT_MODE", "full").lower(),
+            max_input_chars=int(os.getenv("REASONER_MAX_INPUT_CHARS", "4000")),
+            batch_window=float(os.getenv("REASONER_BATCH_WINDOW_MS", "0")) / 1000,
+            batch_max_size=int(os.getenv("REASONER_BATCH_MAX_SIZE", "16"))
+        )
         self.router = RouterAgent()
-        self.memory = MemoryAgent()
+        self.memory = MemoryAgent(
+            db_path=os.getenv("TRIAGE_DB_PATH") or None,
+            write_behind=os.getenv("MEMORY_WRITE_BEHIND", "false").lower() == "true",
+            max_queue=int(os.getenv("MEMORY_QUEUE_SIZE", "10000")),
+            flush_batch=int(os.getenv("MEMORY_FLUSH_BATCH", "200")),
+            flush_interval=float(os.getenv("MEMORY_FLUSH_INTERVAL_MS", "500")) / 1000
+        )
         self.explainer = ExplainerAgent()
-
+        self.intake = IntakeAgent(
+            self.validator,
+            self.reasoner,
+            chunk_chars=int(os.getenv("INTAKE_CHUNK_CHARS", "2000")),
+            concurrency=int(os.getenv("INTAKE_CONCURRENCY", "16")),
+            max_classified=int(os.getenv("INTAKE_MAX_CLASSIFIED_CHUNKS", "64")),
+            max_chunks=int(os.getenv("INTAKE_MAX_CHUNKS", "5000"))
+        )
+
+        # Read side of the case store
+        self.history = CaseHistory(
+            self.memory.db_path,
+            search_candidates=int(os.getenv("CASE_SEARCH_MAX_CANDIDATES", "5000"))
+        )
+
+        # Identical concurrent messages share one reasoning computation
+        self.coalescer = None
+        if os.getenv("TRIAGE_COALESCE_ENABLED", "true").lower() == "true":
+            self.coalescer = CoalescingReasoner(self.reasoner)
+
+        # Side-effect-only steps run here after the response is built.
+        # One worker by default: SQLite takes one writer at a time anyway
+        self.background = BackgroundRunner(
+            max_workers=int(os.getenv("TRIAGE_DEFERRED_WORKERS", "1")),
+            max_pending=int(os.getenv("TRIAGE_DEFERRED_MAX_PENDING", "1000"))
+        )
+
+        # Stack profiles of slow (or sampled) triages; off unless asked for
+        self.profiler = None
+        profile_slow_ms = float(os.getenv("PROFILE_SLOW_MS", "0"))
+        profile_sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        if profile_slow_ms > 0 or profile_sample_rate > 0:
+            max_profiles = int(os.getenv("PROFILE_MAX_STORED", "200"))
+            if max_profiles < 1:
+                raise ValueError(f"PROFILE_MAX_STORED must be at least 1, got {max_profiles}")
+            self.profiler = SlowRequestProfiler(
+                directory=os.getenv("PROFILE_DIR") or None,
+                slow_ms=profile_slow_ms,
+                sample_rate=profile_sample_rate,
+                interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "10")),
+                max_profiles=max_profiles
+            )
 
         # Agent registry
         self.agent_registry = {
             "validator": self.validator,
-            "reasoner": self.reasoner,
+            "reasoner": self.coalescer or self.reasoner,
             "router": self.router,
             "explainer": self.explainer,
             "memory": self.memory,
+            "intake": self.intake,
         }
 
     def run(self, message: str) -> Dict:
         """
         Execute the full triage workflow.
         """
-
+        with self._tracked("sync") as outcome:
+            state = self._execute(message)
+            outcome["timings"] = state.timings
+            try:
+                result = self._final_response(state)
+            finally:
+                self._defer(state)
+            outcome["status"] = result["status"]
+            return result
+
+    def _execute(self, message: str) -> TriageState:
         # Initial shared state
-        state: Dict = {
-            "message": message,
-            "explanation": [],
-            "steps": []
-        }
+        state = self._initial_state(message)
+
+        # 1️⃣ Planner decides execution graph
+        state = self._run_step("planner", self.planner, state)
+
+        # 2️⃣ Execute ready agents. Steps of a wave share one state, so
+        # here they run in turn; _asteps overlaps them on the event loop,
+        # where they only interleave at awaits
+        for wave in self._waves(state):
+            for step in wave:
+                self._run_step(step, self.agent_registry[step], state)
+
+        return state
+
+    async def arun(self, message: str) -> Dict:
+        """
+        Execute the full triage workflow without blocking the event loop.
+        Mirrors run() step for step, awaiting each agent's arun().
+        """
+        with self._tracked("async") as outcome:
+            state = await self._aexecute(message)
+            outcome["timings"] = state.timings
+            try:
+                result = self._final_response(state)
+            finally:
+                self._defer(state)
+            outcome["status"] = result["status"]
+            return result
+
+    async def arun_documents(self, message: str, documents: List) -> Dict:
+        """
+        Triage a message with attached documents. Each document is an
+        iterable or async iterable of text pieces and is read once, as
+        it streams in (see IntakeAgent).
+        """
+        with self._tracked("documents") as outcome:
+            state = await self._aexecute(message, documents=documents)
+            outcome["timings"] = state.timings
+            try:
+                result = self._final_response(state)
+            finally:
+                self._defer(state)
+
+            result["documents"] = state.intake_metadata["documents"]
+            result["chunks"] = state.intake_metadata["chunks"]
+            outcome["status"] = result["status"]
+            return result
+
+    async def arun_batch(self, messages: List[str]) -> List[Dict]:
+        """
+        Triage many messages with bounded concurrency.
 
-        # 1️⃣ Planner decides execution steps
-        state = self.planner.run(state)
-        plan = state.get("plan", [])
+        Reasoning for up to `batch_concurrency` messages is in flight at
+        once; every successful case is then persisted in a single
+        transaction. Results are returned in input order, one per message:
+        {"ok": True, "result": {...}} or {"ok": False, "error": "..."}.
+        """
+        limit = asyncio.Semaphore(self.batch_concurrency)
+
+        async def triage_one(message: str) -> Dict:
+            async with limit:
+                metrics.TRIAGE_IN_FLIGHT.inc()
+                try:
+                    with metrics.TRIAGE_DURATION.labels("batch").time():
+                        return await self._aexecute(message, persist=False)
+                finally:
+                    metrics.TRIAGE_IN_FLIGHT.dec()
+
+        outcomes = await asyncio.gather(
+            *(triage_one(message) for message in messages),
+            return_exceptions=True
+        )
+
+        # Bulk persistence (one connection, one commit)
+        to_persist = [
+            outcome for outcome in outcomes
+            if not isinstance(outcome, BaseException)
+            and "memory" in outcome.plan
+        ]
+
+        persist_error = None
+        if to_persist:
+            try:
+                await self.memory.arun_many(to_persist)
+            except Exception as e:
+                persist_error = e
+
+        results: List[Dict] = []
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                results.append({"ok": False, "error": str(outcome)})
+                continue
 
-        # 2️⃣ Execute planned agents in order
-        for step in plan:
-            agent = self.agent_registry.get(step)
-            if not agent:
+            if persist_error is not None and "memory" in outcome.plan:
+                results.append({"ok": False, "error": str(persist_error)})
                 continue
 
-            state = agent.run(state)
+            try:
+                results.append({"ok": True, "result": self._final_response(outcome)})
+            except Exception as e:
+                results.append({"ok": False, "error": str(e)})
 
-            # Early stop if validation fails
-            if step == "validator":
-                validation = state.get("validation", {})
-                if not validation.get("eligible"):
-                    if "memory" in plan:
-                        state = self.memory.run(state)
-                    return self._final_response(state)
+        for result in results:
+            status = result["result"]["status"] if result["ok"] else "ERROR"
+            metrics.TRIAGE_OUTCOMES.labels(status).inc()
 
-        # 3️⃣ Final response
-        return self._final_response(state)
+        return results
 
-    def _final_response(self, state: Dict) -> Dict:
+    async def astream(self, message: str) -> AsyncIterator[Tuple[str, Dict]]:
         """
-        Shape final API response.
-        Assumes ExplainerAgent has already produced user-facing output.
+        Execute the triage workflow, yielding (event, payload) as each
+        planned agent completes, then ("result", final response).
+        Deferred steps run after the result and send no event.
+
+        Closing the generator (e.g. the client disconnecting) cancels
+        whatever agent is in flight, including a pending LLM call.
+        """
+
+        with self._tracked("stream") as outcome:
+            state = self._initial_state(message)
+            outcome["timings"] = state.timings
+
+            state = await self._arun_step("planner", self.planner, state)
+            yield "plan", {"plan": state.plan}
+
+            async for step, state in self._asteps(state):
+                yield step, self._step_event(step, state)
+
+            # Scheduled before the last yield: the client may close the
+            # stream as soon as it has the result
+            try:
+                result = self._final_response(state)
+            finally:
+                self._defer(state)
+            outcome["status"] = result["status"]
+            yield "result", result
+
+    async def _aexecute(
+        self,
+        message: str,
+        persist: bool = True,
+        documents: Optional[List] = None
+    ) -> TriageState:
+        """
+        Run the planned agents and return the final shared state.
+        With persist=False the memory step is skipped so the caller
+        can store the case itself (see arun_batch).
+        """
+
+        state = self._initial_state(message, documents)
+
+        state = await self._arun_step("planner", self.planner, state)
+
+        async for _, state in self._asteps(state, persist):
+            pass
+
+        return state
+
+    async def _asteps(
+        self,
+        state: TriageState,
+        persist: bool = True
+    ) -> AsyncIterator[Tuple[str, TriageState]]:
+        """
+        Run the planned agents, yielding (step, state) as each one
+        finishes. Agents in the same wave run concurrently.
         """
+        exclude = () if persist else ("memory",)
 
-        validation = state.get("validation", {})
-        reasoning = state.get("reasoning")
+        for wave in self._waves(state, exclude):
+            if len(wave) == 1:
+                state = await self._arun_step(wave[0], self.agent_registry[wave[0]], state)
+                yield wave[0], state
+                continue
+
+            tasks = {
+                asyncio.ensure_future(self._arun_step(step, self.agent_registry[step], state)): step
+                for step in wave
+            }
+            pending = set(tasks)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                        yield tasks[task], state
+            finally:
+                # A failed agent or a closed stream stops the rest of the wave
+                for task in pending:
+                    task.cancel()
+
+    # ----------------------------
+    # Execution graph
+    # ----------------------------
+    def _waves(self, state: TriageState, exclude=()) -> Iterator[List[str]]:
+        """
+        Yield the planned steps in waves: every step in a wave has all of
+        its dependencies finished, so they can run side by side. The state
+        is checked between waves, so once the validator rejects a case
+        the nodes that require an eligible case are skipped (and count as
+        finished for the nodes after them). Deferred nodes are left to
+        _defer().
+        """
+        pending = [
+            node for node in state.graph
+            if not node["deferred"]
+            and node["agent"] not in exclude
+            and node["agent"] in self.agent_registry
+        ]
+        waiting = {node["agent"] for node in pending}
+
+        while pending:
+            ready = [
+                node for node in pending
+                if not any(dependency in waiting for dependency in node["after"])
+            ]
+            if not ready:
+                raise RuntimeError("Execution graph has a dependency cycle")
+
+            wave = [
+                node["agent"] for node in ready
+                if state.eligible or not node["requires_eligible"]
+            ]
+            if wave:
+                yield wave
+
+            pending = [node for node in pending if node not in ready]
+            waiting.difference_update(node["agent"] for node in ready)
+
+    def _defer(self, state: TriageState) -> None:
+        """Run the deferred nodes (e.g. memory) after the response is built"""
+        steps = [
+            node["agent"] for node in state.graph
+            if node["deferred"]
+            and node["agent"] in self.agent_registry
+            and (state.eligible or not node["requires_eligible"])
+        ]
+        if not steps:
+            return
+
+        # A full backlog makes the request pay for its own side effects
+        if not self.background.submit(",".join(steps), self._run_steps, steps, state):
+            self._run_steps(steps, state)
+
+    def _run_steps(self, steps: List[str], state: TriageState) -> None:
+        for step in steps:
+            self._run_step(step, self.agent_registry[step], state)
+
+    # ----------------------------
+    # Instrumentation
+    # ----------------------------
+    def _run_step(self, step: str, agent, state: TriageState) -> TriageState:
+        started = time.perf_counter()
+        state = agent.run(state)
+        return self._record_timing(step, state, started)
+
+    async def _arun_step(self, step: str, agent, state: TriageState) -> TriageState:
+        started = time.perf_counter()
+        state = await agent.arun(state)
+        return self._record_timing(step, state, started)
+
+    def _record_timing(self, step: str, state: TriageState, started: float) -> TriageState:
+        elapsed = time.perf_counter() - started
+        metrics.AGENT_DURATION.labels(step).observe(elapsed)
+        state.timings[step] = round(elapsed * 1000, 3)
+        return state
+
+    @contextmanager
+    def _tracked(self, path: str) -> Iterator[Dict]:
+        """
+        In-flight gauge, latency, outcome and (if enabled) profile for
+        one triage. The caller sets outcome["status"] once it has a
+        result, and outcome["timings"] to tag the profile with.
+        """
+        outcome = {"status": "ERROR", "timings": {}}
+        capture = self.profiler.start(path) if self.profiler is not None else None
+        metrics.TRIAGE_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            yield outcome
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome["status"] = "CANCELLED"
+            raise
+        finally:
+            metrics.TRIAGE_IN_FLIGHT.dec()
+            metrics.TRIAGE_DURATION.labels(path).observe(time.perf_counter() - started)
+            metrics.TRIAGE_OUTCOMES.labels(outcome["status"]).inc()
+            if capture is not None:
+                self._keep_profile(capture, outcome)
+
+    def _keep_profile(self, capture, outcome: Dict) -> None:
+        profile = self.profiler.stop(capture, outcome["status"], outcome["timings"])
+        if profile is None:
+            return
+        # Written off the request path; inline if the deferred queue is full
+        if not self.background.submit("profile", self.profiler.save, profile):
+            try:
+                self.profiler.save(profile)
+            except OSError:
+                # A profile is never worth failing the triage over
+                pass
+
+    def _step_event(self, step: str, state: TriageState) -> Dict:
+        """The part of the state a given step is responsible for."""
+        if step == "validator":
+            return {
+                "eligible": state.validation["eligible"],
+                "rejection_reason": state.validation.get("rejection_reason")
+            }
 
-        if not reasoning:
-            raise RuntimeError("Final response missing reasoning")
+        if step == "reasoner":
+            return {
+                "domain": state.reasoning["domain"],
+                "confidence": state.reasoning["confidence"],
+                "mode": state.reasoner_metadata["mode"],
+                "degraded": state.degraded
+            }
 
-        explanation_list = state.get("explanation")
-        steps = state.get("steps")
+        if step == "router":
+            return {"route": state.route}
 
-        if explanation_list is None or steps is None:
-            raise RuntimeError("Final response missing explainer input")
+        if step == "explainer":
+            return {
+                "explanation": state.explanation,
+                "steps": state.steps
+            }
 
-        if not isinstance(explanation_list, list):
-            raise RuntimeError("Explanation must be a list")
+        if step == "memory":
+            return {"status": state.memory_metadata["status"]}
 
-        explanation = " ".join(explanation_list)
+        return {}
 
-        if explanation is None or steps is None:
+    def warm_up(self) -> None:
+        """
+        Prime lazy resources before taking traffic: the LLM client's
+        connection, the embedding model, and one unpersisted, unmetered
+        pass through the pipeline (rules, patterns, SQLite pages).
+        """
+        if self.reasoner.backend is not None:
+            self.reasoner.backend.warm_up()
+
+        if self.reasoner.semantic_cache is not None:
+            self.reasoner.semantic_cache.embed(WARM_UP_MESSAGE)
+
+        state = self.planner.run(self._initial_state(WARM_UP_MESSAGE))
+        for wave in self._waves(state, exclude=("memory",)):
+            for step in wave:
+                self.agent_registry[step].run(state)
+
+    def close(self) -> None:
+        """Flush anything agents hold in memory; called on app shutdown."""
+        # Deferred steps may still be queueing records
+        self.background.close()
+        self.memory.close()
+
+        if self.profiler is not None:
+            self.profiler.close()
+
+        if self.reasoner.semantic_cache is not None:
+            self.reasoner.semantic_cache.save()
+
+    def stats(self) -> Dict:
+        """Operational counters for monitoring"""
+        stats = {"memory": self.memory.stats(), "deferred": self.background.stats()}
+
+        if self.reasoner.cache is not None:
+            stats["reasoning_cache"] = self.reasoner.cache.stats()
+        if self.reasoner.semantic_cache is not None:
+            stats["semantic_cache"] = self.reasoner.semantic_cache.stats()
+        if self.coalescer is not None:
+            stats["coalescing"] = self.coalescer.stats()
+        if isinstance(self.reasoner.backend, ResilientBackend):
+            stats["llm"] = self.reasoner.backend.stats()
+        if self.reasoner.batcher is not None:
+            stats["micro_batching"] = self.reasoner.batcher.stats()
+        if self.profiler is not None:
+            stats["profiler"] = self.profiler.stats()
+
+        return stats
+
+    def _initial_state(self, message: str, documents: Optional[List] = None) -> TriageState:
+        return TriageState(message=message, documents=documents or [])
+
+    def _final_response(self, state: TriageState) -> Dict:
+        """
+        Shape final API response.
+        Assumes ExplainerAgent has already produced user-facing output.
+        """
+        eligible = state.eligible
+        reasoning = state.reasoning
+
+        if reasoning is None:
+            if eligible:
+                raise RuntimeError("Final response missing reasoning")
+            # Rejected before reasoning ran
+            reasoning = {"domain": None, "confidence": 0.0}
+
+        if state.explainer_metadata is None:
             raise RuntimeError("Final response missing explainer output")
 
         confidence = reasoning.get("confidence")
         if confidence is None:
             raise RuntimeError("Final response missing confidence score")
 
-        # Rejected case
-        if not validation.get("eligible"):
-            return {
-                "status": "REJECTED",
-                "route": None,
-                "domain": reasoning.get("domain"),
-                "confidence": float(confidence),
-                "explanation": explanation,
-                "steps": steps,
-            }
-
-        # Accepted case
         return {
-            "status": "ACCEPTED",
-            "route": state.get("route"),
+            "status": "ACCEPTED" if eligible else "REJECTED",
+            "route": state.route if eligible else None,
             "domain": reasoning.get("domain"),
             "confidence": float(confidence),
-            "explanation": explanation,
-            "steps": steps,
+            "explanation": " ".join(state.explanation + state.notices),
+            "steps": state.steps,
+            # Local classification stood in for an unavailable LLM
+            "degraded": state.degraded,
         }
 
 
 
-_engine = TriageEngine()
+# ======================================================
+# Engine lifecycle
+# ======================================================
+# Built on first use (or by init_triage at startup), never at import:
+# importing this module must stay cheap and must not need an API key.
+
+_engine: Optional[TriageEngine] = None
+_engine_lock = threading.Lock()
+_readiness: Dict = {"state": "idle", "error": None, "warmed_up": False, "warm_up_error": None}
+
+
+def init_triage(warm_up: bool = False) -> TriageEngine:
+    """
+    Build the engine once, optionally warming it up, and mark it ready.
+    Concurrent callers wait for the same build. A failed warm-up is
+    reported but not fatal: the engine still serves requests.
+    """
+    global _engine
+
+    if _engine is not None:
+        return _engine
+
+    with _engine_lock:
+        if _engine is not None:
+            return _engine
+
+        _readiness.update(state="starting", error=None)
+        try:
+            engine = TriageEngine()
+        except Exception as e:
+            _readiness.update(state="failed", error=str(e))
+            raise
+
+        if warm_up:
+            try:
+                engine.warm_up()
+                _readiness["warmed_up"] = True
+            except Exception as e:
+                _readiness["warm_up_error"] = str(e)
+
+        _engine = engine
+        _readiness["state"] = "ready"
+        return engine
+
+
+def get_engine() -> TriageEngine:
+    if _engine is not None:
+        return _engine
+    return init_triage()
+
+
+async def aget_engine() -> TriageEngine:
+    """get_engine() without blocking the event loop during the first build"""
+    if _engine is not None:
+        return _engine
+    return await asyncio.to_thread(init_triage)
+
+
+def triage_readiness() -> Dict:
+    return {**_readiness, "ready": _readiness["state"] == "ready"}
 
 
 def run_triage(message: str) -> Dict:
-    return _engine.run(message)
+    return get_engine().run(message)
+
+
+async def arun_triage(message: str) -> Dict:
+    engine = await aget_engine()
+    return await engine.arun(message)
+
+
+async def arun_triage_documents(message: str, documents: List) -> Dict:
+    engine = await aget_engine()
+    return await engine.arun_documents(message, documents)
+
+
+async def arun_triage_batch(messages: List[str]) -> List[Dict]:
+    engine = await aget_engine()
+    return await engine.arun_batch(messages)
+
+
+async def astream_triage(message: str) -> AsyncIterator[Tuple[str, Dict]]:
+    engine = await aget_engine()
+    stream = engine.astream(message)
+    try:
+        async for event in stream:
+            yield event
+    finally:
+        # Propagate the caller's aclose() so in-flight agents are cancelled
+        await stream.aclose()
+
+
+def close_triage() -> None:
+    """Close the engine if it was ever built"""
+    global _engine
+
+    with _engine_lock:
+        if _engine is None:
+            return
+        _engine.close()
+        _engine = None
+        _readiness.update(state="idle", warmed_up=False, warm_up_error=None)
+
+
+def triage_stats() -> Dict:
+    return get_engine().stats()
+
+
+def list_cases(**filters) -> Dict:
+    return get_engine().history.list_cases(**filters)
+
+
+def case_aggregates(**filters) -> Dict:
+    return get_engine().history.aggregates(**filters)
+
+
+def search_cases(text: str, **filters) -> Dict:
+    return get_engine().history.search(text, **filters)
+
+
+def get_profiler() -> Optional[SlowRequestProfiler]:
+    """The engine's profiler, or None if profiling is off"""
+    return get_engine().profiler
@@ -0,0 +1,63 @@
+"""
+Triage State
+
+Responsibility:
+- Carry one case through the agent pipeline
+- Give every agent a fixed, typed place to write its output
+- Be updated in place: no copies between steps
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass(slots=True)
+class TriageState:
+    message: str
+
+    # Attachments, each an iterable (or async iterable) of text pieces;
+    # read once, by the intake agent
+    documents: List = field(default_factory=list)
+
+    # Planner: step names in order, and the dependency graph over them
+    plan: List[str] = field(default_factory=list)
+    graph: List[Dict] = field(default_factory=list)
+    planner_metadata: Optional[Dict] = None
+
+    # Validator
+    validation: Optional[Dict] = None
+
+    # Intake: documents and chunks read, chunk verdicts
+    intake_metadata: Optional[Dict] = None
+
+    # Reasoner
+    reasoning: Optional[Dict] = None
+    reasoner_metadata: Optional[Dict] = None
+
+    # Router
+    route: Optional[str] = None
+    routing_metadata: Optional[Dict] = None
+
+    # User-facing output; validator and router add to it, the explainer rewrites it
+    explanation: List[str] = field(default_factory=list)
+    steps: List[str] = field(default_factory=list)
+    explainer_metadata: Optional[Dict] = None
+
+    # Added after the explanation by agents that run alongside the explainer
+    notices: List[str] = field(default_factory=list)
+
+    # Memory
+    memory_metadata: Optional[Dict] = None
+
+    # step -> milliseconds
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def eligible(self) -> bool:
+        """False until the validator has accepted the case"""
+        return bool(self.validation and self.validation.get("eligible"))
+
+    @property
+    def degraded(self) -> bool:
+        """Local classification stood in for an unavailable LLM"""
+        return bool(self.reasoner_metadata and "degraded" in self.reasoner_metadata)
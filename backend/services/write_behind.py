@@ -0,0 +1,301 @@
+"""
+Write-Behind Writer
+
+Responsibility:
+- Take case records off the request path into a bounded queue
+- Flush them from one long-lived WAL-mode connection in batched transactions
+- Flush on batch size or on a timer, whichever comes first
+- Drain everything that was queued on shutdown
+- Never drop a record: a batch that cannot be flushed is retried on a
+  fresh connection, then spilled to a JSONL file next to the store,
+  which reimport_spilled() loads back once the store is writable
+- Expose queue depth and flush latency for monitoring
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from backend.services import metrics
+
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def spill_path(db_path: str) -> str:
+    """Where records that could not be written to db_path are appended"""
+    return f"{db_path}.unwritten.jsonl"
+
+
+def reimport_spilled(db_path: str, insert_sql: str) -> int:
+    """
+    Insert spilled records into the store in one transaction, then
+    delete the spill file; returns the number of records imported.
+
+    The file is renamed to <spill>.importing first, so records spilled
+    meanwhile start a new file. If the import fails, the renamed file is
+    kept and imported first on the next call.
+    """
+    path = spill_path(db_path)
+    claimed = f"{path}.importing"
+    if not os.path.exists(claimed):
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            return 0
+
+    records = []
+    with open(claimed, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(tuple(json.loads(line)))
+            except ValueError:
+                raise ValueError(f"{claimed}:{number} is not a case record; fix or remove it and retry")
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            conn.executemany(insert_sql, records)
+    finally:
+        conn.close()
+
+    os.remove(claimed)
+    return len(records)
+
+
+class WriteBehindWriter:
+    def __init__(
+        self,
+        db_path: str,
+        insert_sql: str,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        synchronous: str = "NORMAL"
+    ):
+        self.name = "WriteBehindWriter"
+        self.db_path = db_path
+        self.insert_sql = insert_sql
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Monitoring
+        self.flushes = 0
+        self.flushed_records = 0
+        self.failed_records = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.last_error = None
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="memory-write-behind",
+            daemon=True
+        )
+        self._thread.start()
+
+    # ----------------------------
+    # Producer side
+    # ----------------------------
+    def submit(self, record: Tuple, timeout: float = 1.0) -> bool:
+        """
+        Queue a record for the next flush.
+        Returns False if the writer is closed or stopped, or the queue
+        stayed full for `timeout` seconds; the caller should then write
+        it directly.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            # Checked and queued under close()'s lock, so no record can
+            # land behind _STOP
+            with self._lock:
+                if self._closed or not self._thread.is_alive():
+                    return False
+                try:
+                    self._queue.put_nowait(record)
+                    return True
+                except queue.Full:
+                    pass
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(0.005, remaining))
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Stop accepting records, flush everything queued, stop the thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        deadline = time.monotonic() + timeout
+        while self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    break
+        self._thread.join(max(deadline - time.monotonic(), 0))
+
+        if self._thread.is_alive():
+            logger.error(
+                "Write-behind writer still flushing after %.0f s; %d records queued",
+                timeout, self.queue_depth()
+            )
+            return
+
+        # The writer thread died early: whatever it left is written here
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._write_fallback(leftover)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self.queue_depth(),
+            "queue_capacity": self.max_queue,
+            "flushes": self.flushes,
+            "flushed_records": self.flushed_records,
+            "failed_records": self.failed_records,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            "last_error": self.last_error
+        }
+
+    # ----------------------------
+    # Writer thread
+    # ----------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL in WAL mode only fsyncs at checkpoints, not on every commit
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        return conn
+
+    def _run(self) -> None:
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            # submit() now refuses records and close() writes any queued ones
+            self.last_error = str(e)
+            logger.error("Write-behind writer could not open %s: %s", self.db_path, e)
+            return
+        stopping = False
+
+        try:
+            while not stopping:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+
+                if item is _STOP:
+                    break
+
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval
+
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                self._flush(conn, batch)
+        finally:
+            conn.close()
+
+    def _flush(self, conn: sqlite3.Connection, batch: List[Tuple], retries: int = 3) -> None:
+        started = time.perf_counter()
+
+        for attempt in range(retries):
+            try:
+                with conn:
+                    conn.executemany(self.insert_sql, batch)
+                break
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+                if attempt == retries - 1:
+                    self._write_fallback(batch)
+                    return
+                time.sleep(0.05 * (attempt + 1))
+
+        elapsed = time.perf_counter() - started
+        metrics.PERSIST_DURATION.labels("write_behind").observe(elapsed)
+
+        elapsed_ms = elapsed * 1000
+        self.flushes += 1
+        self.flushed_records += len(batch)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+
+    def _write_fallback(self, batch: List[Tuple]) -> None:
+        """
+        A batch the writer could not flush: one more try on a fresh
+        connection, then append it to <db>.unwritten.jsonl (see
+        reimport_spilled), so the audit trail keeps every case.
+        """
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                with conn:
+                    conn.executemany(self.insert_sql, batch)
+            finally:
+                conn.close()
+            self.flushed_records += len(batch)
+            return
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+
+        self.failed_records += len(batch)
+        spilled = spill_path(self.db_path)
+        try:
+            with open(spilled, "a", encoding="utf-8") as f:
+                for record in batch:
+                    f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.error(
+                "Lost %d case records: %s (spilling to %s failed: %s)",
+                len(batch), self.last_error, spilled, e
+            )
+            return
+        logger.error(
+            "Could not write %d case records: %s; saved to %s",
+            len(batch), self.last_error, spilled
+        )
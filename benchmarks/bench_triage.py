@@ -0,0 +1,441 @@
+"""
+Triage Benchmarks
+
+Responsibility:
+- Measure every agent and the full engine offline, against the stub LLM
+- Report throughput, p50/p99 latency and allocations per operation
+- Report what micro-batching LLM calls gains in throughput and costs in latency
+- Write results as JSON and compare them against a saved baseline
+
+Nothing here needs a Gemini key or network access. Cases are written to a
+temporary database, never to backend/data/triage.db.
+
+Usage:
+    python -m benchmarks.bench_triage
+    python -m benchmarks.bench_triage --iterations 500 --json baseline.json
+    python -m benchmarks.bench_triage --compare baseline.json --max-regression 20
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+# Mix of eligible, ambiguous and out-of-jurisdiction messages
+MESSAGES = [
+    "My landlord in London is refusing to return my deposit and won't fix the mould in the flat.",
+    "I was dismissed from my job in Manchester without notice after raising a grievance about pay.",
+    "My visa application was refused and I need help with an appeal, I live in Birmingham.",
+    "I'm being evicted from my council flat in Cardiff next week and have nowhere to go.",
+    "My employer has not paid my wages for two months and I work in Wales.",
+    "I need advice about my residence permit, I have been living in England for five years.",
+    "Something happened with my neighbour and I don't know what to do, I'm in the UK.",
+    "I have a dispute about a property I rent in California, United States.",
+    "My boss in India is withholding my salary and I want to know my options.",
+    "The council hasn't responded about repairs to my home and my children are getting ill.",
+]
+
+AGENT_ORDER = ["planner", "validator", "reasoner", "router", "explainer", "memory"]
+
+
+def corpus(size: int) -> List[str]:
+    """Distinct messages (so caches never hide the work) cycling through MESSAGES"""
+    return [f"{MESSAGES[i % len(MESSAGES)]} Reference {i}." for i in range(size)]
+
+
+# ======================================================
+# Measurement
+# ======================================================
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(name: str, latencies: List[float], wall: float, allocations: Optional[Dict] = None) -> Dict:
+    result = {
+        "benchmark": name,
+        "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+    }
+    if allocations:
+        result.update(allocations)
+    return result
+
+
+def measure_allocations(fn: Callable[[int], object], iterations: int) -> Dict:
+    """
+    Separate pass under tracemalloc (it slows everything down, so it is
+    kept out of the timed run). Reports the mean peak of memory allocated
+    during one operation and what stayed allocated afterwards.
+    """
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        peaks = []
+        for i in range(iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn(i)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "alloc_peak_kb_per_op": round(sum(peaks) / len(peaks) / 1024, 2) if peaks else 0.0,
+        "retained_kb_per_op": round((retained - baseline) / max(iterations, 1) / 1024, 3),
+    }
+
+
+def bench_sync(
+    name: str,
+    fn: Callable[[int], object],
+    iterations: int,
+    warmup: int,
+    alloc_iterations: int
+) -> Dict:
+    for i in range(warmup):
+        fn(i)
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(warmup + i)
+        latencies.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - started
+
+    allocations = None
+    if alloc_iterations:
+        offset = warmup + iterations
+        allocations = measure_allocations(lambda i: fn(offset + i), alloc_iterations)
+
+    return summarize(name, latencies, wall, allocations)
+
+
+def bench_async(
+    name: str,
+    fn: Callable[[int], object],
+    iterations: int,
+    concurrency: int
+) -> Dict:
+    """Closed loop: `concurrency` requests in flight until `iterations` complete"""
+
+    async def main() -> Dict:
+        limit = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+
+        async def one(i: int) -> None:
+            async with limit:
+                t0 = time.perf_counter()
+                await fn(i)
+                latencies.append(time.perf_counter() - t0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(iterations)))
+        wall = time.perf_counter() - started
+
+        result = summarize(name, latencies, wall)
+        result["concurrency"] = concurrency
+        return result
+
+    return asyncio.run(main())
+
+
+# ======================================================
+# Scenarios
+# ======================================================
+
+@contextmanager
+def environment(overrides: Dict[str, str]) -> Iterator[None]:
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def scenario_env(name: str, args: argparse.Namespace) -> Dict[str, str]:
+    env = {
+        "REASONING_CACHE_ENABLED": "false",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "MEMORY_WRITE_BEHIND": "false",
+    }
+
+    if name == "local":
+        env["USE_LLM_REASONER"] = "false"
+    elif name in ("stub", "batched"):
+        # Threshold above 1.0: every message goes to the (stub) LLM
+        env.update({
+            "USE_LLM_REASONER": "true",
+            "LLM_BACKEND": "stub",
+            "LOCAL_CLASSIFIER_THRESHOLD": "1.1",
+            "STUB_LLM_LATENCY_MS": str(args.latency_ms),
+            "STUB_LLM_JITTER_MS": str(args.jitter_ms),
+            "STUB_LLM_PER_MESSAGE_MS": str(args.per_message_ms),
+            "STUB_LLM_MAX_CONCURRENT": str(args.provider_concurrency),
+            "STUB_LLM_INVALID_RATE": str(args.invalid_rate),
+            "STUB_LLM_SEED": str(args.seed),
+            "REASONER_BATCH_WINDOW_MS": "0",
+        })
+        if name == "batched":
+            env.update({
+                "REASONER_BATCH_WINDOW_MS": str(args.batch_window_ms),
+                "REASONER_BATCH_MAX_SIZE": str(args.batch_max_size),
+            })
+    else:
+        raise ValueError(f"Unknown scenario: {name}")
+
+    return env
+
+
+def llm_calls(engine) -> int:
+    """Calls that reached the stub, beneath any resilience wrapper"""
+    backend = engine.reasoner.backend
+    backend = getattr(backend, "backend", backend)
+    return getattr(backend, "calls", 0)
+
+
+def agent_inputs(engine, messages: List[str]) -> Dict[str, List[Dict]]:
+    """
+    For each agent, the state it would receive in a real run, one per
+    message. Built up front (and copied per call) so the timed loop only
+    measures the agent itself.
+    """
+    inputs: Dict[str, List[Dict]] = {step: [] for step in AGENT_ORDER}
+
+    for message in messages:
+        state = engine._initial_state(message)
+        for step in AGENT_ORDER:
+            inputs[step].append(copy.deepcopy(state))
+            if step == "memory":
+                break
+            agent = engine.planner if step == "planner" else engine.agent_registry[step]
+            state = agent.run(state)
+
+    return inputs
+
+
+def run_scenario(name: str, args: argparse.Namespace) -> List[Dict]:
+    from backend.services.triage_engine import TriageEngine
+
+    with environment(scenario_env(name, args)):
+        engine = TriageEngine()
+
+    results: List[Dict] = []
+    total = args.warmup + args.iterations + args.alloc_iterations
+
+    try:
+        # Per-agent
+        if not args.skip_agents:
+            inputs = agent_inputs(engine, corpus(total))
+            for step in AGENT_ORDER:
+                agent = engine.planner if step == "planner" else engine.agent_registry[step]
+                states = [copy.deepcopy(s) for s in inputs[step]]
+                results.append(bench_sync(
+                    f"agent.{step}",
+                    lambda i, agent=agent, states=states: agent.run(states[i]),
+                    args.iterations,
+                    args.warmup,
+                    args.alloc_iterations
+                ))
+
+        # End to end
+        messages = corpus(max(total, args.iterations))
+
+        results.append(bench_sync(
+            "engine.run",
+            lambda i: engine.run(messages[i % len(messages)]),
+            args.iterations,
+            args.warmup,
+            args.alloc_iterations
+        ))
+        # Persistence deferred by one benchmark must not slow down the next
+        engine.background.wait_idle()
+
+        calls_before = llm_calls(engine)
+        arun = bench_async(
+            "engine.arun",
+            lambda i: engine.arun(messages[i % len(messages)]),
+            args.iterations,
+            args.concurrency
+        )
+        arun["llm_calls"] = llm_calls(engine) - calls_before
+        results.append(arun)
+        engine.background.wait_idle()
+
+        batch_size = args.concurrency
+        batches = max(args.iterations // batch_size, 1)
+        batch = bench_async(
+            "engine.arun_batch",
+            lambda i: engine.arun_batch(
+                [messages[(i * batch_size + j) % len(messages)] for j in range(batch_size)]
+            ),
+            batches,
+            1
+        )
+        # Report per-case throughput, latency stays per batch
+        batch["batch_size"] = batch_size
+        batch["cases_per_sec"] = round(batch["ops_per_sec"] * batch_size, 2)
+        results.append(batch)
+    finally:
+        engine.close()
+
+    for result in results:
+        result["scenario"] = name
+
+    return results
+
+
+# ======================================================
+# Reporting
+# ======================================================
+
+def print_table(results: List[Dict]) -> None:
+    header = f"{'scenario':<8} {'benchmark':<20} {'ops':>6} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'alloc KB/op':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        alloc = r.get("alloc_peak_kb_per_op")
+        print(
+            f"{r['scenario']:<8} {r['benchmark']:<20} {r['ops']:>6} {r['ops_per_sec']:>10.1f} "
+            f"{r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {alloc if alloc is not None else '-':>12}"
+        )
+
+
+def print_batching_summary(results: List[Dict]) -> None:
+    """Micro-batched vs one-call-per-request, for concurrent engine.arun"""
+    runs = {
+        r["scenario"]: r for r in results
+        if r["benchmark"] == "engine.arun" and r["scenario"] in ("stub", "batched")
+    }
+    if len(runs) < 2:
+        return
+
+    single, batched = runs["stub"], runs["batched"]
+    speedup = batched["ops_per_sec"] / single["ops_per_sec"] if single["ops_per_sec"] else 0.0
+
+    print()
+    print(f"Micro-batching (engine.arun, concurrency {batched['concurrency']}):")
+    print(f"  throughput  x{speedup:.2f} ({single['ops_per_sec']} -> {batched['ops_per_sec']} ops/s)")
+    print(f"  LLM calls   {single['llm_calls']} -> {batched['llm_calls']}")
+    print(f"  p50 latency {batched['p50_ms'] - single['p50_ms']:+.3f} ms")
+    print(f"  p99 latency {batched['p99_ms'] - single['p99_ms']:+.3f} ms")
+
+
+def compare(results: List[Dict], baseline_path: str, max_regression: float) -> List[str]:
+    """Regressions beyond max_regression percent in throughput or p99"""
+    with open(baseline_path) as f:
+        baseline = {
+            (r["scenario"], r["benchmark"]): r
+            for r in json.load(f)["results"]
+        }
+
+    regressions = []
+    for r in results:
+        before = baseline.get((r["scenario"], r["benchmark"]))
+        if before is None:
+            continue
+
+        name = f"{r['scenario']}/{r['benchmark']}"
+        if before["ops_per_sec"] and r["ops_per_sec"] < before["ops_per_sec"] * (1 - max_regression / 100):
+            regressions.append(f"{name}: ops/s {before['ops_per_sec']} -> {r['ops_per_sec']}")
+        if before["p99_ms"] and r["p99_ms"] > before["p99_ms"] * (1 + max_regression / 100):
+            regressions.append(f"{name}: p99 {before['p99_ms']}ms -> {r['p99_ms']}ms")
+
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline triage benchmarks (stub LLM)")
+    parser.add_argument("--scenarios", default="local,stub,batched",
+                        help="comma-separated: local, stub, batched")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--alloc-iterations", type=int, default=50, help="0 to skip allocation tracking")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--skip-agents", action="store_true", help="end-to-end benchmarks only")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub LLM mean latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="stub LLM latency std dev")
+    parser.add_argument("--per-message-ms", type=float, default=2.0,
+                        help="stub LLM latency added per message in the prompt")
+    parser.add_argument("--provider-concurrency", type=int, default=4,
+                        help="stub LLM calls served at once, modelling provider limits (0 = unlimited)")
+    parser.add_argument("--batch-window-ms", type=float, default=10.0, help="batched scenario window")
+    parser.add_argument("--batch-max-size", type=int, default=16, help="batched scenario max batch")
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="share of unparseable stub replies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from a previous --json run")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="percent; exit 1 beyond it")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="triage-bench-")
+    os.environ["TRIAGE_DB_PATH"] = os.path.join(workdir, "triage.db")
+
+    results: List[Dict] = []
+    try:
+        for name in args.scenarios.split(","):
+            results.extend(run_scenario(name.strip(), args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results)
+    print_batching_summary(results)
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        },
+        "results": results,
+    }
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
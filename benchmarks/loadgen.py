@@ -0,0 +1,448 @@
+"""
+HTTP Load Generator
+
+Responsibility:
+- Start the real app (backend.main) under uvicorn with the stub LLM, or
+  target a server that is already running
+- Replay a JSONL corpus of cases against it at open-loop Poisson arrival rates
+- Sweep the rate upward and find where the server saturates
+- Report throughput, latency percentiles and errors per step as JSON,
+  and compare them against a saved baseline
+
+Open loop: requests go out at their scheduled times whether or not
+earlier ones have returned, and latency is measured from the scheduled
+time. A stalled server therefore shows up as latency and errors instead
+of quietly lowering the offered load.
+
+Cases are written to a temporary database, never to backend/data/triage.db.
+
+Usage:
+    python -m benchmarks.loadgen --corpus requests.jsonl --rates 5,10,20,40 --json run.json
+    python -m benchmarks.loadgen --corpus requests.jsonl --workers 4 --env MEMORY_WRITE_BEHIND=true
+    python -m benchmarks.loadgen --url http://localhost:8000 --rates 10,20
+    python -m benchmarks.loadgen --corpus requests.jsonl --compare run.json --max-regression 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.bench_triage import corpus as builtin_corpus, percentile
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# The API rejects shorter messages with a 422; they would only add noise
+MIN_MESSAGE_CHARS = 10
+
+
+# ======================================================
+# Corpus
+# ======================================================
+
+def load_corpus(path: Optional[str], limit: int = 0) -> List[str]:
+    """Messages to replay, in file order; the built-in mix if no path is given"""
+    if path is None:
+        return builtin_corpus(limit or 200)
+
+    from backend.bulk import parse_case
+
+    messages: List[str] = []
+    skipped = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for raw in f:
+            if not raw.strip():
+                continue
+            try:
+                _, message = parse_case(raw)
+            except ValueError:
+                skipped += 1
+                continue
+            if len(message) < MIN_MESSAGE_CHARS:
+                skipped += 1
+                continue
+            messages.append(message)
+            if limit and len(messages) >= limit:
+                break
+
+    if skipped:
+        print(f"Skipped {skipped} unusable lines in {path}", file=sys.stderr)
+    if not messages:
+        raise ValueError(f"No usable cases in {path}")
+    return messages
+
+
+# ======================================================
+# Server
+# ======================================================
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_env(args: argparse.Namespace, workdir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "TRIAGE_DB_PATH": os.path.join(workdir, "triage.db"),
+        "REASONING_CACHE_ENABLED": "false",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        # Threshold above 1.0: every message goes to the (stub) LLM
+        "USE_LLM_REASONER": "true",
+        "LLM_BACKEND": "stub",
+        "LOCAL_CLASSIFIER_THRESHOLD": "1.1",
+        "STUB_LLM_LATENCY_MS": str(args.latency_ms),
+        "STUB_LLM_JITTER_MS": str(args.jitter_ms),
+        "STUB_LLM_MAX_CONCURRENT": str(args.provider_concurrency),
+        "STUB_LLM_SEED": str(args.seed),
+    })
+    for override in args.env:
+        key, _, value = override.partition("=")
+        env[key] = value
+    return env
+
+
+class Server:
+    """uvicorn running backend.main:app in a child process"""
+
+    def __init__(self, args: argparse.Namespace, workdir: str):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_path = os.path.join(workdir, "server.log")
+        self._log = open(self.log_path, "w")
+        self._process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "backend.main:app",
+                "--host", "127.0.0.1",
+                "--port", str(self.port),
+                "--workers", str(args.workers),
+                "--log-level", "warning",
+            ],
+            cwd=REPO_ROOT,
+            env=server_env(args, workdir),
+            stdout=self._log,
+            stderr=subprocess.STDOUT
+        )
+
+    def wait_ready(self, timeout: float) -> None:
+        """Until /ready answers 200 (every worker has built its engine, or one has)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"Server exited with {self._process.returncode}:\n{self.log_tail()}")
+            try:
+                if httpx.get(f"{self.url}/ready", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"Server not ready after {timeout}s:\n{self.log_tail()}")
+
+    def log_tail(self, lines: int = 20) -> str:
+        # The work directory, log included, is removed on exit
+        self._log.flush()
+        with open(self.log_path, "r", errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+
+    def stop(self) -> None:
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+        self._log.close()
+
+
+# ======================================================
+# Load
+# ======================================================
+
+async def run_step(
+    client: httpx.AsyncClient,
+    url: str,
+    messages: List[str],
+    offset: int,
+    rate: float,
+    duration: float,
+    rng: random.Random
+) -> Dict:
+    """Poisson arrivals at `rate` per second for `duration` seconds"""
+    loop = asyncio.get_running_loop()
+
+    arrivals: List[float] = []
+    at = rng.expovariate(rate)
+    while at < duration:
+        arrivals.append(at)
+        at += rng.expovariate(rate)
+
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    lags: List[float] = []
+    last_done = [0.0]
+
+    async def one(message: str, scheduled: float) -> None:
+        try:
+            response = await client.post(url, json={"message": message})
+            outcome = str(response.status_code)
+        except httpx.TimeoutException:
+            outcome = "timeout"
+        except httpx.HTTPError:
+            outcome = "connection_error"
+
+        done = loop.time()
+        last_done[0] = max(last_done[0], done)
+        outcomes[outcome] += 1
+        if outcome == "200":
+            latencies.append(done - scheduled)
+
+    start = loop.time() + 0.05
+    tasks = []
+    for i, at in enumerate(arrivals):
+        scheduled = start + at
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # How late the generator itself sent this one
+        lags.append(max(loop.time() - scheduled, 0.0))
+        message = messages[(offset + i) % len(messages)]
+        tasks.append(asyncio.create_task(one(message, scheduled)))
+
+    await asyncio.gather(*tasks)
+
+    sent = len(arrivals)
+    ok = outcomes.get("200", 0)
+    # Until the last response, so a backlog draining after the window counts against throughput
+    elapsed = max(last_done[0] - start, duration) if sent else duration
+
+    return {
+        "offered_rps": rate,
+        # Poisson: the arrivals actually drawn, which vary around `rate`
+        "arrival_rps": round(sent / duration, 2),
+        "duration_s": duration,
+        "sent": sent,
+        "ok": ok,
+        "throughput_rps": round(ok / elapsed, 2),
+        "error_rate": round((sent - ok) / sent, 4) if sent else 0.0,
+        "outcomes": dict(sorted(outcomes.items())),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0,
+        "generator_lag_p99_ms": round(percentile(lags, 99) * 1000, 1),
+    }
+
+
+def saturation_reasons(step: Dict, args: argparse.Namespace) -> List[str]:
+    reasons = []
+    if step["error_rate"] > args.max_error_rate:
+        reasons.append(f"error_rate {step['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    if step["p99_ms"] > args.slo_p99_ms:
+        reasons.append(f"p99 {step['p99_ms']}ms > {args.slo_p99_ms}ms")
+    if step["throughput_rps"] < 0.9 * step["arrival_rps"]:
+        reasons.append(f"throughput {step['throughput_rps']} < 90% of arrivals ({step['arrival_rps']})")
+    return reasons
+
+
+async def sweep(args: argparse.Namespace, base_url: str, messages: List[str]) -> List[Dict]:
+    rng = random.Random(args.seed)
+    url = base_url.rstrip("/") + args.endpoint
+    rates = [float(rate) for rate in args.rates.split(",")]
+
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    timeout = httpx.Timeout(args.timeout)
+
+    steps: List[Dict] = []
+    offset = 0
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        if args.warmup > 0:
+            await run_step(client, url, messages, offset, rates[0], args.warmup, rng)
+
+        for rate in rates:
+            step = await run_step(client, url, messages, offset, rate, args.duration, rng)
+            offset += step["sent"]
+
+            step["saturated"] = saturation_reasons(step, args)
+            if step["generator_lag_p99_ms"] > 50:
+                # Latencies are still measured from schedule, but the
+                # offered rate was not really reached
+                step["generator_saturated"] = True
+            steps.append(step)
+            print_step(step)
+
+            if step["saturated"] and not args.keep_going:
+                break
+            # Let queues drain so steps don't bleed into each other
+            await asyncio.sleep(args.cooldown)
+
+    return steps
+
+
+# ======================================================
+# Reporting
+# ======================================================
+
+def print_step(step: Dict) -> None:
+    errors = {k: v for k, v in step["outcomes"].items() if k != "200"}
+    state = "SATURATED " + "; ".join(step["saturated"]) if step["saturated"] else "ok"
+    print(
+        f"{step['offered_rps']:>8.1f} rps offered  {step['throughput_rps']:>8.1f} done  "
+        f"p50 {step['p50_ms']:>8.1f}  p90 {step['p90_ms']:>8.1f}  p99 {step['p99_ms']:>8.1f} ms  "
+        f"errors {step['error_rate']:>6.2%} {errors or ''}  {state}"
+    )
+
+
+def summarize(steps: List[Dict]) -> Dict:
+    healthy = [step for step in steps if not step["saturated"]]
+    saturated = next((step for step in steps if step["saturated"]), None)
+    return {
+        "max_healthy_rps": healthy[-1]["offered_rps"] if healthy else None,
+        "saturation_rps": saturated["offered_rps"] if saturated else None,
+        "saturation_reasons": saturated["saturated"] if saturated else [],
+        "peak_throughput_rps": max((step["throughput_rps"] for step in steps), default=0.0),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict, baseline_path: str, max_regression: float) -> List[str]:
+    """Regressions against a baseline report, matched by offered rate"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    before = {step["offered_rps"]: step for step in baseline["steps"]}
+    for step in report["steps"]:
+        old = before.get(step["offered_rps"])
+        if old is None:
+            continue
+        rate = f"{step['offered_rps']} rps"
+        if old["throughput_rps"] and step["throughput_rps"] < old["throughput_rps"] * (1 - max_regression / 100):
+            regressions.append(f"{rate}: throughput {old['throughput_rps']} -> {step['throughput_rps']}")
+        if old["p99_ms"] and step["p99_ms"] > old["p99_ms"] * (1 + max_regression / 100):
+            regressions.append(f"{rate}: p99 {old['p99_ms']}ms -> {step['p99_ms']}ms")
+        # Error rates are absolute: more than one point worse
+        if step["error_rate"] > old["error_rate"] + 0.01:
+            regressions.append(f"{rate}: error rate {old['error_rate']:.2%} -> {step['error_rate']:.2%}")
+
+    old_healthy = baseline["summary"]["max_healthy_rps"] or 0
+    new_healthy = report["summary"]["max_healthy_rps"] or 0
+    if new_healthy < old_healthy:
+        regressions.append(f"max healthy rate {old_healthy} -> {new_healthy} rps")
+
+    return regressions
+
+
+# ======================================================
+# Entry point
+# ======================================================
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Open-loop HTTP load sweeps against the triage API")
+    parser.add_argument("--corpus", help="JSONL of cases (message, or title/body); default: built-in mix")
+    parser.add_argument("--corpus-limit", type=int, default=0, help="use at most this many cases")
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--endpoint", default="/triage", help="POSTed {\"message\": ...}")
+    parser.add_argument("--rates", default="5,10,20,40,80", help="arrival rates to sweep, per second")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per step")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds at the first rate, not recorded")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="seconds between steps")
+    parser.add_argument("--keep-going", action="store_true", help="run every rate, even past saturation")
+    parser.add_argument("--connections", type=int, default=1000, help="client connection pool size")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request seconds")
+    parser.add_argument("--slo-p99-ms", type=float, default=2000.0, help="saturated above this p99")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="saturated above this share")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub LLM mean latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="stub LLM latency std dev")
+    parser.add_argument("--provider-concurrency", type=int, default=0,
+                        help="stub LLM calls in flight at once per worker, 0 = unlimited")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra server environment, e.g. ADMISSION_MAX_CONCURRENT=32")
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="report JSON from a previous --json run")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="percent; exit 1 beyond it")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    messages = load_corpus(args.corpus, args.corpus_limit)
+
+    workdir = tempfile.mkdtemp(prefix="triage-load-")
+    server = None
+    try:
+        if args.url:
+            base_url = args.url
+        else:
+            server = Server(args, workdir)
+            server.wait_ready(args.ready_timeout)
+            base_url = server.url
+        steps = asyncio.run(sweep(args, base_url, messages))
+    finally:
+        if server is not None:
+            server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus_cases": len(messages),
+            "args": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        },
+        "summary": summarize(steps),
+        "steps": steps,
+    }
+
+    summary = report["summary"]
+    print(
+        f"max healthy {summary['max_healthy_rps']} rps, saturates at {summary['saturation_rps']} rps, "
+        f"peak throughput {summary['peak_throughput_rps']} rps"
+    )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
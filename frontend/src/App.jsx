@@ -1,5 +1,5 @@
-import { useState } from "react";
-import { runTriage } from "./api";
+import { useEffect, useRef, useState } from "react";
+import { streamTriage } from "./api";
 
 import ChatInput from "./components/ChatInput";
 import DecisionCard from "./components/DecisionCard";
@@ -13,22 +13,48 @@ function App() {
   const [result, setResult] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [progress, setProgress] = useState([]);
+  const abortRef = useRef(null);
+
+  // Cancel any in-flight triage when the page goes away
+  useEffect(() => () => abortRef.current?.abort(), []);
 
   const handleSubmit = async () => {
+    abortRef.current?.abort();
+    const controller = new AbortController();
+    abortRef.current = controller;
+
     setLoading(true);
     setError(null);
     setResult(null);
+    setProgress([]);
 
     try {
-      const response = await runTriage(message);
+      const response = await streamTriage(message, {
+        signal: controller.signal,
+        onEvent: (step, data) => {
+          if (step !== "plan" && step !== "result") {
+            setProgress((previous) => [...previous, { step, data }]);
+          }
+        },
+      });
       setResult(response);
     } catch (err) {
-      setError(err.message || "Something went wrong");
+      if (err.name !== "AbortError") {
+        setError(err.message || "Something went wrong");
+      }
     } finally {
-      setLoading(false);
+      if (abortRef.current === controller) {
+        setLoading(false);
+      }
     }
   };
 
+  const handleCancel = () => {
+    abortRef.current?.abort();
+    setLoading(false);
+  };
+
   return (
     <div className="app-container">
       <h1>Agentic Case Triage AI</h1>
@@ -40,7 +66,7 @@ function App() {
         disabled={loading}
       />
 
-      {loading && <LoadingState />}
+      {loading && <LoadingState progress={progress} onCancel={handleCancel} />}
 
       {error && <div className="error-box">{error}</div>}
 
@@ -35,3 +35,76 @@ export async function runTriage(message) {
 
   return response.json();
 }
+
+/**
+ * Run case triage, receiving progress as each agent completes
+ * @param {string} message - user case description
+ * @param {Object} options
+ * @param {(event: string, data: Object) => void} options.onEvent - called per server event
+ * @param {AbortSignal} [options.signal] - abort to cancel the triage server-side
+ * @returns {Promise<Object>} triage result (same shape as runTriage)
+ */
+export async function streamTriage(message, { onEvent, signal } = {}) {
+  if (!message || message.trim().length < 10) {
+    throw new Error("Message must be at least 10 characters long.");
+  }
+
+  const response = await fetch(`${API_BASE_URL}/triage/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify({ message }),
+    signal,
+  });
+
+  if (!response.ok) {
+    const errorText = await response.text();
+    throw new Error(
+      `Triage request failed (${response.status}): ${errorText}`
+    );
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    // Server-sent events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of raw.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+
+      const payload = data ? JSON.parse(data) : {};
+
+      if (event === "error") {
+        throw new Error(payload.detail || "Triage failed");
+      }
+      if (event === "result") {
+        result = payload;
+      }
+      if (onEvent) onEvent(event, payload);
+    }
+  }
+
+  if (!result) {
+    throw new Error("Triage stream ended without a result");
+  }
+
+  return result;
+}
@@ -1,12 +1,44 @@
-function LoadingState() {
+const STEP_LABELS = {
+  validator: "Checking eligibility",
+  reasoner: "Identifying the legal area",
+  router: "Choosing the right service",
+  explainer: "Preparing your explanation",
+  memory: "Saving your case",
+};
+
+function describe(step, data) {
+  if (step === "validator") {
+    return data.eligible ? "Eligible for triage" : "Not eligible";
+  }
+  if (step === "reasoner" && data.domain) {
+    return `${data.domain.toLowerCase()} (${Math.round((data.confidence || 0) * 100)}%)`;
+  }
+  if (step === "router") {
+    return data.route || "Not routed";
+  }
+  return "Done";
+}
+
+function LoadingState({ progress = [], onCancel }) {
     return (
       <div className="loading-state">
         <div className="spinner" />
         <p>Analysing your case…</p>
+
+        {progress.length > 0 && (
+          <ul className="progress-list">
+            {progress.map(({ step, data }) => (
+              <li key={step}>
+                {STEP_LABELS[step] || step}: {describe(step, data)}
+              </li>
+            ))}
+          </ul>
+        )}
+
+        {onCancel && <button onClick={onCancel}>Cancel</button>}
       </div>
     );
   }
   
   export default LoadingState;
   
-  
\ No newline at end of file
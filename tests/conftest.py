@@ -0,0 +1,56 @@
+"""
+Shared fixtures: every engine runs on a temporary store with the stub
+LLM, so the suite needs no API key, network or model download.
+"""
+
+import pytest
+
+from backend.services.triage_engine import TriageEngine
+
+
+ACCEPTED_MESSAGE = "My landlord in London is evicting me and refuses to return my deposit."
+REJECTED_MESSAGE = "My landlord in Toronto, Canada is evicting me and keeps my deposit."
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return str(tmp_path / "triage.db")
+
+
+@pytest.fixture
+def engine_env(monkeypatch, db_path):
+    """Environment for a local, deterministic engine; tests may override keys"""
+    env = {
+        "TRIAGE_DB_PATH": db_path,
+        "REASONING_CACHE_ENABLED": "false",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "USE_LLM_REASONER": "false",
+        "LLM_BACKEND": "stub",
+        "STUB_LLM_LATENCY_MS": "1",
+        "STUB_LLM_JITTER_MS": "0",
+        "TRIAGE_DEFER_SIDE_EFFECTS": "false",
+        "MEMORY_WRITE_BEHIND": "false",
+        "PROFILE_SLOW_MS": "0",
+        "PROFILE_SAMPLE_RATE": "0",
+    }
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    return monkeypatch
+
+
+@pytest.fixture
+def make_engine(engine_env):
+    """Build engines with extra env overrides; closes them afterwards"""
+    engines = []
+
+    def build(**overrides) -> TriageEngine:
+        for key, value in overrides.items():
+            engine_env.setenv(key, str(value))
+        engine = TriageEngine()
+        engines.append(engine)
+        return engine
+
+    yield build
+
+    for engine in engines:
+        engine.close()
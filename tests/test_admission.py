@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from backend.services.admission import AdmissionController, AdmissionRejected
+
+
+def test_excess_requests_queue_then_run_in_order():
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout=1.0)
+        first = await admission.admit()
+
+        second = asyncio.ensure_future(admission.admit())
+        third = asyncio.ensure_future(admission.admit())
+        await asyncio.sleep(0.01)
+        assert not second.done() and not third.done()
+
+        first.release()
+        slot = await asyncio.wait_for(second, timeout=1)
+        assert not third.done()
+
+        slot.release()
+        (await asyncio.wait_for(third, timeout=1)).release()
+        assert admission.stats()["queued"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_sheds_with_503():
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1.0)
+        running = await admission.admit()
+        waiting = asyncio.ensure_future(admission.admit())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.admit()
+        assert (rejected.value.status_code, rejected.value.reason) == (503, "queue_full")
+        assert rejected.value.retry_after >= 1
+
+        running.release()
+        (await waiting).release()
+
+    asyncio.run(scenario())
+
+
+def test_queue_deadline_sheds_with_503():
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.02)
+        running = await admission.admit()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.admit()
+        assert rejected.value.reason == "queue_timeout"
+
+        running.release()
+        # The abandoned place in the queue doesn't hold up the next request
+        (await asyncio.wait_for(admission.admit(), timeout=1)).release()
+
+    asyncio.run(scenario())
+
+
+def test_client_over_quota_gets_429():
+    async def scenario():
+        admission = AdmissionController(client_rate=0.001, client_burst=2)
+        for _ in range(2):
+            (await admission.admit("10.0.0.1")).release()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.admit("10.0.0.1")
+        assert (rejected.value.status_code, rejected.value.reason) == (429, "client_quota")
+
+        # Other clients keep their own quota
+        (await admission.admit("10.0.0.2")).release()
+
+    asyncio.run(scenario())
@@ -0,0 +1,55 @@
+import sqlite3
+from datetime import datetime
+
+from backend.agents.memory import MemoryAgent
+from backend.services.case_archive import CaseArchive, CaseArchiver
+
+
+NOW = datetime(2024, 8, 15)
+
+
+def _store(db_path: str, dates) -> None:
+    MemoryAgent(db_path=db_path).close()
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO cases (message, domain, eligible, route, confidence, reasoning_mode, created_at) "
+            "VALUES ('Landlord kept my deposit', 'HOUSING', 1, 'housing_team', 0.9, 'local', ?)",
+            [(date,) for date in dates]
+        )
+
+
+def test_partitions_skip_empty_months(db_path):
+    _store(db_path, ["2023-11-02T09:00:00", "2023-11-30T23:59:59", "2024-02-10T12:00:00", "2024-08-01T00:00:00"])
+
+    partitions = CaseArchiver(db_path, keep_months=3).partitions(NOW)
+
+    assert partitions == [
+        {"month": "2023-11", "cases": 2, "closed": True},
+        {"month": "2024-02", "cases": 1, "closed": True},
+        {"month": "2024-08", "cases": 1, "closed": False},
+    ]
+
+
+def test_month_lookups_use_the_created_at_index(db_path):
+    _store(db_path, [])
+    with sqlite3.connect(db_path) as conn:
+        plans = [
+            " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", ("2024-01",)))
+            for query in (
+                "SELECT MIN(created_at) FROM cases WHERE created_at >= ?",
+                "SELECT COUNT(*) FROM cases WHERE created_at >= ? AND created_at < '2024-02'",
+            )
+        ]
+
+    assert all("SEARCH cases USING COVERING INDEX idx_cases_created" in plan for plan in plans)
+
+
+def test_archive_exports_and_prunes_closed_months(db_path, tmp_path):
+    _store(db_path, ["2023-11-02T09:00:00", "2024-02-10T12:00:00", "2024-08-01T00:00:00"])
+    archiver = CaseArchiver(db_path, archive_dir=str(tmp_path / "archive"), keep_months=3, file_format="jsonl.gz")
+
+    archived = archiver.archive(NOW)
+
+    assert [(entry["month"], entry["pruned"]) for entry in archived] == [("2023-11", 1), ("2024-02", 1)]
+    assert [partition["month"] for partition in archiver.partitions(NOW)] == ["2024-08"]
+    assert CaseArchive(str(tmp_path / "archive")).count() == [{"domain": "HOUSING", "cases": 2}]
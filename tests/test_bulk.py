@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from backend import bulk
+from backend.services.triage_engine import TriageEngine
+from tests.conftest import ACCEPTED_MESSAGE, REJECTED_MESSAGE
+
+
+@pytest.fixture
+def cases(tmp_path):
+    path = tmp_path / "cases.jsonl"
+    lines = [json.dumps({"id": i, "message": f"{ACCEPTED_MESSAGE} ({i})"}) for i in range(1, 7)]
+    lines[2] = json.dumps({"request_id": "r3", "title": "Abroad", "body": REJECTED_MESSAGE})
+    lines[4] = "not json"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def triaged(monkeypatch):
+    """Messages the engine was asked to triage"""
+    seen = []
+    arun = TriageEngine.arun
+
+    async def counting(self, message):
+        seen.append(message)
+        return await arun(self, message)
+
+    monkeypatch.setattr(TriageEngine, "arun", counting)
+    return seen
+
+
+def _results(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_every_line_gets_one_result(engine_env, cases, tmp_path, triaged):
+    output = str(tmp_path / "out.jsonl")
+
+    assert bulk.main([cases, "-o", output, "--checkpoint-every", "1"]) == 0
+
+    results = sorted(_results(output), key=lambda result: result["line"])
+    assert [result["line"] for result in results] == [1, 2, 3, 4, 5, 6]
+    assert results[2]["id"] == "r3"
+    assert results[2]["result"]["status"] == "REJECTED"
+    assert results[4]["ok"] is False
+    assert len(triaged) == 5
+
+
+def test_resume_after_crash_redoes_nothing_in_the_output(engine_env, cases, tmp_path, triaged):
+    output = str(tmp_path / "out.jsonl")
+    bulk.main([cases, "-o", output, "--checkpoint-every", "1"])
+
+    with open(output, "rb") as f:
+        lines = f.readlines()
+    lines.sort(key=lambda raw: json.loads(raw)["line"])
+
+    # Crash: the checkpoint covers lines 1-2, lines 3-4 made it into the
+    # output after it, and line 6 was cut off mid-write
+    with open(output, "wb") as f:
+        f.writelines(lines[:4])
+        f.write(lines[5][:10])
+    checkpoint = bulk.Checkpoint(f"{output}.checkpoint", cases)
+    checkpoint.mark_done(1)
+    checkpoint.mark_done(2)
+    checkpoint.save(len(lines[0]) + len(lines[1]))
+
+    triaged.clear()
+    assert bulk.main([cases, "-o", output, "--checkpoint-every", "1"]) == 0
+
+    results = _results(output)
+    assert sorted(result["line"] for result in results) == [1, 2, 3, 4, 5, 6]
+    # Only the lost case was triaged again; line 5 is unparseable
+    assert triaged == [f"{ACCEPTED_MESSAGE} (6)"]
+
+
+def test_engine_failures_are_retried_by_the_next_run(engine_env, cases, tmp_path, monkeypatch):
+    output = str(tmp_path / "out.jsonl")
+    arun = TriageEngine.arun
+
+    async def provider_down(self, message):
+        if message.endswith("(2)"):
+            raise RuntimeError("LLM provider unavailable")
+        return await arun(self, message)
+
+    monkeypatch.setattr(TriageEngine, "arun", provider_down)
+    bulk.main([cases, "-o", output, "--checkpoint-every", "1"])
+    failed = [result for result in _results(output) if result["line"] == 2]
+    assert failed == [{"line": 2, "id": 2, "ok": False, "error": "LLM provider unavailable", "retryable": True}]
+
+    monkeypatch.setattr(TriageEngine, "arun", arun)
+    assert bulk.main([cases, "-o", output, "--checkpoint-every", "1"]) == 0
+
+    results = _results(output)
+    # Appended: the last result for a line counts
+    assert [result["ok"] for result in results if result["line"] == 2] == [False, True]
+    # The unparseable line 5 is not retried, and the checkpoint has nothing left to retry
+    assert [result["line"] for result in results if result["line"] == 5] == [5]
+    checkpoint = bulk.Checkpoint(f"{output}.checkpoint", cases)
+    checkpoint.load()
+    assert checkpoint.failed == set()
+    assert checkpoint.watermark == 7
+
+
+def test_checkpoint_for_another_input_is_refused(engine_env, cases, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    bulk.Checkpoint(f"{output}.checkpoint", str(tmp_path / "other.jsonl")).save(0)
+
+    with pytest.raises(RuntimeError):
+        bulk.main([cases, "-o", output])
@@ -0,0 +1,63 @@
+import asyncio
+import sqlite3
+
+from tests.conftest import ACCEPTED_MESSAGE, REJECTED_MESSAGE
+
+
+def _stored(db_path: str):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT domain, eligible, route FROM cases").fetchall()
+
+
+def test_accepted_case_is_routed_and_stored(make_engine, db_path):
+    engine = make_engine()
+
+    result = engine.run(ACCEPTED_MESSAGE)
+
+    assert result["status"] == "ACCEPTED"
+    assert result["route"]
+    assert result["degraded"] is False
+    assert _stored(db_path) == [("HOUSING", 1, result["route"])]
+
+
+def test_rejected_case_skips_reasoning(make_engine, db_path):
+    engine = make_engine()
+
+    result = engine.run(REJECTED_MESSAGE)
+
+    assert result["status"] == "REJECTED"
+    assert result["route"] is None
+    assert [eligible for _, eligible, _ in _stored(db_path)] == [0]
+
+
+def test_async_path_matches_sync(make_engine):
+    engine = make_engine()
+
+    sync = engine.run(ACCEPTED_MESSAGE)
+    result = asyncio.run(engine.arun(ACCEPTED_MESSAGE))
+
+    assert (result["status"], result["route"]) == (sync["status"], sync["route"])
+
+
+def test_llm_timeout_degrades_to_local_classification(make_engine):
+    engine = make_engine(
+        USE_LLM_REASONER="true",
+        # Every message goes to the LLM, which answers after the deadline
+        LOCAL_CLASSIFIER_THRESHOLD="1.1",
+        STUB_LLM_LATENCY_MS="2000",
+        LLM_TIMEOUT_SECONDS="0.05"
+    )
+
+    result = asyncio.run(engine.arun(ACCEPTED_MESSAGE))
+
+    assert result["degraded"] is True
+    assert result["status"] == "ACCEPTED"
+
+
+def test_stub_llm_answers_when_local_classifier_is_unsure(make_engine):
+    engine = make_engine(USE_LLM_REASONER="true", LOCAL_CLASSIFIER_THRESHOLD="1.1")
+
+    result = asyncio.run(engine.arun(ACCEPTED_MESSAGE))
+
+    assert result["degraded"] is False
+    assert result["status"] == "ACCEPTED"
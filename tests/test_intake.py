@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from backend.services.chunker import DocumentTooLarge
+from tests.conftest import ACCEPTED_MESSAGE
+
+
+PARAGRAPH = "The landlord in London served an eviction notice and kept the deposit. " * 20 + "\n\n"
+
+
+def _document(paragraphs: int):
+    for _ in range(paragraphs):
+        yield PARAGRAPH
+
+
+@pytest.fixture
+def llm_engine(make_engine):
+    engine = make_engine(
+        USE_LLM_REASONER="true",
+        LOCAL_CLASSIFIER_THRESHOLD="1.1",
+        INTAKE_MAX_CLASSIFIED_CHUNKS="4",
+        INTAKE_MAX_CHUNKS="200"
+    )
+    engine.llm_calls = 0
+    ainvoke = engine.reasoner.backend.ainvoke
+
+    async def counting(prompt):
+        engine.llm_calls += 1
+        return await ainvoke(prompt)
+
+    engine.reasoner.backend.ainvoke = counting
+    return engine
+
+
+def test_only_the_chunk_budget_reaches_the_llm(llm_engine):
+    result = asyncio.run(llm_engine.arun_documents(ACCEPTED_MESSAGE, [_document(50), _document(50)]))
+
+    assert result["status"] == "ACCEPTED"
+    assert result["chunks"] == 101
+    assert llm_engine.llm_calls == 4
+
+
+def test_case_over_chunk_cap_is_refused(llm_engine):
+    with pytest.raises(DocumentTooLarge):
+        asyncio.run(llm_engine.arun_documents(ACCEPTED_MESSAGE, [_document(300)]))
+    assert llm_engine.llm_calls == 0
+
+
+def test_failed_document_stops_the_other_readers(llm_engine):
+    async def broken():
+        yield PARAGRAPH
+        await asyncio.sleep(0.01)
+        raise DocumentTooLarge("upload over the size limit")
+
+    async def slow():
+        for _ in range(100):
+            yield PARAGRAPH
+            await asyncio.sleep(0.001)
+
+    async def scenario():
+        with pytest.raises(DocumentTooLarge):
+            await llm_engine.arun_documents(ACCEPTED_MESSAGE, [broken(), slow()])
+        await asyncio.sleep(0.2)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(scenario()) == []
+    assert llm_engine.llm_calls == 0
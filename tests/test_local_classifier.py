@@ -0,0 +1,40 @@
+import pytest
+
+from backend.services.local_classifier import LocalClassifier
+
+
+THRESHOLD = 0.8
+
+
+@pytest.fixture(scope="module")
+def classifier() -> LocalClassifier:
+    return LocalClassifier()
+
+
+@pytest.mark.parametrize("message", [
+    "I am working on a rental car complaint as a jobseeker.",
+    "The claim was dismissed and the clause is redundant.",
+    "The boiler doesn't work and the rental company is slow.",
+])
+def test_near_miss_words_do_not_classify(classifier, message):
+    assert classifier.classify(message)["domain"] == "UNKNOWN"
+
+
+def test_inflections_count_as_one_keyword(classifier):
+    once = classifier.classify("They evicted me.")
+    twice = classifier.classify("They evicted me after the eviction notice.")
+
+    assert once["domain"] == twice["domain"] == "HOUSING"
+    assert once["confidence"] == twice["confidence"] < THRESHOLD
+
+
+@pytest.mark.parametrize("message, domain", [
+    ("My landlord is evicting me and keeps my deposit.", "HOUSING"),
+    ("My employer dismissed me and withheld my wages.", "EMPLOYMENT"),
+    ("The Home Office refused my visa and I face deportation.", "IMMIGRATION"),
+])
+def test_listed_forms_classify(classifier, message, domain):
+    reasoning = classifier.classify(message)
+
+    assert reasoning["domain"] == domain
+    assert reasoning["confidence"] >= THRESHOLD
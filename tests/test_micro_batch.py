@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from backend.services.micro_batch import MicroBatcher
+
+
+def test_results_go_back_in_order():
+    async def scenario():
+        async def double(items):
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(double, window=0.01, max_size=4)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+
+        assert results == [0, 2, 4, 6, 8, 10]
+        assert batcher.stats()["batches"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_short_result_list_fails_every_caller():
+    async def scenario():
+        async def short(items):
+            return items[:-1]
+
+        batcher = MicroBatcher(short, window=0.01, max_size=8)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True),
+            timeout=1
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_batch_releases_its_callers():
+    async def scenario():
+        async def hang(items):
+            await asyncio.sleep(10)
+
+        batcher = MicroBatcher(hang, window=0.001, max_size=8)
+        callers = [asyncio.ensure_future(batcher.submit(i)) for i in range(2)]
+        await asyncio.sleep(0.02)
+
+        for task in list(batcher._running):
+            task.cancel()
+
+        for caller in callers:
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(caller, timeout=1)
+
+    asyncio.run(scenario())
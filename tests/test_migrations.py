@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from backend.agents.memory import MIGRATIONS, MemoryAgent
+from backend.services.case_history import CaseHistory
+
+
+# The cases table as it was before any migration
+BASELINE_SCHEMA = """
+    CREATE TABLE cases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        message TEXT,
+        domain TEXT,
+        eligible BOOLEAN,
+        route TEXT,
+        confidence REAL,
+        reasoning_mode TEXT,
+        created_at TEXT
+    )
+"""
+
+
+def _baseline_store(db_path: str, applied: int = 0) -> None:
+    """A store with two cases, and the first `applied` migrations"""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(BASELINE_SCHEMA)
+        conn.executemany(
+            "INSERT INTO cases (message, domain, eligible, route, confidence, reasoning_mode, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                ("Landlord kept my tenancy deposit", "HOUSING", 1, "housing_team", 0.92, "local", "2024-03-01T10:00:00"),
+                ("Dismissed without notice by employer", "EMPLOYMENT", 1, "employment_team", 0.61, "llm", "2024-03-02T11:00:00"),
+            ]
+        )
+        for statements in MIGRATIONS[:applied]:
+            for statement in statements:
+                conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {applied}")
+
+
+def _version(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+@pytest.mark.parametrize("applied", range(len(MIGRATIONS)))
+def test_existing_store_is_migrated_to_latest(db_path, applied):
+    _baseline_store(db_path, applied)
+
+    MemoryAgent(db_path=db_path)
+
+    assert _version(db_path) == len(MIGRATIONS)
+    with sqlite3.connect(db_path) as conn:
+        # 2: rollup backfilled from the cases already stored
+        assert conn.execute("SELECT SUM(cases) FROM case_daily_stats").fetchone()[0] == 2
+        # 3: token columns added, empty for old cases
+        assert conn.execute("SELECT input_tokens, output_tokens FROM cases").fetchall() == [(None, None)] * 2
+        # 4: archive register
+        assert conn.execute("SELECT COUNT(*) FROM case_archives").fetchone()[0] == 0
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+
+    # 5: full-text index covers the old cases
+    hits = CaseHistory(db_path).search("tenancy deposit")["items"]
+    assert [hit["domain"] for hit in hits] == ["HOUSING"]
+
+
+def test_reopening_a_migrated_store_changes_nothing(db_path):
+    _baseline_store(db_path)
+    MemoryAgent(db_path=db_path)
+    MemoryAgent(db_path=db_path)
+
+    assert _version(db_path) == len(MIGRATIONS)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT SUM(cases) FROM case_daily_stats").fetchone()[0] == 2
+
+
+def test_new_store_is_created_at_latest_version(db_path):
+    MemoryAgent(db_path=db_path)
+
+    assert _version(db_path) == len(MIGRATIONS)
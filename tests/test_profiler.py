@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from backend.services.profiler import SlowRequestProfiler
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = SlowRequestProfiler(str(tmp_path), slow_ms=5, interval_ms=1, max_profiles=2)
+    yield profiler
+    profiler.close()
+
+
+def test_slow_triage_is_kept_with_its_timings(profiler):
+    capture = profiler.start("sync")
+    time.sleep(0.03)
+    profile = profiler.stop(capture, "ACCEPTED", {"reasoner": 30.0})
+
+    assert profile["reason"] == "slow"
+    assert profile["timings"] == {"reasoner": 30.0}
+    assert any("test_slow_triage_is_kept" in stack for stack in profile["stacks"])
+
+
+def test_fast_triage_is_dropped(profiler):
+    capture = profiler.start("sync")
+    assert profiler.stop(capture, "ACCEPTED", {}) is None
+
+
+def test_ring_buffer_keeps_the_newest(profiler):
+    for i in range(5):
+        profiler.save({"id": f"20240101T000000-1-{i:06d}", "reason": "slow", "stacks": {"a;b": 1}})
+
+    assert [summary["id"] for summary in profiler.list()] == [
+        "20240101T000000-1-000004",
+        "20240101T000000-1-000003",
+    ]
+    assert profiler.load("../escape") is None
+
+
+def test_ring_buffer_must_hold_a_profile(tmp_path):
+    with pytest.raises(ValueError):
+        SlowRequestProfiler(str(tmp_path), max_profiles=0)
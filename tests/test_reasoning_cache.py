@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+from backend.services.reasoning_cache import ReasoningCache
+
+
+@pytest.fixture
+def cache_path(tmp_path) -> str:
+    return str(tmp_path / "reasoning_cache.db")
+
+
+def stored(path: str) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM reasoning_cache").fetchone()[0]
+
+
+def test_sqlite_tier_is_capped_at_max_entries(cache_path):
+    cache = ReasoningCache(cache_path, max_entries=10, prune_every=5)
+    for i in range(30):
+        cache.set(f"key-{i}", {"domain": "HOUSING", "confidence": 0.9})
+
+    assert stored(cache_path) == 10
+    # The newest survive
+    cache._entries.clear()
+    assert cache.get("key-29") is not None
+    assert cache.get("key-0") is None
+
+
+def test_expired_entries_are_deleted(cache_path):
+    cache = ReasoningCache(cache_path, ttl_seconds=60)
+    cache.set("stale", {"domain": "DEBT", "confidence": 0.9})
+    cache.set("fresh", {"domain": "DEBT", "confidence": 0.9})
+    with sqlite3.connect(cache_path) as conn:
+        conn.execute("UPDATE reasoning_cache SET stored_at = stored_at - 3600")
+        conn.commit()
+
+    # Read: the expired key is removed, not just skipped
+    cache._entries.clear()
+    assert cache.get("stale") is None
+    assert stored(cache_path) == 1
+
+    # Startup: whatever else expired is pruned
+    ReasoningCache(cache_path, ttl_seconds=60)
+    assert stored(cache_path) == 0
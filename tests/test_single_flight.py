@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from backend.services.single_flight import SingleFlight
+
+
+def test_leader_cancel_leaves_followers_their_result():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        leader = asyncio.ensure_future(flight.ado("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.ado("key", compute))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        assert await follower == ("answer", True)
+        assert len(calls) == 1
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_caller_after_last_cancel_starts_afresh():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return len(calls)
+
+        only = asyncio.ensure_future(flight.ado("key", compute))
+        await asyncio.sleep(0)
+        only.cancel()
+        await asyncio.sleep(0)
+
+        # Arrives before the cancelled computation has finished unwinding
+        assert await flight.ado("key", compute) == (2, False)
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_sync_followers_share_the_leaders_error():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.stats()["in_flight"] == 0
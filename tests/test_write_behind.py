@@ -0,0 +1,90 @@
+import json
+import os
+import sqlite3
+import threading
+
+from backend.agents.memory import MemoryAgent
+from backend.services.triage_state import TriageState
+from backend.services.write_behind import WriteBehindWriter, spill_path
+
+
+RECORD = ("A message", "HOUSING", True, "housing_team", 0.9, "local", None, None, "2024-01-01T00:00:00")
+
+
+def _count(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+
+
+def test_close_drains_every_queued_record(db_path):
+    memory = MemoryAgent(db_path=db_path)
+    # A long interval: nothing is flushed on the timer before close()
+    writer = WriteBehindWriter(db_path, memory.INSERT_SQL, batch_size=1000, flush_interval=10)
+
+    for _ in range(250):
+        assert writer.submit(RECORD)
+    writer.close()
+
+    assert _count(db_path) == 250
+    assert writer.stats()["queue_depth"] == 0
+    assert writer.submit(RECORD) is False
+
+
+def test_records_accepted_during_close_are_written(db_path):
+    memory = MemoryAgent(db_path=db_path)
+    writer = WriteBehindWriter(db_path, memory.INSERT_SQL, max_queue=20, batch_size=5, flush_interval=0.01)
+    accepted = []
+
+    def produce():
+        accepted.append(sum(writer.submit(RECORD, timeout=0.01) for _ in range(200)))
+
+    producers = [threading.Thread(target=produce) for _ in range(4)]
+    for producer in producers:
+        producer.start()
+    writer.close()
+    for producer in producers:
+        producer.join()
+
+    assert _count(db_path) == sum(accepted)
+
+
+def test_unwritable_batch_is_spilled_not_dropped(db_path):
+    MemoryAgent(db_path=db_path)
+    writer = WriteBehindWriter(db_path, "INSERT INTO missing_table VALUES (?)", flush_interval=0.01)
+
+    writer.submit(("lost?",))
+    writer.close()
+
+    assert writer.stats()["failed_records"] == 1
+    with open(f"{db_path}.unwritten.jsonl", encoding="utf-8") as f:
+        assert f.read() == '["lost?"]\n'
+
+
+def test_spilled_records_are_reimported(db_path):
+    memory = MemoryAgent(db_path=db_path)
+    with open(spill_path(memory.db_path), "w", encoding="utf-8") as f:
+        f.write(json.dumps(RECORD) + "\n" + json.dumps(RECORD) + "\n")
+
+    assert memory.reimport_unwritten() == 2
+    assert _count(db_path) == 2
+    assert not os.path.exists(spill_path(memory.db_path))
+    # Nothing left: a second run imports nothing
+    assert memory.reimport_unwritten() == 0
+
+
+def test_memory_agent_queues_in_write_behind_mode(db_path):
+    memory = MemoryAgent(db_path=db_path, write_behind=True, flush_interval=10)
+
+    memory.run_many([_state(f"case {i}") for i in range(10)])
+    memory.close()
+
+    assert _count(db_path) == 10
+
+
+def _state(message: str) -> TriageState:
+    state = TriageState(message=message)
+    state.validation = {"eligible": True}
+    state.reasoning = {"domain": "HOUSING", "confidence": 0.9}
+    state.reasoner_metadata = {"mode": "local"}
+    state.route = "housing_team"
+    return state